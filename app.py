@@ -1,15 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple, Iterator, AsyncIterator
 import uvicorn
 import os
+import asyncio
+import hmac
+import json
+import logging
+import time
 from dotenv import load_dotenv
 
-from models.request_models import QuestionRequest
-from models.response_models import AnswerResponse, LinkResponse
+from models.request_models import QuestionRequest, BatchQuestionRequest, IngestTopic, IngestPost
+from models.response_models import AnswerResponse, BatchAnswerResponse
+from services.answer_encoding import answer_payload, encode_answer, encode_batch
 from services.question_processor import QuestionProcessor
+from services.image_info import ImageTooLarge
 from services.answer_generator import AnswerGenerator
+from services.answer_rules import AnswerRuleBook
+from services.response_cache import ResponseCache, make_cache_key
+from services.answer_executor import AnswerExecutor, ExecutorSaturated
+from services.knowledge_base import KnowledgeLoader, KnowledgeReloader
+from services.knowledge_ingest import KnowledgeIngestor, IngestError, IngestUnavailable
+from services.metrics import REGISTRY
+from services.tracing import TraceSampler, profiled, timed_stage
+from services.llm_synthesizer import LLMSynthesizer
+from services.sharded_search import ShardedSearch
+from services.prefork import serving_prefork, worker_stats
 
 # Load environment variables
 load_dotenv()
@@ -30,9 +48,186 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-question_processor = QuestionProcessor()
-answer_generator = AnswerGenerator()
+# LAZY_STARTUP=true binds the server first and loads the knowledge base in
+# the background; until /ready reports ready only predefined answers are served
+lazy_startup = os.getenv("LAZY_STARTUP", "false").lower() == "true"
+
+# Initialize services (sharing one predefined answer rule book); corpus
+# words are never spelling-corrected
+answer_rules = AnswerRuleBook()
+answer_generator = AnswerGenerator(answer_rules, lazy=lazy_startup)
+question_processor = QuestionProcessor(answer_rules, known_terms=answer_generator.has_term)
+
+# Live topic/post ingests, replayed from INGEST_LOG_PATH once the knowledge base is loaded
+knowledge_ingestor = KnowledgeIngestor(answer_generator)
+
+# Scatter-gather search over SEARCH_SHARDS worker processes (0 searches in-process)
+sharded_search = ShardedSearch.from_env(answer_generator)
+
+# Cache answers for repeated questions (RESPONSE_CACHE_SIZE=0 disables it)
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 300))
+)
+
+# Optional LLM answer synthesis over retrieved context (LLM_SYNTHESIS=true)
+llm_synthesizer = LLMSynthesizer.from_env()
+
+# Per-request traces: X-Debug-Trace header (when allowed) or TRACE_SAMPLE_RATE
+trace_sampler = TraceSampler.from_env()
+# Sampled traces are logged here at DEBUG level
+trace_logger = logging.getLogger("tds_virtual_ta.trace")
+
+
+@profiled
+def answer_pipeline(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> dict:
+    """
+    Synchronous question -> answer data pipeline (runs on the answer executor)
+    """
+    processed_question = question_processor.process_question(question, image_b64)
+    processed_question['top_k'] = top_k
+    return answer_generator.generate_answer(processed_question)
+
+
+def answer_batch_pipeline(items: List[Tuple[str, Optional[str], Optional[int]]]) -> List[dict]:
+    """
+    Batch version of answer_pipeline; searches are scored together
+    """
+    processed_questions = []
+    for question, image_b64, top_k in items:
+        processed_question = question_processor.process_question(question, image_b64)
+        processed_question['top_k'] = top_k
+        processed_questions.append(processed_question)
+    return answer_generator.generate_answers(processed_questions)
+
+
+def answer_stream_pipeline(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> Iterator[dict]:
+    """
+    Streaming version of answer_pipeline; yields answer events as they are produced
+    """
+    processed_question = question_processor.process_question(question, image_b64)
+    processed_question['top_k'] = top_k
+    return answer_generator.generate_answer_stream(processed_question)
+
+
+# Keep CPU-bound answering off the event loop (ANSWER_EXECUTOR=inline|thread|process)
+answer_executor = AnswerExecutor.from_env(answer_pipeline, answer_batch_pipeline, answer_stream_pipeline)
+
+# Corpus, index and queue gauges, read when /metrics is scraped
+REGISTRY.gauge(
+    'tds_corpus_documents', 'Documents in the active knowledge snapshot', ['source'],
+    callback=lambda: {
+        ('course_content',): len(answer_generator.enhanced_course_content),
+        ('discourse',): len(answer_generator.enhanced_discourse_posts)
+    }
+)
+REGISTRY.gauge(
+    'tds_index_documents', 'Documents in the search index',
+    callback=lambda: len(answer_generator.search_index)
+)
+REGISTRY.gauge(
+    'tds_index_terms', 'Distinct terms in the search index',
+    callback=lambda: len(answer_generator.search_index.postings)
+)
+REGISTRY.gauge(
+    'tds_knowledge_snapshot_version', 'Version of the active knowledge snapshot',
+    callback=lambda: answer_generator.snapshot.version
+)
+REGISTRY.gauge(
+    'tds_predefined_answers', 'Predefined answers loaded from the rules file',
+    callback=lambda: len(answer_rules.rules)
+)
+REGISTRY.gauge(
+    'tds_response_cache_entries', 'Answers held in the response cache',
+    callback=lambda: len(response_cache.entries)
+)
+REGISTRY.gauge(
+    'tds_executor_queue_depth', 'Answer jobs waiting for a worker',
+    callback=lambda: answer_executor.queue_depth
+)
+REGISTRY.gauge(
+    'tds_executor_in_progress', 'Answer jobs accepted and not yet finished',
+    callback=lambda: answer_executor.pending
+)
+
+# Largest number of questions accepted by /api/batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 100))
+
+
+# Rebuild the knowledge base in the background when scraped data changes
+knowledge_reloader = KnowledgeReloader(
+    answer_generator,
+    interval=float(os.getenv("KNOWLEDGE_RELOAD_INTERVAL", 30))
+)
+
+
+def load_knowledge() -> None:
+    """
+    Build the first knowledge snapshot and replay live ingests into it
+    """
+    answer_generator.load_knowledge()
+    knowledge_ingestor.attach()
+
+
+def start_knowledge_services() -> None:
+    """
+    Background work that follows the loaded snapshot
+    """
+    # Pre-forked workers keep the snapshot they inherited until restarted
+    if not serving_prefork():
+        knowledge_reloader.start()
+    if sharded_search is not None:
+        sharded_search.start_build()
+
+
+knowledge_loader = KnowledgeLoader(load_knowledge, start_knowledge_services, lazy=lazy_startup)
+if not lazy_startup:
+    knowledge_loader.load()
+
+# Seconds clients are asked to wait while the knowledge base is loading
+STARTUP_RETRY_AFTER = 5
+
+
+@app.on_event("startup")
+def start_background_services():
+    answer_rules.start()
+    knowledge_loader.start()
+    if llm_synthesizer is not None:
+        llm_synthesizer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    answer_rules.stop()
+    knowledge_reloader.stop()
+    answer_executor.shutdown()
+    if sharded_search is not None:
+        sharded_search.shutdown()
+    if llm_synthesizer is not None:
+        await llm_synthesizer.close()
+
+
+def require_admin(token: Optional[str]) -> None:
+    """
+    Check the X-Admin-Token header against ADMIN_TOKEN (admin API is off when unset)
+    """
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def require_single_process() -> None:
+    """
+    Refuse knowledge changes in a pre-forked worker; they would only reach
+    the worker that received the request
+    """
+    if serving_prefork():
+        raise HTTPException(
+            status_code=409,
+            detail="Knowledge reloads and ingests are disabled with pre-forked workers; restart serve.py to pick up changes"
+        )
 
 
 @app.get("/")
@@ -45,7 +240,11 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /api/": "Submit a question to get an answer",
-            "GET /health": "Health check endpoint"
+            "POST /api/batch": "Submit a list of questions and get answers in order",
+            "POST /api/stream": "Stream an answer as SSE (default) or NDJSON (?format=ndjson)",
+            "GET /health": "Liveness check (the process is up)",
+            "GET /ready": "Readiness check (the knowledge base is loaded)",
+            "GET /metrics": "Prometheus metrics"
         }
     }
 
@@ -58,8 +257,43 @@ async def health_check():
     return {"status": "healthy", "service": "TDS Virtual TA"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: 503 until the knowledge base is loaded and indexed
+    """
+    if not knowledge_loader.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed" if knowledge_loader.error else "loading", "error": knowledge_loader.error},
+            headers={"Retry-After": str(STARTUP_RETRY_AFTER)}
+        )
+    return {"status": "ready", "knowledge_snapshot_version": answer_generator.snapshot.version}
+
+
+def not_ready_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Knowledge base is still loading, please retry shortly",
+        headers={"Retry-After": str(STARTUP_RETRY_AFTER)}
+    )
+
+
+def answer_before_ready(question: str) -> dict:
+    """
+    Predefined answer for a question asked while the knowledge base is
+    still loading; anything that needs search is refused with a 503
+    """
+    answer_data = answer_generator.find_predefined_answer(question_processor.process_question(question))
+    if answer_data is None:
+        raise not_ready_error()
+    return answer_data
+
+
 @app.post("/api/", response_model=AnswerResponse)
-async def answer_question(request: QuestionRequest):
+async def answer_question(request: QuestionRequest,
+                          x_debug_trace: Optional[str] = Header(None),
+                          x_debug_profile: Optional[str] = Header(None)):
     """
     Main API endpoint to answer student questions
     
@@ -73,33 +307,306 @@ async def answer_question(request: QuestionRequest):
         # Validate request
         if not request.question or len(request.question.strip()) == 0:
             raise HTTPException(status_code=400, detail="Question cannot be empty")
+        check_image_size(request.image)
         
-        # Process the question
-        processed_question = question_processor.process_question(
-            request.question, 
-            request.image
-        )
+        if not knowledge_loader.ready:
+            return json_bytes_response(format_answer(answer_before_ready(request.question)))
+        cache_key = answer_cache_key(request)
         
-        # Generate answer
-        answer_data = answer_generator.generate_answer(processed_question)
+        trace = trace_sampler.start(x_debug_trace, x_debug_profile)
+        if trace is not None:
+            return await answer_traced(request, cache_key, trace)
         
-        # Format response
-        response = AnswerResponse(
-            answer=answer_data['answer'],
-            links=[
-                LinkResponse(url=link['url'], text=link.get('text', link.get('title', 'Link')))
-                for link in answer_data['links']
-            ]
-        )
+        # Cached bodies are already-encoded JSON, sent as is
+        return json_bytes_response(await response_cache.get_or_compute(cache_key, lambda: compute_answer(request)))
         
-        return response
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise busy_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/api/batch", response_model=BatchAnswerResponse)
+async def answer_batch(request: BatchQuestionRequest):
+    """
+    Answer a list of questions in one request, returning answers in order
+    
+    Identical questions are answered once, cached answers are reused and
+    the remaining questions are processed together as a single job.
+    """
+    try:
+        if not request.questions:
+            raise HTTPException(status_code=400, detail="Questions cannot be empty")
+        if len(request.questions) > BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(request.questions)} questions (max {BATCH_MAX_SIZE})"
+            )
+        for position, item in enumerate(request.questions):
+            if not item.question or len(item.question.strip()) == 0:
+                raise HTTPException(status_code=400, detail=f"Question {position} cannot be empty")
+            check_image_size(item.image)
+        
+        if not knowledge_loader.ready:
+            return json_bytes_response(encode_batch([
+                format_answer(answer_before_ready(item.question)) for item in request.questions
+            ]))
+        cache_keys = [answer_cache_key(item) for item in request.questions]
+        
+        # Resolve each distinct question once, from the cache where possible
+        resolved = {}
+        to_compute = {}
+        for cache_key, item in zip(cache_keys, request.questions):
+            if cache_key in resolved or cache_key in to_compute:
+                continue
+            found, response = response_cache.lookup(cache_key)
+            if found:
+                resolved[cache_key] = response
+            else:
+                to_compute[cache_key] = item
+        
+        if to_compute:
+            started = time.perf_counter()
+            items = [(item.question, item.image, item.top_k) for item in to_compute.values()]
+            answers_data = await answer_executor.submit_batch(items)
+            answers_data = await asyncio.gather(*[
+                synthesize_answer(question, answer_data, started)
+                for (question, _, _), answer_data in zip(items, answers_data)
+            ])
+            for cache_key, answer_data in zip(to_compute, answers_data):
+                response = format_answer(answer_data)
+                response_cache.put(cache_key, response)
+                resolved[cache_key] = response
+        
+        return json_bytes_response(encode_batch([resolved[cache_key] for cache_key in cache_keys]))
         
     except HTTPException:
         raise
+    except ExecutorSaturated as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+
+@app.post("/api/stream")
+async def answer_question_stream(request: QuestionRequest, format: str = Query("sse")):
+    """
+    Streaming variant of /api/: links and answer fragments are sent as soon
+    as each stage produces them
+    
+    format=sse (default) sends Server-Sent Events; format=ndjson sends one
+    JSON object per line. Event types are meta (sent first, before any
+    searching), link, answer (a fragment to append), done (the full answer
+    and links) and error. Answers go through the same executor, caches and
+    LLM synthesis as /api/; a full queue is refused with a 503 up front.
+    """
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format '{format}', use sse or ndjson")
+    if not request.question or len(request.question.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    check_image_size(request.image)
+    
+    found = False
+    if not knowledge_loader.ready:
+        events = answer_events(answer_before_ready(request.question))
+    else:
+        cache_key = answer_cache_key(request)
+        found, response = response_cache.lookup(cache_key)
+        if found:
+            events = answer_events(json.loads(response))
+        else:
+            try:
+                events = answer_executor.stream(request.question, request.image, request.top_k)
+            except ExecutorSaturated as e:
+                raise busy_error(e)
+            events = synthesized_answer_events(request.question, events, cache_key, time.perf_counter())
+    
+    return StreamingResponse(
+        encode_stream(stream_meta(found), events, format),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def stream_meta(cached: bool) -> dict:
+    """
+    First event of a stream, sent before the answer pipeline has produced anything
+    """
+    return {
+        "type": "meta",
+        "cached": cached,
+        "knowledge_snapshot_version": answer_generator.snapshot.version
+    }
+
+
+async def answer_events(answer_data: dict) -> AsyncIterator[dict]:
+    """
+    Generator-style events for an answer that is already complete (cached
+    or predefined)
+    """
+    for link in answer_data['links']:
+        yield dict(link, type='link')
+    yield {'type': 'answer', 'text': answer_data['answer']}
+    yield {'type': 'done', 'answer_data': answer_data}
+
+
+async def synthesized_answer_events(question: str, events: AsyncIterator[dict], cache_key: tuple,
+                                    started: float) -> AsyncIterator[dict]:
+    """
+    Pass generator events through, applying LLM synthesis to the finished
+    answer and caching it
+    
+    With synthesis enabled, answer fragments are held back until the
+    synthesized answer (or, on failure, the retrieval answer) is known.
+    """
+    fragments = []
+    async for event in events:
+        if event['type'] == 'answer' and llm_synthesizer is not None:
+            fragments.append(event)
+            continue
+        if event['type'] != 'done':
+            yield event
+            continue
+        
+        answer_data = await synthesize_answer(question, event['answer_data'], started)
+        if answer_data is not event['answer_data']:
+            fragments = [{'type': 'answer', 'text': answer_data['answer']}]
+        for fragment in fragments:
+            yield fragment
+        response_cache.put(cache_key, format_answer(answer_data))
+        yield {'type': 'done', 'answer_data': answer_data}
+
+
+async def encode_stream(meta: dict, events: AsyncIterator[dict], format: str) -> AsyncIterator[str]:
+    yield encode_stream_event(meta, format)
+    try:
+        async for event in events:
+            yield encode_stream_event(format_stream_event(event), format)
+    except Exception as e:
+        yield encode_stream_event({"type": "error", "detail": f"Internal server error: {str(e)}"}, format)
+
+
+def format_stream_event(event: dict) -> dict:
+    """
+    Map generator events onto the API's link and answer shapes ({url, text})
+    """
+    if event['type'] == 'link':
+        return {"type": "link", "url": event['url'], "text": event.get('text', event.get('title', 'Link'))}
+    if event['type'] == 'done':
+        return {"type": "done", **answer_payload(event['answer_data'])}
+    return event
+
+
+def encode_stream_event(event: dict, format: str) -> str:
+    if format == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+def check_image_size(image_b64: Optional[str]) -> None:
+    """
+    Reject images over MAX_IMAGE_BYTES with a 413 before anything is decoded or queued
+    """
+    try:
+        question_processor.check_image_size(image_b64)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+def answer_cache_key(request: QuestionRequest) -> tuple:
+    """
+    Response cache key for a question and its image
+    """
+    # Answers don't depend on letter case, so near-identical questions share an entry
+    return make_cache_key(
+        question_processor.clean_question(request.question).lower(),
+        request.image,
+        request.top_k or answer_generator.default_top_k,
+        answer_rules.version,
+        answer_generator.snapshot.version,
+        knowledge_ingestor.revision
+    )
+
+
+def busy_error(error: ExecutorSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+async def compute_answer(request: QuestionRequest) -> bytes:
+    """
+    Run the full question -> answer pipeline for a cache miss
+    """
+    started = time.perf_counter()
+    answer_data = await answer_executor.submit(request.question, request.image, request.top_k)
+    answer_data = await synthesize_answer(request.question, answer_data, started)
+    return format_answer(answer_data)
+
+
+async def synthesize_answer(question: str, answer_data: dict, started: float) -> dict:
+    """
+    Replace a contextual answer with an LLM synthesis of its context
+    
+    The LLM gets whatever is left of LLM_DEADLINE since the request
+    started; on timeout or error the retrieval answer is kept.
+    """
+    if llm_synthesizer is None or not answer_data.get('context'):
+        return answer_data
+    budget = llm_synthesizer.deadline - (time.perf_counter() - started)
+    answer = await llm_synthesizer.synthesize(question, answer_data['context'], budget)
+    if answer is None:
+        return answer_data
+    return dict(answer_data, answer=answer)
+
+
+async def answer_traced(request: QuestionRequest, cache_key: tuple, trace) -> Response:
+    """
+    Answer bypassing the cache lookup so the trace covers the whole pipeline
+    
+    Requested traces are returned in a "debug" field; sampled traces are
+    only logged, leaving the response unchanged.
+    """
+    response = await compute_answer(request)
+    response_cache.put(cache_key, response)
+    trace.finish()
+    
+    if trace.reason != 'header':
+        if trace_logger.isEnabledFor(logging.DEBUG):
+            trace_logger.debug("Request trace: %s", json.dumps(trace.to_dict()))
+        return json_bytes_response(response)
+    return JSONResponse({**json.loads(response), "debug": trace.to_dict()})
+
+
+def format_answer(answer_data: dict) -> bytes:
+    """
+    Encode generator output as an AnswerResponse JSON body
+    
+    Predefined and fallback answers carry bytes encoded at load time;
+    other answers are encoded here (with orjson when installed).
+    """
+    with timed_stage('serialize'):
+        return encode_answer(answer_data)
+
+
+def json_bytes_response(body: bytes) -> Response:
+    """
+    Send an encoded body directly, skipping response_model validation and
+    FastAPI's generic encoder (the routes keep response_model for the docs)
+    """
+    return Response(content=body, media_type="application/json")
+
+
 @app.get("/api/stats")
 async def get_stats():
     """
@@ -111,10 +618,83 @@ async def get_stats():
     return {
         "discourse_topics": discourse_count,
         "course_content_sections": course_content_count,
-        "predefined_answer_categories": len(answer_generator.predefined_answers)
+        "predefined_answer_categories": len(answer_generator.predefined_answers),
+        "response_cache": response_cache.get_stats(),
+        "semantic_cache": answer_generator.semantic_cache.get_stats(),
+        "executor": answer_executor.get_stats(),
+        "knowledge_snapshot": answer_generator.snapshot.get_stats(),
+        "llm_synthesis": llm_synthesizer.get_stats() if llm_synthesizer else None,
+        "ingest": knowledge_ingestor.get_stats(),
+        "sharded_search": sharded_search.get_stats() if sharded_search else None,
+        "startup": knowledge_loader.get_stats(),
+        "workers": worker_stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, question and answer
+    path counters, and corpus/index/queue gauges
+    
+    With ANSWER_EXECUTOR=process the pipeline metrics are recorded in the
+    worker processes and are not visible here.
+    """
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/api/admin/reload", status_code=202)
+async def reload_knowledge(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rebuild the knowledge base in the background and swap it in when ready
+    """
+    require_admin(x_admin_token)
+    require_single_process()
+    
+    if answer_generator.reload_lock.locked():
+        return {"status": "already_reloading", "active_version": answer_generator.snapshot.version}
+    
+    asyncio.get_running_loop().run_in_executor(None, answer_generator.reload_knowledge)
+    return {"status": "reloading", "active_version": answer_generator.snapshot.version}
+
+
+async def run_ingest(func, *args) -> dict:
+    """
+    Apply an ingest off the event loop and drop cached answers it may change
+    """
+    require_single_process()
+    if not knowledge_loader.ready:
+        raise not_ready_error()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    except IngestError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except IngestUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    response_cache.clear()
+    return result
+
+
+@app.post("/api/admin/topics")
+async def ingest_topic(topic: IngestTopic, x_admin_token: Optional[str] = Header(None)):
+    """
+    Add or update a Discourse topic; it is searchable as soon as this returns
+    
+    With ANSWER_EXECUTOR=process, workers pick up ingests only when restarted.
+    """
+    require_admin(x_admin_token)
+    return await run_ingest(knowledge_ingestor.ingest_topic, topic.model_dump(exclude_none=True))
+
+
+@app.post("/api/admin/topics/{topic_id}/posts")
+async def ingest_post(topic_id: int, post: IngestPost, x_admin_token: Optional[str] = Header(None)):
+    """
+    Add or update one post of an existing topic
+    """
+    require_admin(x_admin_token)
+    return await run_ingest(knowledge_ingestor.ingest_post, topic_id, post.model_dump(exclude_none=True))
+
+
 if __name__ == "__main__":
     # Get configuration from environment
     host = os.getenv("APP_HOST", "127.0.0.1")
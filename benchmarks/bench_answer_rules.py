@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: predefined-answer lookup cost as the rule table grows from the
+bundled rules to thousands of synthetic FAQs.
+
+Run from the repository root:
+    python -m benchmarks.bench_answer_rules
+"""
+import random
+import time
+
+from services.answer_rules import AnswerRuleBook
+from services.question_matcher import QuestionMatcher
+from benchmarks.bench_question_matching import SAMPLE_QUESTIONS
+
+
+def synthetic_rules(count: int, seed: int = 0):
+    """Rules with made-up two-word phrases that rarely occur in real questions"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    def word():
+        return ''.join(rng.choice(letters) for _ in range(rng.randint(5, 9)))
+
+    rules = []
+    for index in range(count):
+        groups = [[f"{word()} {word()}" for _ in range(3)]]
+        if index % 4 == 0:
+            groups.append([word()])
+        rules.append((f"synthetic.faq_{index}", groups))
+    return rules
+
+
+def main(rounds: int = 1000):
+    bundled = AnswerRuleBook().rules
+    questions = SAMPLE_QUESTIONS
+
+    print(f"{'rules':>8} {'build ms':>10} {'lookup us':>10}")
+    for extra in (0, 100, 1000, 5000):
+        rules = bundled + synthetic_rules(extra)
+
+        start = time.perf_counter()
+        matcher = QuestionMatcher([], classification_rules=[], answer_rules=rules)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for question in questions:
+                matcher.match(question)
+        lookup_us = (time.perf_counter() - start) / (rounds * len(questions)) * 1e6
+
+        print(f"{len(rules):>8} {build_ms:>10.1f} {lookup_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: image handling in QuestionProcessor.process_image.
+
+Compares the previous approach (base64-decode the whole image to report
+its size) with header sniffing (size from the base64 length, format and
+dimensions from the PNG/JPEG/WebP header only): time per call and peak
+memory allocated, for synthetic screenshots of growing size. The JPEGs
+carry a large EXIF segment before the frame header, as phone photos do.
+
+Run from the repository root:
+    python -m benchmarks.bench_image
+    python -m benchmarks.bench_image --sizes 1 5 20 --rounds 20
+"""
+import argparse
+import base64
+import os
+import struct
+import time
+import tracemalloc
+from typing import Callable, Dict, Any
+
+from services.image_info import decoded_size, sniff_image
+
+
+def synthetic_png(size: int, width: int = 1920, height: int = 1080) -> bytes:
+    ihdr = struct.pack('>II', width, height) + b'\x08\x06\x00\x00\x00'
+    header = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + b'\x00' * 4
+    return header + os.urandom(max(0, size - len(header)))
+
+
+def synthetic_jpeg(size: int, width: int = 4032, height: int = 3024) -> bytes:
+    exif = b'\xff\xe1' + struct.pack('>H', 65535) + os.urandom(65533)
+    frame = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, height, width) + b'\x00' * 12
+    header = b'\xff\xd8' + exif + frame + b'\xff\xda'
+    return header + os.urandom(max(0, size - len(header)))
+
+
+def previous_image_info(image_b64: str) -> Dict[str, Any]:
+    """The previous process_image: decode everything, report the length"""
+    return {'size_bytes': len(base64.b64decode(image_b64)), 'format': 'base64_decoded'}
+
+
+def current_image_info(image_b64: str) -> Dict[str, Any]:
+    return {'size_bytes': decoded_size(image_b64), **sniff_image(image_b64)}
+
+
+def measure(func: Callable[[str], Any], image_b64: str, rounds: int):
+    """(ms per call, peak bytes allocated by one call)"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(image_b64)
+    elapsed = (time.perf_counter() - started) / rounds * 1000
+
+    tracemalloc.start()
+    func(image_b64)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.5, 2, 8], help='Decoded image sizes in MB')
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'image':<6} {'MB':>5}  {'before ms':>9}  {'after ms':>8}  {'before peak KB':>14}  "
+          f"{'after peak KB':>13}  result")
+    for megabytes in args.sizes:
+        size = int(megabytes * 1024 * 1024)
+        for name, build in (('png', synthetic_png), ('jpeg', synthetic_jpeg)):
+            image_b64 = base64.b64encode(build(size)).decode('ascii')
+            before_ms, before_peak = measure(previous_image_info, image_b64, args.rounds)
+            after_ms, after_peak = measure(current_image_info, image_b64, args.rounds)
+            info = current_image_info(image_b64)
+            print(f"{name:<6} {megabytes:>5g}  {before_ms:>9.2f}  {after_ms:>8.3f}  {before_peak / 1024:>14.0f}  "
+                  f"{after_peak / 1024:>13.0f}  {info['format']} {info['width']}x{info['height']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-question cost of keyword extraction, classification and
+predefined-answer lookup, before (separate substring checks and regexes)
+and after (single automaton pass).
+
+Run from the repository root:
+    python -m benchmarks.bench_question_matching
+"""
+import re
+import time
+from typing import List, Optional
+
+from services.question_processor import QuestionProcessor
+
+
+SAMPLE_QUESTIONS = [
+    "The question asks to use gpt-3.5-turbo-0125 model but the ai-proxy provided by Anand sir only supports gpt-4o-mini. So should we just use gpt-4o-mini or use the OpenAI API for gpt3.5 turbo?",
+    "If a student scores 10/10 on GA4 as well as a bonus, how would it appear on the dashboard?",
+    "I know Docker but have not used Podman before. Should I use Docker for this course?",
+    "When is the TDS Sep 2025 end-term exam?",
+    "What is TDS and what does the course cover?",
+    "My score keeps resetting to 0 after I save GA5",
+    "Do I need my IITM email for the github email on the project?",
+    "How do I scrape a website with Playwright and schedule it with GitHub Actions?",
+]
+
+
+class LegacyMatcher:
+    """The pre-automaton implementation, kept verbatim for comparison"""
+
+    def __init__(self, keywords: List[str], answer_rules):
+        self.common_tds_keywords = keywords
+        self.answer_rules = answer_rules
+
+    def extract_keywords(self, question: str) -> List[str]:
+        keywords = []
+        question_lower = question.lower()
+        for keyword in self.common_tds_keywords:
+            if keyword.lower() in question_lower:
+                keywords.append(keyword)
+        model_patterns = [r'gpt-?3\.?5-?turbo-?0125', r'gpt-?4o-?mini', r'gpt-?4', r'gpt-?3\.?5']
+        for pattern in model_patterns:
+            keywords.extend(re.findall(pattern, question, flags=re.IGNORECASE))
+        keywords.extend(re.findall(r'ga\d+', question, flags=re.IGNORECASE))
+        return list(set(keywords))
+
+    def classify_question(self, question: str) -> str:
+        question_lower = question.lower()
+        if any(phrase in question_lower for phrase in ['what is tds', 'tds full form', 'stands for', 'about tds', 'tools in data science']):
+            return 'course_info'
+        elif any(word in question_lower for word in ['grade', 'grading', 'deadline', 'due date', 'project 01', 'project 1', 's grade']):
+            return 'grading_system'
+        elif any(word in question_lower for word in ['gpt', 'model', 'ai-proxy', 'openai']):
+            return 'model_usage'
+        elif any(word in question_lower for word in ['docker', 'podman', 'container']):
+            return 'environment_setup'
+        elif any(word in question_lower for word in ['ga4', 'ga5', 'graded assignment', 'assignment']):
+            return 'assignment_help'
+        elif any(word in question_lower for word in ['dashboard', 'score', 'marks', 'bonus']):
+            return 'grading_system'
+        elif any(word in question_lower for word in ['exam', 'end-term', 'when is']):
+            return 'schedule_inquiry'
+        return 'general'
+
+    def get_predefined_answer_key(self, question: str) -> Optional[str]:
+        question_lower = question.lower()
+        for answer_key, groups in self.answer_rules:
+            if all(any(phrase in question_lower for phrase in group) for group in groups):
+                return answer_key
+        return None
+
+
+def time_per_question(func, questions: List[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            func(question)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(questions)) * 1e6
+
+
+def main(rounds: int = 2000):
+    processor = QuestionProcessor()
+    matcher = processor.question_matcher
+    legacy = LegacyMatcher(processor.common_tds_keywords, processor.answer_rules.rules)
+
+    # The two implementations must agree before timing means anything
+    for question in SAMPLE_QUESTIONS:
+        result = matcher.match(question)
+        assert sorted(result['keywords']) == sorted(legacy.extract_keywords(question)), question
+        assert result['question_type'] == legacy.classify_question(question), question
+        assert result['predefined_answer_key'] == legacy.get_predefined_answer_key(question), question
+
+    def legacy_all(question: str):
+        legacy.extract_keywords(question)
+        legacy.classify_question(question)
+        legacy.get_predefined_answer_key(question)
+
+    before = time_per_question(legacy_all, SAMPLE_QUESTIONS, rounds)
+    after = time_per_question(matcher.match, SAMPLE_QUESTIONS, rounds)
+
+    print(f"Questions: {len(SAMPLE_QUESTIONS)} x {rounds} rounds")
+    print(f"Before (separate scans): {before:8.2f} us/question")
+    print(f"After  (single automaton): {after:8.2f} us/question")
+    print(f"Speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
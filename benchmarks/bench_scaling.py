@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark: how AnswerGenerator load time, memory and per-query latency
+scale with corpus size, using synthetic corpora.
+
+Each size is measured in a fresh interpreter so memory numbers are not
+polluted by earlier runs. The run fails (exit 1) when a metric grows
+faster than its allowed scaling exponent between sizes, or regresses
+against a saved --baseline.
+
+Run from the repository root:
+    python -m benchmarks.bench_scaling --sizes 1000 10000 100000 --output scaling.json
+    python -m benchmarks.bench_scaling --baseline scaling.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any
+
+from benchmarks.synthetic_corpus import write_corpus
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Largest allowed growth exponent between consecutive sizes (1.0 = linear).
+# Queries rank every candidate document, so they may grow as n log n.
+DEFAULT_MAX_EXPONENTS = {
+    'load_seconds': 1.25,
+    'rss_mb': 1.25,
+    'query_p50_us': 1.35,
+    'query_p95_us': 1.35
+}
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def measure(queries: int = 100, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Load the corpus in the current directory and time the search path.
+    Runs inside the child interpreter started by run_size().
+    """
+    from benchmarks.bench_question_matching import SAMPLE_QUESTIONS
+    from services.answer_generator import AnswerGenerator
+    from services.question_processor import QuestionProcessor
+
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    load_seconds = time.perf_counter() - started
+    rss_after = current_rss_mb()
+
+    processor = QuestionProcessor(generator.answer_rules, known_terms=generator.has_term)
+    rng = random.Random(seed)
+    posts = generator.enhanced_discourse_posts
+    questions = list(SAMPLE_QUESTIONS) + [
+        posts[rng.randrange(len(posts))]['title'] for _ in range(queries)
+    ]
+    processed_questions = [processor.process_question(question) for question in questions]
+
+    # Best of a few runs per query, to keep scheduler noise out of the percentiles
+    timings = []
+    for processed_question in processed_questions:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            relevant_content = generator.search_enhanced_content(processed_question)
+            if relevant_content:
+                generator.generate_contextual_answer(processed_question, relevant_content)
+            best = min(best, time.perf_counter() - started)
+        timings.append(best)
+    timings.sort()
+
+    return {
+        'documents': len(generator.search_index),
+        'terms': len(generator.search_index.postings),
+        'load_seconds': round(load_seconds, 4),
+        'rss_mb': round(rss_after - rss_before, 2),
+        'query_p50_us': round(timings[len(timings) // 2] * 1e6, 2),
+        'query_p95_us': round(timings[int(len(timings) * 0.95)] * 1e6, 2),
+        'queries': len(timings)
+    }
+
+
+def run_size(size: int, workdir: str, sections: int, queries: int) -> Dict[str, Any]:
+    """
+    Generate (or reuse) a corpus of size topics and measure it in a child process
+    """
+    corpus_dir = os.path.join(workdir, f"corpus-{size}-{sections}")
+    if not os.path.exists(os.path.join(corpus_dir, 'data', 'discourse_posts.json')):
+        write_corpus(corpus_dir, topics=size, sections=sections)
+
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, KNOWLEDGE_SNAPSHOT_PATH='', KNOWLEDGE_RELOAD_INTERVAL='0')
+    env.pop('PREDEFINED_ANSWERS_PATH', None)
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_scaling', '--measure', '--queries', str(queries)],
+        cwd=corpus_dir, env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['size'] = size
+    return result
+
+
+def check_scaling(results: List[Dict[str, Any]], max_exponents: Dict[str, float]) -> List[str]:
+    """
+    Growth exponent of each metric between consecutive sizes:
+    log(metric ratio) / log(size ratio)
+    """
+    problems = []
+    for smaller, larger in zip(results, results[1:]):
+        size_ratio = larger['documents'] / smaller['documents']
+        for metric, limit in max_exponents.items():
+            # Ignore metrics too small to measure reliably
+            if smaller[metric] <= 0 or larger[metric] <= 0 or (metric == 'rss_mb' and smaller[metric] < 1):
+                continue
+            exponent = math.log(larger[metric] / smaller[metric]) / math.log(size_ratio)
+            larger.setdefault('exponents', {})[metric] = round(exponent, 3)
+            if exponent > limit:
+                problems.append(
+                    f"{metric} grows as n^{exponent:.2f} from {smaller['size']} to {larger['size']} topics (limit n^{limit})"
+                )
+    return problems
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], max_regression: float) -> List[str]:
+    """
+    Metrics worse than the baseline run at the same size by more than max_regression
+    """
+    previous_by_size = {entry['size']: entry for entry in baseline}
+    problems = []
+    for result in results:
+        previous = previous_by_size.get(result['size'])
+        if previous is None:
+            continue
+        for metric in DEFAULT_MAX_EXPONENTS:
+            if result[metric] > previous[metric] * (1 + max_regression):
+                problems.append(f"{metric} at {result['size']} topics: {result[metric]} vs baseline {previous[metric]}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure AnswerGenerator scaling on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Discourse topic counts")
+    parser.add_argument('--sections', type=int, default=100, help="Course content sections per corpus")
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'tds-scaling'),
+                        help="Where generated corpora are kept and reused")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.queries)))
+        return 0
+
+    results = []
+    print(f"{'topics':>8} {'docs':>8} {'terms':>8} {'load s':>8} {'rss MB':>8} {'p50 us':>9} {'p95 us':>9}")
+    for size in sorted(args.sizes):
+        result = run_size(size, args.workdir, args.sections, args.queries)
+        results.append(result)
+        print(f"{size:>8} {result['documents']:>8} {result['terms']:>8} {result['load_seconds']:>8.2f} "
+              f"{result['rss_mb']:>8.1f} {result['query_p50_us']:>9.1f} {result['query_p95_us']:>9.1f}")
+
+    problems = check_scaling(results, DEFAULT_MAX_EXPONENTS)
+    for smaller, larger in zip(results, results[1:]):
+        print(f"{smaller['size']} -> {larger['size']}: exponents {larger.get('exponents', {})}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems += compare(results, json.load(f), args.max_regression)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU spent turning answers into HTTP responses.
+
+Compares the previous path (build LinkResponse/AnswerResponse models,
+validate them against response_model, run FastAPI's generic encoder)
+with pre-serialized predefined/fallback answers and orjson-encoded
+dynamic answers:
+
+1. encoding alone, per answer kind
+2. CPU time per request to /api/ through the ASGI app, as it is and
+   patched to return pydantic models again, with the response cache
+   disabled (every request runs the pipeline) and enabled (cache hits)
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+"""
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault('KNOWLEDGE_RELOAD_INTERVAL', '0')
+os.environ.setdefault('ANSWER_EXECUTOR', 'inline')
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.response_models import AnswerResponse, LinkResponse
+from services.answer_encoding import encode_answer, orjson
+
+
+QUESTIONS = {
+    'predefined': 'I know Docker but have not used Podman before. Should I use Docker for this course?',
+    'contextual': 'how to install python with uv and sqlite',
+    'fallback': 'zzz qqq'
+}
+
+
+def legacy_response(answer_data: Dict[str, Any]) -> bytes:
+    """The previous path: pydantic models, response_model validation, jsonable_encoder, json.dumps"""
+    response = AnswerResponse(
+        answer=answer_data['answer'],
+        links=[
+            LinkResponse(url=link['url'], text=link.get('text', link.get('title', 'Link')))
+            for link in answer_data['links']
+        ]
+    )
+    validated = AnswerResponse.model_validate(response, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def microseconds_per_call(func: Callable[[], Any], rounds: int) -> float:
+    started = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - started) / rounds * 1e6
+
+
+async def cpu_per_request(client: httpx.AsyncClient, path: str, question: str, rounds: int) -> float:
+    await client.post(path, json={'question': question})
+    started = time.process_time()
+    for _ in range(rounds):
+        response = await client.post(path, json={'question': question})
+        response.raise_for_status()
+    return (time.process_time() - started) / rounds * 1e6
+
+
+class LegacyResponses:
+    """
+    Temporarily make /api/ return pydantic models again, so FastAPI
+    validates and encodes them through response_model as it used to
+    """
+
+    def __init__(self, app_module):
+        self.app_module = app_module
+        self.saved = (app_module.format_answer, app_module.json_bytes_response)
+
+    def __enter__(self):
+        self.app_module.format_answer = lambda answer_data: AnswerResponse(
+            answer=answer_data['answer'],
+            links=[
+                LinkResponse(url=link['url'], text=link.get('text', link.get('title', 'Link')))
+                for link in answer_data['links']
+            ]
+        )
+        self.app_module.json_bytes_response = lambda response: response
+        return self
+
+    def __exit__(self, *exc_info):
+        self.app_module.format_answer, self.app_module.json_bytes_response = self.saved
+
+
+async def measure_requests(app_module, rounds: int, blocks: int = 7) -> List[List[Any]]:
+    """
+    Per (answer kind, cache state): the best of several blocks for each
+    variant, alternating them so machine noise hits both alike
+    """
+    rows = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        for cache_enabled in (False, True):
+            app_module.response_cache.max_size = 1024 if cache_enabled else 0
+            for kind, question in QUESTIONS.items():
+                best = {True: float('inf'), False: float('inf')}
+                for _ in range(blocks):
+                    for legacy in (True, False):
+                        app_module.response_cache.clear()
+                        if legacy:
+                            with LegacyResponses(app_module):
+                                timing = await cpu_per_request(client, '/api/', question, rounds)
+                        else:
+                            timing = await cpu_per_request(client, '/api/', question, rounds)
+                        best[legacy] = min(best[legacy], timing)
+                rows.append([kind, 'hit' if cache_enabled else 'miss', best[True], best[False]])
+    return rows
+
+
+def main(rounds: int = 20000, request_rounds: int = 200):
+    import app as app_module
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"\n{'answer':<11}  {'legacy us':>9}  {'encoded us':>10}  {'speedup':>7}")
+    for kind, question in QUESTIONS.items():
+        processed_question = app_module.question_processor.process_question(question)
+        answer_data = app_module.answer_generator.generate_answer(processed_question)
+        legacy = microseconds_per_call(lambda: legacy_response(answer_data), rounds)
+        current = microseconds_per_call(lambda: encode_answer(answer_data), rounds)
+        print(f"{kind:<11}  {legacy:>9.2f}  {current:>10.2f}  {legacy / current:>6.1f}x")
+
+    print(f"\nCPU per request through the ASGI app (us)")
+    print(f"{'answer':<11}  {'cache':>5}  {'legacy':>8}  {'current':>8}  {'saved':>7}")
+    for kind, cache, legacy, current in asyncio.run(measure_requests(app_module, request_rounds)):
+        print(f"{kind:<11}  {cache:>5}  {legacy:>8.1f}  {current:>8.1f}  {(legacy - current) / legacy:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
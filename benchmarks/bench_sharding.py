@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scatter-gather search over shard processes versus the
+in-process index, as the shard count grows.
+
+Loads a synthetic corpus into an AnswerGenerator, then times the same
+questions searched locally and through ShardedSearch with each shard
+count: single-query latency (p50/p95) and a batch of all questions sent
+as one message per shard. Speedup is bounded by the cores available, so
+run it on a machine with at least as many cores as the largest shard
+count (os.cpu_count() is printed).
+
+Run from the repository root:
+    python -m benchmarks.bench_sharding --topics 50000 --shards 1 2 4 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any
+
+from benchmarks.synthetic_corpus import write_corpus
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_QUESTIONS = [
+    'tds assignment',
+    'when is the tds assignment deadline',
+    'how to submit the graded assignment for tds',
+    'course project evaluation marks and grading',
+    'docker podman container setup error for the project'
+]
+
+
+def percentile(timings: List[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def time_queries(search, queries, rounds: int) -> List[float]:
+    """Best-of-rounds latency per query"""
+    timings = []
+    for query_weights, top_k in queries:
+        best = float('inf')
+        for _ in range(rounds):
+            started = time.perf_counter()
+            search(query_weights, top_k)
+            best = min(best, time.perf_counter() - started)
+        timings.append(best)
+    return timings
+
+
+def result_ids(results: List[Dict[str, Any]]) -> List[int]:
+    return [result['doc_id'] for result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=50000)
+    parser.add_argument('--sections', type=int, default=500)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--queries', type=int, default=100, help='Random topic titles added to the common questions')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'tds-bench-corpus'))
+    args = parser.parse_args()
+
+    corpus_dir = os.path.join(args.workdir, f"corpus-{args.topics}-{args.sections}")
+    if not os.path.exists(os.path.join(corpus_dir, 'data', 'discourse_posts.json')):
+        write_corpus(corpus_dir, topics=args.topics, sections=args.sections)
+    os.chdir(corpus_dir)
+    sys.path.insert(0, REPO_ROOT)
+    os.environ['KNOWLEDGE_SNAPSHOT_PATH'] = ''
+
+    from services.answer_generator import AnswerGenerator
+    from services.question_processor import QuestionProcessor
+    from services.sharded_search import ShardedSearch
+
+    started = time.perf_counter()
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    snapshot = generator.snapshot
+    print(f"# {len(snapshot.search_index)} documents, {len(snapshot.passage_index)} passages, "
+          f"loaded in {time.perf_counter() - started:.1f}s; {os.cpu_count()} CPUs")
+
+    processor = QuestionProcessor(generator.answer_rules, known_terms=generator.has_term)
+    rng = random.Random(0)
+    posts = generator.enhanced_discourse_posts
+    questions = COMMON_QUESTIONS + [posts[rng.randrange(len(posts))]['title'] for _ in range(args.queries)]
+    queries = [
+        (generator.build_query_weights(processor.process_question(question), snapshot), args.top_k)
+        for question in questions
+    ]
+
+    # Warm the local engine's term arrays so both sides are timed in steady state
+    local_results = [generator.rank_local(snapshot, query_weights, top_k) for query_weights, top_k in queries]
+    local = time_queries(lambda query_weights, top_k: generator.rank_local(snapshot, query_weights, top_k),
+                         queries, args.rounds)
+    started = time.perf_counter()
+    for query_weights, top_k in queries:
+        generator.rank_local(snapshot, query_weights, top_k)
+    local_batch = time.perf_counter() - started
+
+    print(f"{'shards':>6}  {'build s':>8}  {'p50 ms':>7}  {'p95 ms':>7}  {'batch ms':>9}  "
+          f"{'p50 speedup':>11}  {'batch speedup':>13}  {'same top-k':>10}")
+    print(f"{'local':>6}  {'-':>8}  {percentile(local, 0.5):>7.2f}  {percentile(local, 0.95):>7.2f}  "
+          f"{local_batch * 1000:>9.1f}  {'1.0x':>11}  {'1.0x':>13}  {'-':>10}")
+
+    for shard_count in args.shards:
+        sharded = ShardedSearch(generator, shard_count)
+        sharded.build(snapshot)
+        try:
+            sharded_results = sharded.search_batch(queries)
+            same = sum(result_ids(a) == result_ids(b) for a, b in zip(local_results, sharded_results))
+            timings = time_queries(sharded.search, queries, args.rounds)
+            started = time.perf_counter()
+            sharded.search_batch(queries)
+            batch = time.perf_counter() - started
+        finally:
+            sharded.shutdown()
+        print(f"{shard_count:>6}  {sharded.build_seconds:>8.1f}  {percentile(timings, 0.5):>7.2f}  "
+              f"{percentile(timings, 0.95):>7.2f}  {batch * 1000:>9.1f}  "
+              f"{percentile(local, 0.5) / percentile(timings, 0.5):>10.1f}x  {local_batch / batch:>12.1f}x  "
+              f"{same:>4}/{len(queries)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: typo correction with the symmetric-delete dictionary
+versus a full vocabulary edit-distance scan, as the vocabulary grows.
+
+The scan checks every word, so it grows linearly; a dictionary lookup
+only reads the entries of the typo's own deletions and must stay roughly
+flat (checked between the two largest sizes). Both must return the same
+corrections.
+
+Run from the repository root:
+    python -m benchmarks.bench_spelling
+"""
+import random
+import string
+import time
+from typing import List, Optional
+
+from services.fuzzy_vocabulary import FuzzyVocabulary, edit_distance
+
+
+# Largest lookup slowdown accepted for a 10x larger vocabulary (a scan slows down 10x);
+# what remains comes from cache misses in a larger dictionary, not from more work
+MAX_SLOWDOWN = 4.0
+
+TYPOS = ['dokcer', 'podmn', 'dashbord', 'grdae', 'exma', 'seaborm', 'beautifulsop', 'deadlin', 'githib', 'emial']
+REAL_WORDS = ['docker', 'podman', 'dashboard', 'grade', 'exam', 'seaborn', 'beautifulsoup', 'deadline', 'github', 'email']
+
+
+def scan_correct(vocabulary: FuzzyVocabulary, word: str) -> Optional[str]:
+    """Reference implementation: edit distance against every word"""
+    limit = vocabulary.max_distance(word)
+    best = None
+    for candidate in vocabulary.words:
+        if candidate[0] != word[0]:
+            continue
+        distance = edit_distance(word, candidate, limit)
+        if distance <= limit:
+            key = (distance, -vocabulary.frequencies.get(candidate, 0), candidate)
+            if best is None or key < best:
+                best = key
+    return best[2] if best else None
+
+
+def random_words(count: int, seed: int = 13) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+        for _ in range(count)
+    ]
+
+
+def time_per_word(func, words: List[str], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for word in words:
+            func(word)
+    return (time.perf_counter() - started) / (rounds * len(words)) * 1e6
+
+
+def main(sizes=(1000, 10000, 100000)):
+    print(f"{'vocabulary':>10}  {'build s':>8}  {'index us/word':>14}  {'scan us/word':>13}  {'speedup':>8}")
+    lookups = {}
+    for size in sizes:
+        words = REAL_WORDS + random_words(size - len(REAL_WORDS))
+        started = time.perf_counter()
+        vocabulary = FuzzyVocabulary(words)
+        build_seconds = time.perf_counter() - started
+
+        # Both implementations must agree before timing means anything
+        for typo in TYPOS:
+            assert vocabulary.correct(typo) == scan_correct(vocabulary, typo), typo
+
+        rounds = max(1, 20000 // size)
+        indexed = time_per_word(vocabulary.correct, TYPOS, rounds * 20)
+        lookups[size] = indexed
+        scanned = time_per_word(lambda word: scan_correct(vocabulary, word), TYPOS, rounds)
+        print(f"{size:>10}  {build_seconds:>8.2f}  {indexed:>14.1f}  {scanned:>13.1f}  {scanned / indexed:>7.1f}x")
+
+    largest, previous = sorted(lookups)[-1], sorted(lookups)[-2]
+    slowdown = lookups[largest] / lookups[previous]
+    print(f"# lookup at {largest} words is {slowdown:.1f}x the time at {previous}")
+    assert slowdown < MAX_SLOWDOWN, "lookup cost grows with the vocabulary"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: top-k retrieval with MaxScore pruning versus scoring every
+matching document and sorting, for queries made of very common terms.
+
+Common terms ("tds", "assignment") match a large share of the corpus, so
+exhaustive scoring grows with the corpus; the pruned engine only scores
+postings that can still reach the top k. Both must return the same
+documents with the same scores.
+
+Run from the repository root:
+    python -m benchmarks.bench_topk
+    python -m benchmarks.bench_topk --sizes 10000 100000 --k 3 10
+"""
+import argparse
+import statistics
+import time
+from typing import List, Dict, Tuple
+
+from benchmarks.synthetic_corpus import SyntheticCorpus
+from services.passage_index import PassageIndex
+from services.search_index import BM25Index, tokenize
+
+
+QUERIES = [
+    'tds',
+    'assignment',
+    'tds assignment',
+    'tds assignment deadline',
+    'how to submit the graded assignment for tds',
+    'course project evaluation marks'
+]
+
+
+def build_indexes(topics: int) -> Tuple[BM25Index, PassageIndex]:
+    """Main and passage indexes over synthetic topics, indexed like AnswerGenerator does"""
+    corpus = SyntheticCorpus(seed=0)
+    index = BM25Index()
+    passage_index = PassageIndex()
+    for topic in corpus.discourse_topics(topics):
+        text = ' '.join([topic.get('title', ''), topic.get('answer_summary', ''), ' '.join(topic.get('keywords', []))])
+        doc_id = index.add_document('discourse', topic, text)
+        passage_index.add_topic(doc_id, topic)
+    return index, passage_index
+
+
+def exhaustive_top_k(index: BM25Index, query_weights: Dict[str, float], k: int) -> List[Tuple[int, float]]:
+    """Reference: score every match, sort them all, keep k"""
+    scores = index.score_terms(query_weights)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def median_ms(func, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='Topics per corpus')
+    parser.add_argument('--k', type=int, nargs='+', default=[3, 10], help='Results per query')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'topics':>7}  {'index':>8}  {'k':>3}  {'query':<44} {'matches':>8}  "
+          f"{'full ms':>8}  {'top-k ms':>8}  {'speedup':>7}")
+    mismatches = 0
+    for size in args.sizes:
+        started = time.perf_counter()
+        indexes = build_indexes(size)
+        print(f"# built {size} topics ({len(indexes[1])} passages) in {time.perf_counter() - started:.1f}s")
+
+        for name, index in zip(('topics', 'passages'), indexes):
+            for k in args.k:
+                for query in QUERIES:
+                    query_weights = {term: 1.0 for term in tokenize(query)}
+                    # First call converts postings to arrays; time the steady state
+                    pruned = index.top_k(query_weights, k)
+                    if pruned != exhaustive_top_k(index, query_weights, k):
+                        mismatches += 1
+                        print(f"MISMATCH {name} k={k} {query!r}")
+
+                    matches = len(index.score_terms(query_weights))
+                    full_ms = median_ms(lambda: exhaustive_top_k(index, query_weights, k), args.rounds)
+                    top_k_ms = median_ms(lambda: index.top_k(query_weights, k), args.rounds)
+                    print(f"{size:>7}  {name:>8}  {k:>3}  {query[:44]:<44} {matches:>8}  "
+                          f"{full_ms:>8.2f}  {top_k_ms:>8.2f}  {full_ms / top_k_ms:>6.1f}x")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} queries returned different results")
+
+
+if __name__ == '__main__':
+    main()
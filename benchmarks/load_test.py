@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Async load generator for the answer API.
+
+Drives either a running server (--url) or the ASGI app in-process with a
+fixed number of concurrent clients, using a question mix taken from the
+promptfoo config and the titles in data/*.json. Reports throughput and
+latency percentiles and saves them as JSON; --baseline compares against
+an earlier run and exits non-zero on a regression.
+
+Run from the repository root:
+    python -m benchmarks.load_test --requests 2000 --concurrency 32
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --output run.json
+    python -m benchmarks.load_test --baseline run.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+import httpx
+import yaml
+
+
+PROMPTFOO_CONFIG = 'project-tds-virtual-ta-promptfoo.yaml'
+
+
+def load_question_mix(promptfoo_path: str = PROMPTFOO_CONFIG, data_glob: str = os.path.join('data', '*.json')) -> List[Dict[str, Any]]:
+    """
+    Request payloads from the promptfoo tests (with their images) plus one
+    question per title found in the data files
+    """
+    payloads = []
+
+    if os.path.exists(promptfoo_path):
+        with open(promptfoo_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        for test in config.get('tests', []):
+            variables = test.get('vars', {})
+            if not variables.get('question'):
+                continue
+            payload = {'question': variables['question']}
+            image = variables.get('image')
+            if isinstance(image, str) and image.startswith('file://'):
+                with open(image[len('file://'):], 'rb') as f:
+                    payload['image'] = base64.b64encode(f.read()).decode('ascii')
+            payloads.append(payload)
+
+    for path in sorted(glob.glob(data_glob)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get('title'):
+                payloads.append({'question': entry['title']})
+
+    return payloads
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LoadTest:
+    """
+    Sends total_requests requests from concurrency workers and collects
+    per-request latency and status
+    """
+
+    def __init__(self, client: httpx.AsyncClient, payloads: List[Dict[str, Any]], endpoint: str = '/api/',
+                 concurrency: int = 16, total_requests: int = 1000, timeout: float = 30.0, seed: int = 0):
+        self.client = client
+        self.payloads = payloads
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+        self.issued = 0
+        self.latencies: List[float] = []
+        self.status_counts: Dict[str, int] = {}
+
+    def next_payload(self) -> Optional[Dict[str, Any]]:
+        if self.issued >= self.total_requests:
+            return None
+        self.issued += 1
+        return self.rng.choice(self.payloads)
+
+    async def worker(self) -> None:
+        while True:
+            payload = self.next_payload()
+            if payload is None:
+                return
+
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(self.endpoint, json=payload, timeout=self.timeout)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            self.latencies.append(time.perf_counter() - started)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+        return self.summarize(elapsed)
+
+    def summarize(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        completed = len(latencies)
+        errors = sum(count for status, count in self.status_counts.items() if not status.startswith('2'))
+
+        return {
+            'requests': completed,
+            'duration_seconds': round(elapsed, 3),
+            'rps': round(completed / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(errors / completed, 4) if completed else 0.0,
+            'status_counts': dict(sorted(self.status_counts.items())),
+            'latency_ms': {
+                'mean': round(sum(latencies) / completed * 1000, 3) if completed else 0.0,
+                'p50': round(percentile(latencies, 0.50) * 1000, 3),
+                'p95': round(percentile(latencies, 0.95) * 1000, 3),
+                'p99': round(percentile(latencies, 0.99) * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3) if latencies else 0.0
+            }
+        }
+
+
+def build_client(url: Optional[str]) -> httpx.AsyncClient:
+    """
+    HTTP client for a running server, or an in-process client over the ASGI app
+    """
+    if url:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(base_url=url.rstrip('/'), limits=limits)
+
+    from app import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest')
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Regressions of result against baseline beyond the allowed fraction
+    """
+    problems = []
+    if result['rps'] < baseline['rps'] * (1 - max_regression):
+        problems.append(f"rps {result['rps']} < baseline {baseline['rps']}")
+    for key in ('p50', 'p95', 'p99'):
+        current, previous = result['latency_ms'][key], baseline['latency_ms'][key]
+        if current > previous * (1 + max_regression):
+            problems.append(f"{key} {current}ms > baseline {previous}ms")
+    if result['error_rate'] > baseline['error_rate'] + 0.01:
+        problems.append(f"error rate {result['error_rate']} > baseline {baseline['error_rate']}")
+    return problems
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    payloads = load_question_mix()
+    if not args.images:
+        payloads = [{'question': payload['question']} for payload in payloads]
+    if not payloads:
+        raise SystemExit("No questions found for the load mix")
+
+    async with build_client(args.url) as client:
+        # Warm up connections, caches and lazily built state before measuring
+        warmup = LoadTest(client, payloads, args.endpoint, args.concurrency, args.warmup, args.timeout, args.seed + 1)
+        await warmup.run()
+
+        load_test = LoadTest(client, payloads, args.endpoint, args.concurrency, args.requests, args.timeout, args.seed)
+        result = await load_test.run()
+
+    result['config'] = {
+        'target': args.url or 'in-process',
+        'endpoint': args.endpoint,
+        'concurrency': args.concurrency,
+        'questions_in_mix': len(payloads),
+        'images': args.images,
+        'seed': args.seed
+    }
+    result['timestamp'] = datetime.now(timezone.utc).isoformat()
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the TDS Virtual TA answer API")
+    parser.add_argument('--url', help="Base URL of a running server (default: the app in-process)")
+    parser.add_argument('--endpoint', default='/api/')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--images', action='store_true', help="Send the promptfoo test images with their questions")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed fractional drop in RPS or rise in latency vs the baseline")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    latency = result['latency_ms']
+    print(f"{result['requests']} requests in {result['duration_seconds']}s at concurrency {args.concurrency}")
+    print(f"  {result['rps']} req/s, error rate {result['error_rate']:.2%}, statuses {result['status_counts']}")
+    print(f"  latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems = compare(result, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        return 1 if problems else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Minimal OpenAI-compatible chat completions server for exercising LLM
+synthesis offline, with a configurable response delay.
+
+Replies echo the first context source so answers are recognisable. GET
+/stats reports how many completions were requested (to check prompt
+coalescing).
+
+Usage:
+    python -m benchmarks.mock_openai_server --port 8901 --latency 0.5
+    LLM_SYNTHESIS=true OPENAI_BASE_URL=http://127.0.0.1:8901/v1 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    latency: float = 0.0
+    fail: bool = False
+    completions = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with self.lock:
+            type(self).completions += 1
+
+        time.sleep(self.latency)
+        if self.fail:
+            self.send_json(500, {'error': {'message': 'mock failure', 'type': 'server_error'}})
+            return
+
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        first_source = prompt.split('\n')[1] if '\n' in prompt else prompt
+        self.send_json(200, {
+            'id': f"chatcmpl-mock-{self.completions}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': f"(mock) {first_source[:200]}"},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': 10, 'total_tokens': len(prompt.split()) + 10}
+        })
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.send_json(200, {'completions': self.completions})
+        else:
+            self.send_error(404)
+
+    def send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port: int = 8901, latency: float = 0.0, fail: bool = False,
+                host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Build (but don't start) a mock server; port 0 picks a free port"""
+    handler = type('BoundMockOpenAIHandler', (MockOpenAIHandler,), {
+        'latency': latency, 'fail': fail, 'completions': 0, 'lock': threading.Lock()
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server")
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to wait before each reply")
+    parser.add_argument('--fail', action='store_true', help="Answer every completion with HTTP 500")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency, args.fail)
+    print(f"Mock OpenAI server on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
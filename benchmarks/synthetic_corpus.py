@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic knowledge base with the same schema as the bundled
+data files, at any size.
+
+Words are drawn from the real corpus vocabulary plus a long tail of
+made-up terms with a Zipf-like distribution, so posting list lengths and
+vocabulary growth look like a real forum rather than uniform noise.
+
+Run from the repository root:
+    python -m benchmarks.synthetic_corpus --topics 100000 --sections 1000 --output /tmp/tds-corpus
+then point the app at it by running from that directory (it gets its own
+data/ folder, with the predefined answers copied across).
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterator
+
+from services.search_index import tokenize
+
+
+DISCOURSE_BASE_URL = "https://discourse.onlinedegree.iitm.ac.in"
+COURSE_URL = "https://tds.s-anand.net/#/2025-01"
+CATEGORIES = ['assignments', 'projects', 'technical_issues', 'course_resources', 'roe_exam']
+SECTIONS = ['Development Tools', 'Deployment Tools', 'Large Language Models', 'Data Sourcing',
+            'Data Preparation', 'Data Analysis', 'Data Visualization']
+TITLE_TEMPLATES = [
+    "{} {} issue", "Help with {} and {}", "{} not working in {}", "Doubt about {} {}",
+    "{} {} clarification", "How to use {} with {}", "Error while running {} {}"
+]
+
+
+def real_vocabulary(paths: List[str] = (os.path.join('data', 'discourse_posts.json'),
+                                        os.path.join('data', 'course_content.json'))) -> List[str]:
+    """Distinct tokens of the bundled data, most frequent first"""
+    counts: Dict[str, int] = {}
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            continue
+        for token in tokenize(text):
+            if len(token) > 2:
+                counts[token] = counts.get(token, 0) + 1
+    return sorted(counts, key=lambda token: (-counts[token], token))
+
+
+class SyntheticCorpus:
+    """
+    Deterministic generator of Discourse topics and course sections
+    """
+
+    def __init__(self, seed: int = 0, tail_words: int = 50000, zipf_exponent: float = 1.1):
+        self.rng = random.Random(seed)
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        tail = {
+            ''.join(self.rng.choice(letters) for _ in range(self.rng.randint(4, 10)))
+            for _ in range(tail_words)
+        }
+        self.vocabulary = real_vocabulary() + sorted(tail)
+        self.cumulative_weights = list(itertools.accumulate(
+            1.0 / (rank + 1) ** zipf_exponent for rank in range(len(self.vocabulary))
+        ))
+        self.usernames = [f"student{index}" for index in range(2000)] + ['s.anand', 'carlton', 'Jivraj']
+        self.post_ids = itertools.count(1000000)
+        self.epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def words(self, count: int) -> List[str]:
+        total = self.cumulative_weights[-1]
+        return [
+            self.vocabulary[bisect.bisect_left(self.cumulative_weights, self.rng.random() * total)]
+            for _ in range(count)
+        ]
+
+    def sentence(self, min_words: int, max_words: int) -> str:
+        text = ' '.join(self.words(self.rng.randint(min_words, max_words)))
+        return text[:1].upper() + text[1:] + '.'
+
+    def discourse_topic(self, topic_id: int) -> Dict[str, Any]:
+        title = self.rng.choice(TITLE_TEMPLATES).format(*self.words(2))
+        created = self.epoch + timedelta(minutes=self.rng.randint(0, 500000))
+        slug = '-'.join(tokenize(title))
+
+        posts = []
+        for _ in range(self.rng.randint(1, 6)):
+            created += timedelta(minutes=self.rng.randint(1, 3000))
+            posts.append({
+                'id': next(self.post_ids),
+                'username': self.rng.choice(self.usernames),
+                'content': ' '.join(self.sentence(6, 20) for _ in range(self.rng.randint(1, 4))),
+                'created_at': created.isoformat().replace('+00:00', 'Z')
+            })
+
+        return {
+            'id': topic_id,
+            'title': title,
+            'url': f"{DISCOURSE_BASE_URL}/t/{slug}/{topic_id}",
+            'category': self.rng.choice(CATEGORIES),
+            'posts': posts,
+            'keywords': sorted(set(self.words(self.rng.randint(3, 6)))),
+            'answer_summary': self.sentence(10, 30)
+        }
+
+    def course_section(self, index: int) -> Dict[str, Any]:
+        section = SECTIONS[index % len(SECTIONS)]
+        return {
+            'url': COURSE_URL,
+            'title': f"TDS Course Overview - {section} {index // len(SECTIONS) + 1}",
+            'section': section,
+            'content': ' '.join(self.sentence(10, 30) for _ in range(self.rng.randint(2, 5))),
+            'keywords': sorted(set(self.words(self.rng.randint(5, 10))))
+        }
+
+    def discourse_topics(self, count: int, first_id: int = 200000) -> Iterator[Dict[str, Any]]:
+        for topic_id in range(first_id, first_id + count):
+            yield self.discourse_topic(topic_id)
+
+    def course_sections(self, count: int) -> Iterator[Dict[str, Any]]:
+        for index in range(count):
+            yield self.course_section(index)
+
+
+def write_json_array(path: str, items: Iterator[Dict[str, Any]]) -> int:
+    """Stream items into a JSON array file without holding them all in memory"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for item in items:
+            f.write(',\n' if count else '\n')
+            json.dump(item, f, ensure_ascii=False)
+            count += 1
+        f.write('\n]\n')
+    return count
+
+
+def write_corpus(output_dir: str, topics: int, sections: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Write data/discourse_posts.json, data/course_content.json and a copy of
+    the predefined answers under output_dir
+    """
+    corpus = SyntheticCorpus(seed=seed)
+    data_dir = os.path.join(output_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    written = {
+        'discourse_topics': write_json_array(os.path.join(data_dir, 'discourse_posts.json'), corpus.discourse_topics(topics)),
+        'course_sections': write_json_array(os.path.join(data_dir, 'course_content.json'), corpus.course_sections(sections))
+    }
+
+    rules_path = os.path.join('data', 'predefined_answers.json')
+    if os.path.exists(rules_path):
+        shutil.copy(rules_path, data_dir)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic TDS knowledge base")
+    parser.add_argument('--topics', type=int, default=10000, help="Number of Discourse topics")
+    parser.add_argument('--sections', type=int, default=100, help="Number of course content sections")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help="Directory to create data/ in")
+    args = parser.parse_args()
+
+    written = write_corpus(args.output, args.topics, args.sections, args.seed)
+    print(f"Wrote {written['discourse_topics']} topics and {written['course_sections']} sections to {args.output}/data")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compile the JSON knowledge base (data/ and scraped_data/) into a binary
+snapshot that AnswerGenerator memory-maps at startup.
+
+Live ingests logged in INGEST_LOG_PATH are folded into the discourse
+topics, so serving the snapshot needs no replay (which would force a
+rebuild from JSON). A later ingest makes the snapshot stale again.
+
+Usage:
+    python compile_knowledge.py [--output data/knowledge_base.bin]
+"""
+import argparse
+import os
+import time
+from typing import Any, Dict
+
+from services.answer_generator import AnswerGenerator
+from services.knowledge_base import source_signature
+from services.knowledge_ingest import IngestLog, KnowledgeIngestor
+from services.knowledge_store import CompiledKnowledge, SnapshotFormatError, write_snapshot_file, DEFAULT_SNAPSHOT_PATH
+
+
+def compile_snapshot(output: str) -> Dict[str, Any]:
+    """Load the JSON sources and ingest log, index them and write the snapshot to output"""
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    snapshot = generator.snapshot
+
+    # Signature first: an ingest logged while compiling must make the result stale
+    ingestor = KnowledgeIngestor(generator)
+    ingest_signature = ingestor.log.signature()
+    discourse_posts = ingestor.fold_into(snapshot.discourse_posts)
+    search_index = generator.build_search_index(snapshot.course_content, discourse_posts)
+
+    return write_snapshot_file(
+        output,
+        snapshot.course_content,
+        discourse_posts,
+        snapshot.comprehensive_knowledge,
+        search_index,
+        snapshot.signature,
+        passage_index=generator.build_passage_index(search_index),
+        ingest_signature=ingest_signature
+    )
+
+
+def snapshot_is_current(path: str) -> bool:
+    """Whether path holds a compiled snapshot of the current source files and ingest log"""
+    try:
+        compiled = CompiledKnowledge(path)
+    except SnapshotFormatError:
+        return False
+    return compiled.signature == source_signature() and compiled.ingest_signature == IngestLog.from_env().signature()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the TDS knowledge base into a binary snapshot")
+    parser.add_argument(
+        "--output",
+        default=os.getenv("KNOWLEDGE_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH),
+        help="Where to write the snapshot"
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    header = compile_snapshot(args.output)
+
+    print(f"Compiled {header['document_count']} documents, {header['passages']['count']} passages and {header['term_count']} terms "
+          f"into {args.output} ({os.path.getsize(args.output)} bytes) "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+MAX_TOP_K = 20
 
 
 class QuestionRequest(BaseModel):
     question: str
     image: Optional[str] = None  # base64 encoded image
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)  # search results (and links) to use, default SEARCH_TOP_K
+
+
+class BatchQuestionRequest(BaseModel):
+    questions: list[QuestionRequest]
 
 
 class LinkResponse(BaseModel):
@@ -15,3 +23,21 @@ class LinkResponse(BaseModel):
 class AnswerResponse(BaseModel):
     answer: str
     links: list[LinkResponse]
+
+
+class IngestPost(BaseModel):
+    id: int
+    username: str = ''
+    content: str
+    created_at: Optional[str] = None  # ISO 8601, defaults to the ingest time
+    accepted: bool = False  # Use this post as the topic's answer summary
+
+
+class IngestTopic(BaseModel):
+    id: int
+    title: Optional[str] = None
+    url: Optional[str] = None
+    category: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    answer_summary: Optional[str] = None
+    posts: List[IngestPost] = []
@@ -10,3 +10,7 @@ class LinkResponse(BaseModel):
 class AnswerResponse(BaseModel):
     answer: str
     links: List[LinkResponse]
+
+
+class BatchAnswerResponse(BaseModel):
+    answers: List[AnswerResponse]
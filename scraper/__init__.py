@@ -0,0 +1 @@
+"""Incremental Discourse and course site scrapers"""
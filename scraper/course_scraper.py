@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Course content scraper producing scraped_data/enhanced_course_content.json.
+
+The course site is a docsify site: _sidebar.md lists the pages and each
+page is served as Markdown. Pages are fetched concurrently with
+conditional requests; unchanged pages (304) reuse the record stored under
+scraped_data/course_pages/ from the previous run.
+
+Usage:
+    python -m scraper.course_scraper [--base-url URL]
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from scraper.crawler import CrawlState, Fetcher, JSONArrayWriter, bounded_map, read_json, write_json
+
+
+OUTPUT_FILENAME = 'enhanced_course_content.json'
+SIDEBAR_LINK_PATTERN = re.compile(r'^(\s*)[-*]\s*\[([^\]]+)\]\(([^)\s]+)\)')
+MARKDOWN_NOISE_PATTERNS = [
+    (re.compile(r'```.*?```', re.DOTALL), ' '),          # code blocks
+    (re.compile(r'!\[[^\]]*\]\([^)]*\)'), ' '),           # images
+    (re.compile(r'\[([^\]]+)\]\([^)]*\)'), r'\1'),         # links -> text
+    (re.compile(r'<[^>]+>'), ' '),                         # inline HTML
+    (re.compile(r'[#*_`>|]+'), ' '),                       # markup characters
+]
+
+
+def parse_sidebar(markdown: str) -> List[Tuple[str, str, str]]:
+    """
+    (page path, title, section) for each linked page; the section is the
+    nearest top-level sidebar entry above it
+    """
+    pages = []
+    seen = set()
+    section = ''
+    for line in markdown.splitlines():
+        match = SIDEBAR_LINK_PATTERN.match(line)
+        if not match:
+            continue
+        indent, title, path = match.groups()
+        if path.startswith('http://') or path.startswith('https://') or path.startswith('#'):
+            continue
+        if not indent:
+            section = title
+        path = path.lstrip('./')
+        if path not in seen:
+            seen.add(path)
+            pages.append((path, title, section))
+    return pages
+
+
+def markdown_to_text(markdown: str) -> str:
+    text = markdown
+    for pattern, replacement in MARKDOWN_NOISE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def markdown_headings(markdown: str) -> List[str]:
+    """Second- and third-level headings, used as page keywords"""
+    headings = re.findall(r'^#{2,3}\s+(.+?)\s*#*\s*$', markdown, flags=re.MULTILINE)
+    return list(dict.fromkeys(markdown_to_text(heading).lower() for heading in headings if heading.strip()))
+
+
+class CourseScraper:
+    """
+    Fetches every page listed in the docsify sidebar
+    """
+
+    def __init__(self, base_url: str, output_dir: str = 'scraped_data', sidebar: str = '_sidebar.md',
+                 max_workers: int = 8):
+        self.base_url = base_url.rstrip('/')
+        self.output_dir = output_dir
+        self.pages_dir = os.path.join(output_dir, 'course_pages')
+        self.sidebar = sidebar
+        self.max_workers = max_workers
+
+        self.state = CrawlState(os.path.join(output_dir, '.course_state.json'))
+        self.fetcher = Fetcher(self.base_url, self.state, max_workers=max_workers)
+        self.pages_updated = 0
+        self.lock = threading.Lock()
+
+    def page_record_path(self, path: str) -> str:
+        return os.path.join(self.pages_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', path) + '.json')
+
+    def fetch_page(self, page: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one page and store its record; an unchanged page (304) keeps
+        the stored record
+        """
+        path, title, section = page
+        record_path = self.page_record_path(path)
+        stored = read_json(record_path)
+
+        if stored is None:
+            self.fetcher.forget(path)
+        result = self.fetcher.get(path)
+        if result.not_modified:
+            return stored
+
+        markdown = result.text()
+        route = re.sub(r'(README)?\.md$', '', path)
+        record = {
+            'url': f"{self.base_url}/#/{route}",
+            'title': title,
+            'section': section,
+            'content': markdown_to_text(markdown),
+            'keywords': markdown_headings(markdown)
+        }
+        write_json(record_path, record)
+        with self.lock:
+            self.pages_updated += 1
+        return record
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+
+        # The sidebar is small and decides the page list, so always fetch it
+        pages = parse_sidebar(self.fetcher.get(self.sidebar, conditional=False).text())
+
+        def fetch(page: Tuple[str, str, str]) -> None:
+            try:
+                self.fetch_page(page)
+            except Exception as e:
+                print(f"Error fetching course page {page[0]}: {e}")
+
+        try:
+            for _ in bounded_map(fetch, pages, self.max_workers):
+                pass
+        finally:
+            self.state.save()
+            self.fetcher.close()
+
+        # Stream the stored records out in sidebar order; failed pages keep their previous record
+        with JSONArrayWriter(os.path.join(self.output_dir, OUTPUT_FILENAME)) as writer:
+            for path, _, _ in pages:
+                record = read_json(self.page_record_path(path))
+                if record is not None:
+                    writer.write(record)
+
+        return {
+            'pages': len(pages),
+            'pages_updated': self.pages_updated,
+            'pages_written': writer.count,
+            'requests': self.fetcher.requests_made,
+            'not_modified': self.fetcher.not_modified,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Scrape TDS course pages into scraped_data/")
+    parser.add_argument('--base-url', default=os.getenv('TDS_COURSE_URL', 'https://tds.s-anand.net'))
+    parser.add_argument('--output-dir', default='scraped_data')
+    parser.add_argument('--sidebar', default='_sidebar.md')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SCRAPER_WORKERS', 8)))
+    args = parser.parse_args()
+
+    scraper = CourseScraper(args.base_url, output_dir=args.output_dir, sidebar=args.sidebar, max_workers=args.workers)
+    summary = scraper.run()
+    print(f"Course: {summary['pages_updated']} of {summary['pages']} pages updated, "
+          f"{summary['pages_written']} written, {summary['requests']} requests "
+          f"({summary['not_modified']} not modified) in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class FetchResult:
+    """
+    Outcome of a conditional GET: not_modified is True for a 304, in which
+    case body is None and the caller should reuse what it stored before
+    """
+
+    __slots__ = ('url', 'status_code', 'body', 'not_modified')
+
+    def __init__(self, url: str, status_code: int, body: Optional[bytes]):
+        self.url = url
+        self.status_code = status_code
+        self.body = body
+        self.not_modified = status_code == 304
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+
+class CrawlState:
+    """
+    Persistent crawl bookkeeping: HTTP validators per URL plus arbitrary
+    scraper-specific values (e.g. the last post id seen per topic).
+
+    Saved atomically so an interrupted crawl never leaves a corrupt file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data: Dict[str, Any] = {'validators': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+                self.data.setdefault('validators', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable crawl state {path}: {e}")
+
+    def validators(self, url: str) -> Dict[str, str]:
+        with self.lock:
+            return dict(self.data['validators'].get(url, {}))
+
+    def set_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        entry = {}
+        if etag:
+            entry['etag'] = etag
+        if last_modified:
+            entry['last_modified'] = last_modified
+        with self.lock:
+            if entry:
+                self.data['validators'][url] = entry
+            else:
+                self.data['validators'].pop(url, None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.lock:
+            return self.data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.data[key] = value
+
+    def save(self) -> None:
+        with self.lock:
+            payload = json.dumps(self.data, indent=1)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+
+class Fetcher:
+    """
+    Pooled HTTP session for crawling one site.
+
+    Connections are reused across worker threads (the pool is sized to the
+    concurrency), transient errors and 429/5xx are retried with backoff,
+    and GETs send If-None-Match / If-Modified-Since from the crawl state.
+    """
+
+    def __init__(self, base_url: str, state: CrawlState, max_workers: int = 8, timeout: float = 20.0,
+                 headers: Optional[Dict[str, str]] = None, retries: int = 3):
+        self.base_url = base_url.rstrip('/')
+        self.state = state
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'User-Agent': 'tds-virtual-ta-scraper/1.0'})
+        if headers:
+            self.session.headers.update(headers)
+
+        self.requests_made = 0
+        self.not_modified = 0
+        self.counter_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def state_key(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        # Validators are keyed by the full request so paged URLs don't collide
+        return requests.Request('GET', self.url(path), params=params).prepare().url
+
+    def forget(self, path: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Drop stored validators, e.g. when the content they describe was lost
+        """
+        self.state.set_validators(self.state_key(path, params), None, None)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, conditional: bool = True) -> FetchResult:
+        """
+        GET a path relative to base_url, raising for non-2xx/304 responses.
+
+        conditional requests send and remember the ETag/Last-Modified
+        validators; a 304 means the caller's stored copy is still current.
+        """
+        url = self.url(path)
+        state_key = self.state_key(path, params)
+
+        headers = {}
+        if conditional:
+            validators = self.state.validators(state_key)
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        with self.counter_lock:
+            self.requests_made += 1
+            if response.status_code == 304:
+                self.not_modified += 1
+
+        if response.status_code == 304:
+            return FetchResult(url, 304, None)
+        response.raise_for_status()
+
+        if conditional:
+            self.state.set_validators(state_key, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return FetchResult(url, response.status_code, response.content)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def bounded_map(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> Iterator[Any]:
+    """
+    Apply func to items on a thread pool, yielding results as they finish.
+
+    At most 2 * max_workers items are in flight, so a long (or lazily
+    generated) item list is never materialized as futures all at once.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape') as executor:
+        pending = set()
+        for item in items:
+            pending.add(executor.submit(func, item))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+class JSONArrayWriter:
+    """
+    Write a JSON array one element at a time, replacing the target file
+    atomically on close
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.file.write('[')
+
+    def write(self, item: Dict[str, Any]) -> None:
+        self.file.write(',\n' if self.count else '\n')
+        json.dump(item, self.file, ensure_ascii=False)
+        self.count += 1
+
+    def close(self) -> None:
+        self.file.write('\n]\n')
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self) -> 'JSONArrayWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: str, value: Any) -> None:
+    """Write one JSON document atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Incremental Discourse scraper producing scraped_data/enhanced_discourse_posts.json.
+
+Each topic is stored as its own file under scraped_data/discourse_topics/
+as soon as it is fetched; the combined JSON array is then streamed from
+those files, so the crawl never holds the whole forum in memory. Reruns
+only fetch topics whose post count changed, and only the posts newer than
+the last post id already stored.
+
+Usage:
+    python -m scraper.discourse_scraper [--base-url URL] [--category SLUG] [--since 2025-01-01]
+"""
+import argparse
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Optional
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from scraper.crawler import CrawlState, Fetcher, JSONArrayWriter, bounded_map, read_json, write_json
+
+
+OUTPUT_FILENAME = 'enhanced_discourse_posts.json'
+POSTS_PER_REQUEST = 50
+ANSWER_SUMMARY_LENGTH = 300
+
+
+def html_to_text(html: str) -> str:
+    """Plain text of a cooked Discourse post"""
+    text = BeautifulSoup(html or '', 'html.parser').get_text(' ', strip=True)
+    return re.sub(r'\s+', ' ', text)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class DiscourseScraper:
+    """
+    Crawls /latest.json (or one category) newest-first, refetching only
+    topics that gained posts since the previous run
+    """
+
+    def __init__(self,
+                 base_url: str,
+                 output_dir: str = 'scraped_data',
+                 category: Optional[str] = None,
+                 since: Optional[datetime] = None,
+                 max_pages: Optional[int] = None,
+                 max_workers: int = 8,
+                 api_key: Optional[str] = None,
+                 api_username: Optional[str] = None):
+        self.base_url = base_url.rstrip('/')
+        self.output_dir = output_dir
+        self.topics_dir = os.path.join(output_dir, 'discourse_topics')
+        self.category = category
+        self.since = since
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+
+        headers = {}
+        if api_key and api_username:
+            headers = {'Api-Key': api_key, 'Api-Username': api_username}
+
+        self.state = CrawlState(os.path.join(output_dir, '.discourse_state.json'))
+        self.fetcher = Fetcher(self.base_url, self.state, max_workers=max_workers, headers=headers)
+        self.category_names: Dict[str, str] = {}
+
+        self.topics_seen = 0
+        self.topics_updated = 0
+
+    def topic_path(self, topic_id: int) -> str:
+        return os.path.join(self.topics_dir, f"{topic_id}.json")
+
+    def load_categories(self) -> None:
+        """Map category ids to slugs, reusing the stored map when unchanged"""
+        result = self.fetcher.get('/categories.json')
+        if not result.not_modified:
+            categories = result.json().get('category_list', {}).get('categories', [])
+            self.state.set('categories', {str(category['id']): category['slug'] for category in categories})
+        self.category_names = self.state.get('categories', {})
+
+    def listing_path(self) -> str:
+        if self.category:
+            return f"/c/{self.category}.json"
+        return '/latest.json'
+
+    def iter_changed_topics(self) -> Iterator[Dict[str, Any]]:
+        """
+        Topic summaries that are new or have more posts than stored.
+
+        Listings are ordered by last activity, so paging stops at the first
+        page where nothing changed or everything is older than --since.
+        """
+        known = self.state.get('topics', {})
+        page = 0
+        while self.max_pages is None or page < self.max_pages:
+            # Listings always change as topics are bumped; fetch them unconditionally
+            listing = self.fetcher.get(self.listing_path(), params={'page': page}, conditional=False).json()
+            topics = listing.get('topic_list', {}).get('topics', [])
+            if not topics:
+                return
+
+            changed_on_page = 0
+            recent_on_page = 0
+            for topic in topics:
+                last_posted_at = parse_timestamp(topic.get('last_posted_at') or topic.get('bumped_at'))
+                if self.since and last_posted_at and last_posted_at < self.since:
+                    continue
+                recent_on_page += 1
+                self.topics_seen += 1
+
+                stored = known.get(str(topic['id']))
+                if stored and stored.get('highest_post_number') == topic.get('highest_post_number'):
+                    continue
+                changed_on_page += 1
+                yield topic
+
+            if not changed_on_page or not recent_on_page or not listing.get('topic_list', {}).get('more_topics_url'):
+                return
+            page += 1
+
+    def fetch_posts(self, topic_id: int, post_ids: List[int]) -> List[Dict[str, Any]]:
+        posts = []
+        for start in range(0, len(post_ids), POSTS_PER_REQUEST):
+            chunk = post_ids[start:start + POSTS_PER_REQUEST]
+            result = self.fetcher.get(f"/t/{topic_id}/posts.json", params={'post_ids[]': chunk}, conditional=False)
+            posts.extend(result.json().get('post_stream', {}).get('posts', []))
+        return posts
+
+    def fetch_topic(self, summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a changed topic, requesting only posts after the last stored
+        post id, and write its record to the topic cache
+
+        Returns the topic's new crawl state, or None if fetching failed.
+        """
+        topic_id = summary['id']
+        stored = read_json(self.topic_path(topic_id))
+        stored_posts = stored['posts'] if stored else []
+        last_post_id = max((post['id'] for post in stored_posts), default=0)
+
+        if stored is None:
+            self.fetcher.forget(f"/t/{topic_id}.json")
+        result = self.fetcher.get(f"/t/{topic_id}.json")
+        if result.not_modified:
+            return {
+                'id': topic_id,
+                'highest_post_number': summary.get('highest_post_number'),
+                'last_post_id': last_post_id,
+                'updated': False
+            }
+
+        topic = result.json()
+        post_stream = topic.get('post_stream', {})
+        included = {post['id']: post for post in post_stream.get('posts', [])}
+        stream = post_stream.get('stream') or list(included)
+
+        missing = [post_id for post_id in stream if post_id > last_post_id and post_id not in included]
+        for post in self.fetch_posts(topic_id, missing):
+            included[post['id']] = post
+
+        posts_by_id = {post['id']: post for post in stored_posts}
+        accepted_post_id = None
+        for post_id in stream:
+            post = included.get(post_id)
+            if post is None:
+                continue
+            posts_by_id[post_id] = {
+                'id': post_id,
+                'username': post.get('username', ''),
+                'content': html_to_text(post.get('cooked', '')),
+                'created_at': post.get('created_at')
+            }
+            if post.get('accepted_answer'):
+                accepted_post_id = post_id
+
+        posts = [posts_by_id[post_id] for post_id in stream if post_id in posts_by_id]
+        record = self.build_record(topic, posts, accepted_post_id or (stored or {}).get('accepted_post_id'))
+        write_json(self.topic_path(topic_id), record)
+
+        return {
+            'id': topic_id,
+            'highest_post_number': topic.get('highest_post_number', summary.get('highest_post_number')),
+            'last_post_id': max((post['id'] for post in posts), default=last_post_id),
+            'updated': True
+        }
+
+    def build_record(self, topic: Dict[str, Any], posts: List[Dict[str, Any]],
+                     accepted_post_id: Optional[int]) -> Dict[str, Any]:
+        """
+        Topic in the data/discourse_posts.json schema
+        """
+        tags = [tag['name'] if isinstance(tag, dict) else tag for tag in topic.get('tags', [])]
+
+        # Summarize with the accepted answer, else the latest reply, else the question
+        summary_post = next((post for post in posts if post['id'] == accepted_post_id), None)
+        if summary_post is None and posts:
+            summary_post = posts[-1]
+        answer_summary = summary_post['content'][:ANSWER_SUMMARY_LENGTH] if summary_post else ''
+
+        return {
+            'id': topic['id'],
+            'title': topic.get('title', ''),
+            'url': f"{self.base_url}/t/{topic.get('slug', 'topic')}/{topic['id']}",
+            'category': self.category_names.get(str(topic.get('category_id')), str(topic.get('category_id', ''))),
+            'posts': posts,
+            'keywords': tags,
+            'answer_summary': answer_summary,
+            'accepted_post_id': accepted_post_id
+        }
+
+    def write_output(self) -> int:
+        """
+        Stream every cached topic into the combined JSON file, newest first
+        """
+        topic_ids = sorted(
+            (int(name[:-len('.json')]) for name in os.listdir(self.topics_dir) if name.endswith('.json')),
+            reverse=True
+        ) if os.path.isdir(self.topics_dir) else []
+
+        with JSONArrayWriter(os.path.join(self.output_dir, OUTPUT_FILENAME)) as writer:
+            for topic_id in topic_ids:
+                record = read_json(self.topic_path(topic_id))
+                if record is not None:
+                    writer.write(record)
+        return writer.count
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.load_categories()
+        known = self.state.get('topics', {})
+
+        def fetch(summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            try:
+                return self.fetch_topic(summary)
+            except Exception as e:
+                print(f"Error fetching topic {summary.get('id')}: {e}")
+                return None
+
+        try:
+            for update in bounded_map(fetch, self.iter_changed_topics(), self.max_workers):
+                if update is None:
+                    continue
+                known[str(update['id'])] = {
+                    'highest_post_number': update['highest_post_number'],
+                    'last_post_id': update['last_post_id']
+                }
+                if not update['updated']:
+                    continue
+                self.topics_updated += 1
+                if self.topics_updated % 50 == 0:
+                    self.state.set('topics', known)
+                    self.state.save()
+        finally:
+            self.state.set('topics', known)
+            self.state.set('last_run', datetime.now(timezone.utc).isoformat())
+            self.state.save()
+            self.fetcher.close()
+
+        written = self.write_output()
+        return {
+            'topics_seen': self.topics_seen,
+            'topics_updated': self.topics_updated,
+            'topics_written': written,
+            'requests': self.fetcher.requests_made,
+            'not_modified': self.fetcher.not_modified,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Incrementally scrape TDS Discourse topics into scraped_data/")
+    parser.add_argument('--base-url', default=os.getenv('DISCOURSE_BASE_URL', 'https://discourse.onlinedegree.iitm.ac.in'))
+    parser.add_argument('--output-dir', default='scraped_data')
+    parser.add_argument('--category', help="Category slug/id path, e.g. courses/tds-kb/34")
+    parser.add_argument('--since', help="Skip topics with no activity since this date (YYYY-MM-DD)")
+    parser.add_argument('--max-pages', type=int)
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SCRAPER_WORKERS', 8)))
+    args = parser.parse_args()
+
+    since = None
+    if args.since:
+        since = datetime.fromisoformat(args.since)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+    scraper = DiscourseScraper(
+        args.base_url,
+        output_dir=args.output_dir,
+        category=args.category,
+        since=since,
+        max_pages=args.max_pages,
+        max_workers=args.workers,
+        api_key=os.getenv('DISCOURSE_API_KEY'),
+        api_username=os.getenv('DISCOURSE_USERNAME')
+    )
+    summary = scraper.run()
+    print(f"Discourse: {summary['topics_updated']} of {summary['topics_seen']} topics updated, "
+          f"{summary['topics_written']} written, {summary['requests']} requests "
+          f"({summary['not_modified']} not modified) in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Discourse API and the docsify course site, for
+exercising the scrapers without network access.
+
+Topics come from a data/discourse_posts.json style file and course pages
+from a data/course_content.json style file. Both are re-read on every
+request, so editing them (e.g. appending a post) shows up on the next
+crawl. Responses carry ETag and Last-Modified and honour conditional
+requests with 304.
+
+Usage:
+    python -m scraper.fixture_server --port 8900
+    python -m scraper.discourse_scraper --base-url http://127.0.0.1:8900 --output-dir /tmp/scraped
+    python -m scraper.course_scraper --base-url http://127.0.0.1:8900 --output-dir /tmp/scraped
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+
+TOPICS_PER_PAGE = 30
+POSTS_PER_TOPIC_PAGE = 20
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'topic'
+
+
+class FixtureSite:
+    """
+    Renders Discourse JSON and docsify Markdown from the fixture data files
+    """
+
+    def __init__(self, discourse_path: str, course_path: str):
+        self.discourse_path = discourse_path
+        self.course_path = course_path
+
+    def load(self, path: str) -> Tuple[List[Dict[str, Any]], float]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f), os.path.getmtime(path)
+        except OSError:
+            return [], 0.0
+
+    def topics(self) -> Tuple[List[Dict[str, Any]], float]:
+        topics, mtime = self.load(self.discourse_path)
+        categories = sorted({topic.get('category', 'general') for topic in topics})
+        for topic in topics:
+            topic['_category_id'] = categories.index(topic.get('category', 'general')) + 1
+            topic['_last_posted_at'] = max((post.get('created_at', '') for post in topic.get('posts', [])), default='')
+        # Newest activity first, like /latest
+        topics.sort(key=lambda topic: topic['_last_posted_at'], reverse=True)
+        return topics, mtime
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Optional[Tuple[bytes, str, float]]:
+        """(body, content type, mtime) for a request path, or None for 404"""
+        if path == '/categories.json':
+            topics, mtime = self.topics()
+            categories = sorted({(topic['_category_id'], topic.get('category', 'general')) for topic in topics})
+            body = {'category_list': {'categories': [{'id': cid, 'slug': slug, 'name': slug} for cid, slug in categories]}}
+            return json.dumps(body).encode('utf-8'), 'application/json', mtime
+
+        if path == '/latest.json' or path.startswith('/c/'):
+            topics, mtime = self.topics()
+            if path.startswith('/c/'):
+                slug = path[len('/c/'):-len('.json')].split('/')[0]
+                topics = [topic for topic in topics if topic.get('category') == slug]
+            page = int(query.get('page', ['0'])[0])
+            chunk = topics[page * TOPICS_PER_PAGE:(page + 1) * TOPICS_PER_PAGE]
+            body = {'topic_list': {
+                'topics': [self.topic_summary(topic) for topic in chunk],
+                'more_topics_url': f"{path}?page={page + 1}" if (page + 1) * TOPICS_PER_PAGE < len(topics) else None
+            }}
+            return json.dumps(body).encode('utf-8'), 'application/json', mtime
+
+        match = re.fullmatch(r'/t/(\d+)(/posts)?\.json', path)
+        if match:
+            topics, mtime = self.topics()
+            topic = next((topic for topic in topics if topic['id'] == int(match.group(1))), None)
+            if topic is None:
+                return None
+            posts = [self.render_post(topic, number, post) for number, post in enumerate(topic.get('posts', []), 1)]
+            if match.group(2):
+                wanted = {int(post_id) for post_id in query.get('post_ids[]', [])}
+                body = {'post_stream': {'posts': [post for post in posts if post['id'] in wanted]}}
+            else:
+                body = dict(self.topic_summary(topic), post_stream={
+                    'posts': posts[:POSTS_PER_TOPIC_PAGE],
+                    'stream': [post['id'] for post in posts]
+                }, tags=topic.get('keywords', []))
+            return json.dumps(body).encode('utf-8'), 'application/json', mtime
+
+        if path == '/_sidebar.md':
+            sections, mtime = self.load(self.course_path)
+            lines = []
+            for index, section in enumerate(sections):
+                lines.append(f"- [{section.get('title', 'Page')}](page-{index}.md)")
+            return '\n'.join(lines).encode('utf-8'), 'text/markdown; charset=utf-8', mtime
+
+        match = re.fullmatch(r'/page-(\d+)\.md', path)
+        if match:
+            sections, mtime = self.load(self.course_path)
+            index = int(match.group(1))
+            if index >= len(sections):
+                return None
+            section = sections[index]
+            headings = '\n\n'.join(f"## {keyword}" for keyword in section.get('keywords', []))
+            markdown = f"# {section.get('title', '')}\n\n{section.get('content', '')}\n\n{headings}\n"
+            return markdown.encode('utf-8'), 'text/markdown; charset=utf-8', mtime
+
+        return None
+
+    def topic_summary(self, topic: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': topic['id'],
+            'title': topic.get('title', ''),
+            'slug': slugify(topic.get('title', '')),
+            'category_id': topic['_category_id'],
+            'posts_count': len(topic.get('posts', [])),
+            'highest_post_number': len(topic.get('posts', [])),
+            'last_posted_at': topic['_last_posted_at']
+        }
+
+    def render_post(self, topic: Dict[str, Any], number: int, post: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': post['id'],
+            'post_number': number,
+            'username': post.get('username', ''),
+            'cooked': f"<p>{post.get('content', '')}</p>",
+            'created_at': post.get('created_at'),
+            'accepted_answer': number > 1 and post.get('content', '') in topic.get('answer_summary', '')
+        }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    site: FixtureSite = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        routed = self.site.route(url.path, parse_qs(url.query))
+        if routed is None:
+            self.send_error(404)
+            return
+
+        body, content_type, mtime = routed
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        last_modified = formatdate(int(mtime), usegmt=True)
+
+        if self.not_modified(etag, int(mtime)):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_modified(self, etag: str, mtime: int) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port: int = 8900, discourse_path: str = os.path.join('data', 'discourse_posts.json'),
+                course_path: str = os.path.join('data', 'course_content.json'), host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Build (but don't start) a fixture server; port 0 picks a free port"""
+    handler = type('BoundFixtureHandler', (FixtureHandler,), {'site': FixtureSite(discourse_path, course_path)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture Discourse/course data for scraper testing")
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--discourse-data', default=os.path.join('data', 'discourse_posts.json'))
+    parser.add_argument('--course-data', default=os.path.join('data', 'course_content.json'))
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.discourse_data, args.course_data)
+    print(f"Fixture server on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
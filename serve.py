@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pre-fork server: load and index the knowledge base once, then fork
+WEB_WORKERS uvicorn workers that share it copy-on-write.
+
+The compiled snapshot is (re)built first if it is missing or stale, so
+workers serve from the same memory-mapped file; per-worker RSS/USS is
+reported under "workers" in /api/stats.
+
+Usage:
+    WEB_WORKERS=4 python serve.py
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+from compile_knowledge import compile_snapshot, snapshot_is_current
+from services.knowledge_store import DEFAULT_SNAPSHOT_PATH
+from services.prefork import PreforkServer
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the TDS Virtual TA from pre-forked workers")
+    parser.add_argument("--host", default=os.getenv("APP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("APP_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    snapshot_path = os.getenv("KNOWLEDGE_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    if snapshot_path and not snapshot_is_current(snapshot_path):
+        print(f"Compiling knowledge snapshot into {snapshot_path}")
+        compile_snapshot(snapshot_path)
+
+    # Workers must inherit a loaded knowledge base, so never load lazily here
+    os.environ["LAZY_STARTUP"] = "false"
+    # Workers already spread requests over the cores, and shard pools built
+    # in each of them would compete for the same cores, so search in-process
+    if int(os.getenv("SEARCH_SHARDS", 0)) > 0:
+        print("SEARCH_SHARDS ignored: pre-forked workers search in-process")
+    os.environ["SEARCH_SHARDS"] = "0"
+    import app
+
+    # Build what workers would otherwise each build on first use
+    snapshot = app.answer_generator.snapshot
+    snapshot.search_index.query_engine.current_cache()
+    if snapshot.passage_index is not None:
+        snapshot.passage_index.query_engine.current_cache()
+
+    print(f"Starting TDS Virtual TA API on {args.host}:{args.port} with {args.workers} workers")
+    PreforkServer(app.app, args.host, args.port, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
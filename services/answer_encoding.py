@@ -0,0 +1,49 @@
+import json
+from typing import List, Dict, Any
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, byte-for-byte what FastAPI's JSONResponse produces
+    for the same content
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+def answer_payload(answer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The API response body for generator output (links carry a 'text', not a 'title')"""
+    return {
+        'answer': answer_data['answer'],
+        'links': [
+            {'url': link['url'], 'text': link.get('text', link.get('title', 'Link'))}
+            for link in answer_data['links']
+        ]
+    }
+
+
+def with_encoding(answer_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A constant answer with its response body serialized once, under
+    'encoded', so serving it costs no encoding at all
+    """
+    return dict(answer_data, encoded=dumps(answer_payload(answer_data)))
+
+
+def encode_answer(answer_data: Dict[str, Any]) -> bytes:
+    """Response body for an answer, reusing its pre-serialized bytes when it has them"""
+    encoded = answer_data.get('encoded')
+    if encoded is not None:
+        return encoded
+    return dumps(answer_payload(answer_data))
+
+
+def encode_batch(encoded_answers: List[bytes]) -> bytes:
+    """{"answers": [...]} from already encoded answers, without re-parsing them"""
+    return b'{"answers":[' + b','.join(encoded_answers) + b']}'
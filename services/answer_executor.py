@@ -0,0 +1,291 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+EXECUTOR_MODES = ('inline', 'thread', 'process')
+
+# Services owned by each process-pool worker (built once by the initializer)
+_worker_pipeline: Optional[Callable[[str, Optional[str], Optional[int]], Dict[str, Any]]] = None
+_worker_batch_pipeline: Optional[Callable[[List[Tuple[str, Optional[str], Optional[int]]]], List[Dict[str, Any]]]] = None
+_worker_stream_pipeline: Optional[Callable[[str, Optional[str], Optional[int]], Iterable[Dict[str, Any]]]] = None
+
+# Queued after a streamed answer's last event
+_STREAM_END = object()
+
+
+def _init_process_worker() -> None:
+    """
+    Build the question/answer services inside a process-pool worker
+    """
+    global _worker_pipeline, _worker_batch_pipeline, _worker_stream_pipeline
+
+    from services.answer_generator import AnswerGenerator
+    from services.answer_rules import AnswerRuleBook
+    from services.knowledge_ingest import KnowledgeIngestor
+    from services.question_processor import QuestionProcessor
+
+    answer_rules = AnswerRuleBook()
+    answer_rules.start()
+    answer_generator = AnswerGenerator(answer_rules)
+    question_processor = QuestionProcessor(answer_rules, known_terms=answer_generator.has_term)
+    # Workers replay the ingest log at startup but don't see later ingests
+    KnowledgeIngestor(answer_generator).attach()
+
+    def pipeline(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> Dict[str, Any]:
+        processed_question = question_processor.process_question(question, image_b64)
+        processed_question['top_k'] = top_k
+        return answer_generator.generate_answer(processed_question)
+
+    def batch_pipeline(items: List[Tuple[str, Optional[str], Optional[int]]]) -> List[Dict[str, Any]]:
+        processed_questions = []
+        for question, image_b64, top_k in items:
+            processed_question = question_processor.process_question(question, image_b64)
+            processed_question['top_k'] = top_k
+            processed_questions.append(processed_question)
+        return answer_generator.generate_answers(processed_questions)
+
+    def stream_pipeline(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+        processed_question = question_processor.process_question(question, image_b64)
+        processed_question['top_k'] = top_k
+        return answer_generator.generate_answer_stream(processed_question)
+
+    _worker_pipeline = pipeline
+    _worker_batch_pipeline = batch_pipeline
+    _worker_stream_pipeline = stream_pipeline
+
+
+def _answer_in_process_worker(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> Dict[str, Any]:
+    return _worker_pipeline(question, image_b64, top_k)
+
+
+def _answer_batch_in_process_worker(items: List[Tuple[str, Optional[str], Optional[int]]]) -> List[Dict[str, Any]]:
+    return _worker_batch_pipeline(items)
+
+
+def _answer_stream_in_process_worker(question: str, image_b64: Optional[str], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    # Events can't cross the process boundary one at a time; they are sent back together
+    return list(_worker_stream_pipeline(question, image_b64, top_k))
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the answer queue is full; callers should retry later
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Answer queue is full")
+        self.retry_after = retry_after
+
+
+class AnswerExecutor:
+    """
+    Runs the synchronous answer pipeline off the event loop.
+
+    Modes:
+        inline  - run on the event loop (previous behaviour)
+        thread  - bounded thread pool sharing the app's services
+        process - process pool; each worker loads its own services
+
+    At most max_workers jobs run at once and at most max_queue more wait
+    for a worker. Beyond that, submit() raises ExecutorSaturated instead of
+    letting latency grow without bound.
+    """
+
+    def __init__(self,
+                 pipeline: Callable[[str, Optional[str], Optional[int]], Dict[str, Any]],
+                 batch_pipeline: Optional[Callable[[List[Tuple[str, Optional[str], Optional[int]]]], List[Dict[str, Any]]]] = None,
+                 stream_pipeline: Optional[Callable[[str, Optional[str], Optional[int]], Iterable[Dict[str, Any]]]] = None,
+                 mode: str = 'thread',
+                 max_workers: int = 4,
+                 max_queue: int = 64,
+                 retry_after: int = 1):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+
+        self.pipeline = pipeline
+        self.batch_pipeline = batch_pipeline
+        self.stream_pipeline = stream_pipeline
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+
+        self.executor: Optional[Executor] = None
+        if mode == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='answer')
+        elif mode == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process_worker)
+
+        self.pending = 0
+        self.peak_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls,
+                 pipeline: Callable[[str, Optional[str], Optional[int]], Dict[str, Any]],
+                 batch_pipeline: Optional[Callable[[List[Tuple[str, Optional[str], Optional[int]]]], List[Dict[str, Any]]]] = None,
+                 stream_pipeline: Optional[Callable[[str, Optional[str], Optional[int]], Iterable[Dict[str, Any]]]] = None) -> 'AnswerExecutor':
+        """
+        Configure from ANSWER_EXECUTOR, ANSWER_WORKERS, ANSWER_MAX_QUEUE and
+        ANSWER_RETRY_AFTER
+        """
+        return cls(
+            pipeline,
+            batch_pipeline,
+            stream_pipeline,
+            mode=os.getenv('ANSWER_EXECUTOR', 'thread').lower(),
+            max_workers=int(os.getenv('ANSWER_WORKERS', min(4, os.cpu_count() or 1))),
+            max_queue=int(os.getenv('ANSWER_MAX_QUEUE', 64)),
+            retry_after=int(os.getenv('ANSWER_RETRY_AFTER', 1))
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs accepted but waiting for a free worker"""
+        return max(0, self.pending - self.max_workers)
+
+    async def submit(self, question: str, image_b64: Optional[str] = None,
+                     top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Answer a question on the configured executor
+        """
+        if self.executor is None:
+            return self.pipeline(question, image_b64, top_k)
+
+        job = _answer_in_process_worker if self.mode == 'process' else self.pipeline
+        return await self.run_job(job, question, image_b64, top_k)
+
+    async def submit_batch(self, items: List[Tuple[str, Optional[str], Optional[int]]]) -> List[Dict[str, Any]]:
+        """
+        Answer (question, image, top_k) tuples as one job occupying a single worker
+        """
+        if self.batch_pipeline is None:
+            raise RuntimeError("No batch pipeline configured")
+
+        if self.executor is None:
+            return self.batch_pipeline(items)
+
+        job = _answer_batch_in_process_worker if self.mode == 'process' else self.batch_pipeline
+        return await self.run_job(job, items)
+
+    def stream(self, question: str, image_b64: Optional[str] = None,
+               top_k: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer events for a question as the stream pipeline produces them
+
+        The job is admitted (or ExecutorSaturated raised) and started here,
+        before the first event is awaited, so callers can still answer 503.
+        Thread workers hand each event over as soon as it is produced;
+        process workers send them all when the answer is complete.
+        """
+        if self.stream_pipeline is None:
+            raise RuntimeError("No stream pipeline configured")
+
+        if self.executor is None:
+            return self.iterate_inline(self.stream_pipeline(question, image_b64, top_k))
+
+        self.admit()
+        if self.mode == 'process':
+            job = asyncio.ensure_future(self.run_admitted(_answer_stream_in_process_worker, question, image_b64, top_k))
+            return self.events_when_done(job)
+
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def produce() -> None:
+            try:
+                for event in self.stream_pipeline(question, image_b64, top_k):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, _STREAM_END)
+
+        job = asyncio.ensure_future(self.run_admitted(produce))
+        return self.events_from_queue(events, job)
+
+    @staticmethod
+    async def iterate_inline(events: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        for event in events:
+            yield event
+
+    @staticmethod
+    async def events_when_done(job: asyncio.Future) -> AsyncIterator[Dict[str, Any]]:
+        for event in await job:
+            yield event
+
+    @staticmethod
+    async def events_from_queue(events: asyncio.Queue, job: asyncio.Future) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await events.get()
+            if event is _STREAM_END:
+                break
+            yield event
+        await job  # Re-raises the pipeline's error, if any
+
+    def admit(self) -> None:
+        """
+        Take a worker or queue slot, rejecting the job when the queue is full
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+
+        self.pending += 1
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+    async def run_job(self, job: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a job on the pool, rejecting it when the queue is full
+        """
+        self.admit()
+        return await self.run_admitted(job, *args)
+
+    async def run_admitted(self, job: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a job that already holds a slot from admit(), then free the slot
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.mode == 'thread':
+            # Carry the request's context (e.g. its trace) into the worker thread
+            args = (job,) + args
+            job = contextvars.copy_context().run
+
+        try:
+            result = await loop.run_in_executor(self.executor, job, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Queue metrics for /api/stats
+        """
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_progress': self.pending,
+            'running': min(self.pending, self.max_workers),
+            'queue_depth': self.queue_depth,
+            'peak_queue_depth': self.peak_queue_depth,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
@@ -1,143 +1,188 @@
 import json
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import re
 from datetime import datetime
 
+from services.answer_encoding import with_encoding
+from services.answer_rules import AnswerRuleBook
+from services.knowledge_base import KnowledgeSnapshot, source_signature
+from services.metrics import ANSWERS_BY_PATH
+from services.tracing import timed_stage
+from services.knowledge_store import CompiledKnowledge, SnapshotFormatError, DEFAULT_SNAPSHOT_PATH
+from services.passage_index import PassageIndex, attach_passages, passage_boosted_top_k, passage_boosted_top_k_batch
+from services.search_index import BM25Index, tokenize
+from services.semantic_cache import SemanticCache, question_identifiers
+from services.fuzzy_vocabulary import FuzzyVocabulary
 
-class AnswerGenerator:
-    def __init__(self):
-        # Load enhanced knowledge bases
-        self.enhanced_course_content = self.load_enhanced_course_content()
-        self.enhanced_discourse_posts = self.load_enhanced_discourse_posts()
-        self.comprehensive_knowledge = self.load_comprehensive_knowledge()
-        
-        # Enhanced predefined answers with real scraped data
-        self.predefined_answers = {
-            'course_info': {
-                'tds_full_form': {
-                    'answer': "TDS stands for 'Tools in Data Science'. It's a practical diploma level data science course at IIT Madras that teaches popular tools for sourcing data, transforming it, analyzing it, communicating these as visual stories, and deploying them in production.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net/#/2025-01",
-                            'title': "TDS Course Overview"
-                        }
-                    ]
-                },
-                'what_is_tds': {
-                    'answer': "TDS (Tools in Data Science) is a practical diploma level course at IIT Madras covering 7 modules: Development Tools, Deployment Tools, Large Language Models, Data Sourcing, Data Preparation, Data Analysis, and Data Visualization. The course is designed to be challenging and covers real-world tools that make you more productive than your peers.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net",
-                            'title': "TDS Course Materials"
-                        },
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in",
-                            'title': "TDS Discussion Forum"
-                        }
-                    ]
-                },
-                'course_books': {
-                    'answer': "There are no IITM certified books nor PDFs for Tools in Data Science. The site https://tds.s-anand.net/ is the official reference. Content is updated regularly, so you might want to track the changes for recent updates.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net",
-                            'title': "Official TDS Reference"
-                        }
-                    ]
-                }
-            },
-            'grading_info': {
-                's_grade': {
-                    'answer': "To get an S grade in TDS, you need excellent performance across all evaluations: Best 4 out of 7 GAs (15%), Project 1 (20%), Project 2 (20%), ROE (20%), and Final end-term (25%). Focus on completing all assignments, projects with high quality, and preparing well for the challenging ROE and final exam.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net/#/2025-01",
-                            'title': "TDS Evaluation Structure"
-                        }
-                    ]
-                },
-                'project_deadline': {
-                    'answer': "Based on the Jan 2025 schedule: Project 1 deadline is 16 Feb 2025, Project 2 deadline is 31 Mar 2025. For May 2025 semester, please check the course announcements on the TDS website or Discourse forum for updated deadlines.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net/#/2025-01",
-                            'title': "TDS Evaluation Schedule"
-                        },
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in",
-                            'title': "TDS Course Announcements"
-                        }
-                    ]
-                }
-            },
-            'technical_issues': {
-                'score_reset': {
-                    'answer': "Score resetting to 0 was a known issue that has been fixed with a 'Recent saves' feature. This shows the time and score for the last 3 saves. Always reenter all answers before hitting Save and click 'Check' to calculate your score. The last submission is always saved.",
-                    'links': [
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in/t/score-keeps-resetting-to-0",
-                            'title': "Score Reset Issue Discussion"
-                        }
-                    ]
-                }
-            },
-            'projects': {
-                'github_email': {
-                    'answer': "No explicit policy requires IITM email for GitHub profile or repo owner. However, you MUST use your IITM email when submitting the project submission form. The GitHub profile email can be different.",
-                    'links': [
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in/t/regarding-github-mail-for-project",
-                            'title': "GitHub Email Requirements Discussion"
-                        }
-                    ]
-                }
-            },
-            'roe_exam': {
-                'roe_info': {
-                    'answer': "ROE (Remote Online Exam) is a 45-minute open-internet exam worth 20% of your grade, scheduled for 02 Mar 2025. It tests practical skills including LLM embeddings (using text-embedding-3-small), file operations with mv/find commands, and other hands-on tasks. It's designed to be challenging.",
-                    'links': [
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in/t/solving-roe-realtime",
-                            'title': "ROE Exam Discussion"
-                        }
-                    ]
-                }
-            },
-            'model_usage': {
-                'gpt-3.5-turbo-0125': {
-                    'answer': "You must use `gpt-3.5-turbo-0125`, even if the AI Proxy only supports `gpt-4o-mini`. Use the OpenAI API directly for this question.",
-                    'links': [
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in/t/ga5-question-8-clarification/155939/4",
-                            'title': "Use the model that's mentioned in the question."
-                        }
-                    ]
-                }
-            },
-            'environment_setup': {
-                'docker_vs_podman': {
-                    'answer': "While Docker knowledge is valuable, we recommend using Podman for this course as it's the officially supported container tool. However, Docker is also acceptable for completing assignments.",
-                    'links': [
-                        {
-                            'url': "https://tds.s-anand.net/#/docker",
-                            'title': "TDS Docker/Podman Documentation"
-                        }
-                    ]
-                }
-            },
-            'grading_system': {
-                'bonus_scoring': {
-                    'answer': "If a student scores 10/10 on GA4 as well as a bonus, it would appear as '110' on the dashboard, indicating 10 out of 10 plus the bonus point.",
-                    'links': [
-                        {
-                            'url': "https://discourse.onlinedegree.iitm.ac.in/t/ga4-data-sourcing-discussion-thread-tds-jan-2025/165959/388",
-                            'title': "GA4 Dashboard Scoring Discussion"
-                        }
-                    ]
-                }
-            }
+
+CONTEXTUAL_ANSWER_PREFIX = "Based on the TDS course materials and discussions: "
+NO_SUMMARY_ANSWER = "I found relevant discussions about your question. Please check the linked resources for detailed information."
+MAX_ANSWER_LENGTH = 500
+CORRECTED_TERM_WEIGHT = 0.8  # Weight of a spelling-corrected query term relative to the original
+FALLBACK_ANSWER = with_encoding({
+    'answer': "I don't have specific information about this question in my current knowledge base. Please check the official TDS course materials at https://tds.s-anand.net/ or ask on the Discourse forum for community assistance.",
+    'links': [
+        {
+            'url': 'https://tds.s-anand.net',
+            'title': 'Official TDS Course Materials'
+        },
+        {
+            'url': 'https://discourse.onlinedegree.iitm.ac.in',
+            'title': 'TDS Discourse Forum'
         }
+    ]
+})
+
+
+class AnswerGenerator:
+    def __init__(self, answer_rules: Optional[AnswerRuleBook] = None, use_compiled_snapshot: bool = True,
+                 lazy: bool = False):
+        # Prefer the memory-mapped compiled snapshot when it matches the sources
+        self.compiled_snapshot_path = os.getenv('KNOWLEDGE_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+        self.use_compiled_snapshot = use_compiled_snapshot
+        
+        # Load enhanced knowledge bases into the first snapshot (lazy: an
+        # empty placeholder until load_knowledge runs)
+        self.reload_lock = threading.Lock()
+        self.ingestor = None  # Set by KnowledgeIngestor to replay live ingests into new snapshots
+        self.sharded_search = None  # Set by ShardedSearch to fan searches out to shard processes
+        self.snapshot = KnowledgeSnapshot.empty() if lazy else self.build_snapshot(version=1)
+        
+        # Predefined answers and their matching rules live in a data file
+        self.answer_rules = answer_rules or AnswerRuleBook()
+        
+        # Contextual answers reused for reworded questions (size 0 disables)
+        # Search results per question unless a request asks for another count
+        self.default_top_k = int(os.getenv('SEARCH_TOP_K', 3))
+        
+        self.semantic_cache = SemanticCache(
+            max_size=int(os.getenv('SEMANTIC_CACHE_SIZE', 512)),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.85)),
+            ttl=float(os.getenv('SEMANTIC_CACHE_TTL', 3600))
+        )
+    
+    @property
+    def predefined_answers(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Predefined answers grouped by category"""
+        return self.answer_rules.answers
+    
+    @property
+    def enhanced_course_content(self):
+        return self.snapshot.course_content
+    
+    @property
+    def enhanced_discourse_posts(self):
+        return self.snapshot.discourse_posts
+    
+    @property
+    def comprehensive_knowledge(self) -> Dict[str, Any]:
+        return self.snapshot.comprehensive_knowledge
+    
+    @property
+    def search_index(self) -> BM25Index:
+        return self.snapshot.search_index
+    
+    def build_snapshot(self, version: int, allow_compiled: bool = True) -> KnowledgeSnapshot:
+        """
+        Load every knowledge source and build its search index
+        
+        allow_compiled=False always builds a mutable index from the JSON
+        sources, even when the compiled snapshot is current.
+        """
+        started = time.perf_counter()
+        signature = source_signature()
+        
+        compiled = self.load_compiled_knowledge(signature) if allow_compiled else None
+        if compiled is not None:
+            return KnowledgeSnapshot(
+                version=version,
+                course_content=compiled.course_content,
+                discourse_posts=compiled.discourse_posts,
+                comprehensive_knowledge=compiled.comprehensive_knowledge,
+                search_index=compiled.search_index,
+                signature=signature,
+                build_seconds=time.perf_counter() - started,
+                source='compiled',
+                passage_index=compiled.passage_index,
+                ingest_signature=compiled.ingest_signature,
+                term_vocabulary=self.build_term_vocabulary(compiled.search_index, compiled.passage_index)
+            )
+        
+        course_content = self.load_enhanced_course_content()
+        discourse_posts = self.load_enhanced_discourse_posts()
+        comprehensive_knowledge = self.load_comprehensive_knowledge()
+        
+        # Build the inverted index once so queries don't rescan the corpus
+        search_index = self.build_search_index(course_content, discourse_posts)
+        passage_index = self.build_passage_index(search_index)
+        
+        return KnowledgeSnapshot(
+            version=version,
+            course_content=course_content,
+            discourse_posts=discourse_posts,
+            comprehensive_knowledge=comprehensive_knowledge,
+            search_index=search_index,
+            signature=signature,
+            build_seconds=time.perf_counter() - started,
+            passage_index=passage_index,
+            term_vocabulary=self.build_term_vocabulary(search_index, passage_index)
+        )
+    
+    def load_compiled_knowledge(self, signature) -> Optional[CompiledKnowledge]:
+        """Map the compiled snapshot if it was built from the current sources"""
+        if not self.use_compiled_snapshot or not os.path.exists(self.compiled_snapshot_path):
+            return None
+        try:
+            compiled = CompiledKnowledge(self.compiled_snapshot_path)
+        except SnapshotFormatError as e:
+            print(f"Ignoring compiled knowledge snapshot: {e}")
+            return None
+        
+        if compiled.signature != signature:
+            print("Compiled knowledge snapshot is stale, loading JSON sources instead")
+            return None
+        return compiled
+    
+    def load_knowledge(self) -> KnowledgeSnapshot:
+        """Build the first snapshot if the generator was created lazily"""
+        with self.reload_lock:
+            if self.snapshot.version == 0:
+                self.snapshot = self.build_snapshot(version=1)
+            return self.snapshot
+    
+    def knowledge_changed(self) -> bool:
+        """Whether any source file differs from the active snapshot"""
+        return source_signature() != self.snapshot.signature
+    
+    def reload_knowledge(self, allow_compiled: bool = True) -> Optional[KnowledgeSnapshot]:
+        """Build a new snapshot and swap it in atomically
+        
+        Returns None if another reload is already running. Requests that
+        started on the old snapshot keep using it until they finish.
+        """
+        if not self.reload_lock.acquire(blocking=False):
+            return None
+        try:
+            snapshot = self.build_snapshot(version=self.snapshot.version + 1, allow_compiled=allow_compiled)
+            return self.publish_snapshot(snapshot)
+        finally:
+            self.reload_lock.release()
+    
+    def publish_snapshot(self, snapshot: KnowledgeSnapshot) -> KnowledgeSnapshot:
+        """Swap in a snapshot, first replaying live ingests into it; returns what was published"""
+        if self.ingestor is None:
+            self.snapshot = snapshot
+            return snapshot
+        # Hold the ingest lock so no ingest lands between the replay and the swap
+        with self.ingestor.lock:
+            snapshot = self.ingestor.prepare(snapshot)
+            # Ingests may have published newer versions while this one was built
+            snapshot.version = max(snapshot.version, self.snapshot.version + 1)
+            self.snapshot = snapshot
+            return snapshot
     
     def load_enhanced_course_content(self) -> List[Dict[str, Any]]:
         """Load enhanced course content from scraped data"""
@@ -186,143 +231,232 @@ class AnswerGenerator:
     
     def generate_answer(self, processed_question: Dict[str, Any]) -> Dict[str, Any]:
         """Generate an answer using enhanced knowledge base"""
-        question_type = processed_question['question_type']
-        keywords = processed_question['keywords']
-        original_question = processed_question['original_question']
+        snapshot = self.snapshot
         
         # Check predefined answers first
-        predefined_answer = self.get_predefined_answer(question_type, keywords, original_question)
+        predefined_answer = self.find_predefined_answer(processed_question)
         if predefined_answer:
+            ANSWERS_BY_PATH.inc('predefined')
             return predefined_answer
         
+        cached_answer, question_vector = self.lookup_semantic_cache(processed_question, snapshot)
+        if cached_answer is not None:
+            ANSWERS_BY_PATH.inc('semantic_cache')
+            return cached_answer
+        
         # Search enhanced content
-        relevant_content = self.search_enhanced_content(processed_question)
+        relevant_content = self.search_enhanced_content(processed_question, snapshot)
         
         if relevant_content:
-            return self.generate_contextual_answer(processed_question, relevant_content)
+            ANSWERS_BY_PATH.inc('contextual')
+            answer = self.generate_contextual_answer(processed_question, relevant_content)
+            self.store_semantic_cache(processed_question, snapshot, question_vector, answer)
+            return answer
         else:
+            ANSWERS_BY_PATH.inc('fallback')
             return self.generate_fallback_answer(processed_question)
     
-    def get_predefined_answer(self, question_type: str, keywords: List[str], question: str) -> Optional[Dict[str, Any]]:
+    def generate_answers(self, processed_questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate answers for a batch, scoring all searched questions together"""
+        snapshot = self.snapshot
+        answers: List[Optional[Dict[str, Any]]] = [
+            self.find_predefined_answer(processed_question) for processed_question in processed_questions
+        ]
+        
+        predefined_count = len(answers) - answers.count(None)
+        ANSWERS_BY_PATH.inc('predefined', amount=predefined_count)
+        
+        question_vectors = {}
+        for index, answer in enumerate(answers):
+            if answer is None:
+                answers[index], question_vectors[index] = self.lookup_semantic_cache(processed_questions[index], snapshot)
+        to_search = [index for index, answer in enumerate(answers) if answer is None]
+        ANSWERS_BY_PATH.inc('semantic_cache', amount=len(answers) - predefined_count - len(to_search))
+        
+        with timed_stage('search_batch'):
+            queries = [
+                (self.build_query_weights(processed_questions[index], snapshot), self.top_k_for(processed_questions[index]))
+                for index in to_search
+            ]
+            batch_results = None
+            if queries and self.sharded_search is not None and self.sharded_search.serves(snapshot):
+                # One message per shard for the whole batch
+                batch_results = self.sharded_search.search_batch(queries)
+            if batch_results is None:
+                batch_results = self.rank_local_batch(snapshot, queries)
+        
+        for index, relevant_content in zip(to_search, batch_results):
+            if relevant_content:
+                ANSWERS_BY_PATH.inc('contextual')
+                answers[index] = self.generate_contextual_answer(processed_questions[index], relevant_content)
+                self.store_semantic_cache(processed_questions[index], snapshot, question_vectors[index], answers[index])
+            else:
+                ANSWERS_BY_PATH.inc('fallback')
+                answers[index] = self.generate_fallback_answer(processed_questions[index])
+        
+        return answers
+    
+    def top_k_for(self, processed_question: Dict[str, Any]) -> int:
+        """Number of search results requested for a question"""
+        return processed_question.get('top_k') or self.default_top_k
+    
+    def knowledge_generation(self, snapshot: KnowledgeSnapshot) -> Tuple[int, int, int]:
+        """Versions of everything an answer depends on; cached answers from other generations are ignored"""
+        ingest_revision = self.ingestor.revision if self.ingestor is not None else 0
+        return (self.answer_rules.version, snapshot.version, ingest_revision)
+    
+    def lookup_semantic_cache(self, processed_question: Dict[str, Any], snapshot: KnowledgeSnapshot):
+        """(cached answer or None, question vector or None) for a question similar to one answered before"""
+        # Answers to questions with images aren't reused
+        if processed_question.get('has_image') or not self.semantic_cache.enabled:
+            return None, None
+        with timed_stage('semantic_cache'):
+            return self.semantic_cache.lookup(processed_question['cleaned_question'],
+                                              self.semantic_generation(processed_question, snapshot))
+    
+    def store_semantic_cache(self, processed_question: Dict[str, Any], snapshot: KnowledgeSnapshot,
+                             question_vector, answer: Dict[str, Any]) -> None:
+        if question_vector is not None:
+            self.semantic_cache.put(question_vector, self.semantic_generation(processed_question, snapshot), answer)
+    
+    def semantic_generation(self, processed_question: Dict[str, Any], snapshot: KnowledgeSnapshot) -> Tuple[Any, ...]:
+        """
+        Semantic cache generation; answers with a different result count, or
+        to questions naming a different assignment, week or model, are distinct
+        """
+        return self.knowledge_generation(snapshot) + (
+            self.top_k_for(processed_question),
+            question_identifiers(processed_question['cleaned_question'])
+        )
+    
+    def find_predefined_answer(self, processed_question: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Predefined answer for a processed question, reusing its matched key"""
+        with timed_stage('predefined_lookup'):
+            if 'predefined_answer_key' in processed_question:
+                return self.lookup_predefined_answer(processed_question['predefined_answer_key'])
+            return self.get_predefined_answer(processed_question['original_question'])
+    
+    def get_predefined_answer(self, question: str) -> Optional[Dict[str, Any]]:
         """Enhanced predefined answer detection"""
-        question_lower = question.lower()
-        
-        # Course information
-        if any(phrase in question_lower for phrase in ['what is tds', 'about tds', 'tds course']):
-            return self.predefined_answers['course_info']['what_is_tds']
-        elif any(phrase in question_lower for phrase in ['tds full form', 'stands for', 'tds means']):
-            return self.predefined_answers['course_info']['tds_full_form']
-        elif any(phrase in question_lower for phrase in ['books', 'pdf', 'certified', 'reference']):
-            return self.predefined_answers['course_info']['course_books']
-        
-        # Grading and deadlines
-        elif any(phrase in question_lower for phrase in ['s grade', 'how to get s', 'grade s']):
-            return self.predefined_answers['grading_info']['s_grade']
-        elif any(phrase in question_lower for phrase in ['deadline', 'due date', 'project 01', 'project 1']):
-            return self.predefined_answers['grading_info']['project_deadline']
-        
-        # Technical issues
-        elif any(phrase in question_lower for phrase in ['score reset', 'score 0', 'resetting']):
-            return self.predefined_answers['technical_issues']['score_reset']
-        
-        # Project-related
-        elif any(phrase in question_lower for phrase in ['github email', 'iitm email', 'email github']):
-            return self.predefined_answers['projects']['github_email']
-        
-        # ROE exam
-        elif any(phrase in question_lower for phrase in ['roe', 'remote online exam', 'roe exam']):
-            return self.predefined_answers['roe_exam']['roe_info']
-        
-        # Model usage questions
-        elif any(phrase in question_lower for phrase in ['gpt-3.5-turbo-0125', 'gpt3.5', 'openai api']):
-            return self.predefined_answers['model_usage']['gpt-3.5-turbo-0125']
-        
-        # Environment setup questions
-        elif any(phrase in question_lower for phrase in ['docker', 'podman']) and 'use' in question_lower:
-            return self.predefined_answers['environment_setup']['docker_vs_podman']
-        
-        # Grading system questions (bonus scoring)
-        elif any(phrase in question_lower for phrase in ['10/10', 'bonus', 'dashboard']) and any(word in question_lower for word in ['appear', 'show', 'display']):
-            return self.predefined_answers['grading_system']['bonus_scoring']
-        
-        # Future schedule questions
-        elif any(phrase in question_lower for phrase in ['sep 2025', 'end-term', 'future']) and 'exam' in question_lower:
-            return {
-                'answer': "I don't know the specific schedule for the TDS Sep 2025 end-term exam as this information is not available at this time. Please check the course announcements for updated information.",
-                'links': [
-                    {
-                        'url': "https://tds.s-anand.net",
-                        'title': "TDS Course Schedule"
-                    },
-                    {
-                        'url': "https://discourse.onlinedegree.iitm.ac.in",
-                        'title': "TDS Announcements"
-                    }
-                ]
-            }
+        answer_key = self.answer_rules.matcher.match(question)['predefined_answer_key']
+        return self.lookup_predefined_answer(answer_key)
+    
+    def lookup_predefined_answer(self, answer_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Resolve a 'category.name' key from the question matcher"""
+        return self.answer_rules.lookup(answer_key)
+    
+    def build_search_index(self, course_content: List[Dict[str, Any]], discourse_posts: List[Dict[str, Any]]) -> BM25Index:
+        """Index course content and discourse topics for BM25 retrieval"""
+        index = BM25Index()
         
-        return None
+        for content in course_content:
+            index.add_document('course_content', content, self.course_search_text(content))
+        
+        for post_topic in discourse_posts:
+            index.add_document('discourse', post_topic, self.discourse_search_text(post_topic))
+        
+        return index
     
-    def search_enhanced_content(self, processed_question: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Search enhanced content sources"""
-        relevant_content = []
-        keywords = processed_question['keywords']
-        question_lower = processed_question['cleaned_question'].lower()
+    def build_passage_index(self, search_index: BM25Index) -> PassageIndex:
+        """Index every discourse post as passages pointing back at their topic document"""
+        passage_index = PassageIndex()
+        for doc_id, document in enumerate(search_index.documents):
+            if document['type'] == 'discourse':
+                passage_index.add_topic(doc_id, document['data'])
+        return passage_index
+    
+    def course_search_text(self, content: Dict[str, Any]) -> str:
+        """Text a course content section is indexed by"""
+        return content.get('content', '') + ' ' + ' '.join(content.get('keywords', []))
+    
+    def discourse_search_text(self, post_topic: Dict[str, Any]) -> str:
+        """Text a discourse topic is indexed by"""
+        return ' '.join([
+            post_topic.get('title', ''),
+            post_topic.get('answer_summary', ''),
+            ' '.join(post_topic.get('keywords', []))
+        ])
+    
+    def build_query_weights(self, processed_question: Dict[str, Any],
+                            snapshot: Optional[KnowledgeSnapshot] = None) -> Dict[str, float]:
+        """Turn extracted keywords and question terms into weighted query tokens"""
+        query_weights: Dict[str, float] = {}
         
-        # Search enhanced course content
-        for content in self.enhanced_course_content:
-            relevance_score = 0
-            
-            # Check keywords in content
-            content_text = (content.get('content', '') + ' ' + 
-                          ' '.join(content.get('keywords', []))).lower()
-            
-            for keyword in keywords:
-                if keyword.lower() in content_text:
-                    relevance_score += 2
-            
-            # Check question terms
-            question_terms = question_lower.split()
-            for term in question_terms:
-                if len(term) > 3 and term in content_text:
-                    relevance_score += 1
-            
-            if relevance_score > 0:
-                relevant_content.append({
-                    'type': 'course_content',
-                    'data': content,
-                    'relevance': relevance_score
-                })
-        
-        # Search enhanced discourse posts
-        for post_topic in self.enhanced_discourse_posts:
-            relevance_score = 0
-            
-            # Check title and summary
-            title_text = post_topic.get('title', '').lower()
-            summary_text = post_topic.get('answer_summary', '').lower()
-            keywords_text = ' '.join(post_topic.get('keywords', [])).lower()
-            
-            search_text = f"{title_text} {summary_text} {keywords_text}"
-            
-            for keyword in keywords:
-                if keyword.lower() in search_text:
-                    relevance_score += 2
-            
-            for term in question_lower.split():
-                if len(term) > 3 and term in search_text:
-                    relevance_score += 1
-            
-            if relevance_score > 0:
-                relevant_content.append({
-                    'type': 'discourse',
-                    'data': post_topic,
-                    'relevance': relevance_score
-                })
+        # Extracted keywords count double, as they did in the linear scan
+        for keyword in processed_question['keywords']:
+            for token in tokenize(keyword):
+                query_weights[token] = query_weights.get(token, 0.0) + 2.0
+        
+        for term in tokenize(processed_question['cleaned_question']):
+            if len(term) > 3:
+                query_weights[term] = query_weights.get(term, 0.0) + 1.0
         
-        # Sort by relevance
-        relevant_content.sort(key=lambda x: x['relevance'], reverse=True)
-        return relevant_content[:3]  # Top 3 most relevant
+        # Terms the corpus has never seen are probably typos: search their closest spelling too
+        snapshot = snapshot or self.snapshot
+        vocabulary = snapshot.term_vocabulary
+        unknown_terms = [term for term in query_weights if not self.has_term(term, snapshot)]
+        if unknown_terms and vocabulary is not None:
+            for term in unknown_terms:
+                correction = vocabulary.correct(term)
+                if correction is not None:
+                    query_weights[correction] = query_weights.get(correction, 0.0) + CORRECTED_TERM_WEIGHT * query_weights[term]
+        
+        return query_weights
+    
+    def has_term(self, term: str, snapshot: Optional[KnowledgeSnapshot] = None) -> bool:
+        """Whether any document or passage in the snapshot contains term"""
+        snapshot = snapshot or self.snapshot
+        if term in snapshot.search_index.postings:
+            return True
+        return snapshot.passage_index is not None and term in snapshot.passage_index.postings
+    
+    def build_term_vocabulary(self, search_index: BM25Index,
+                              passage_index: Optional[PassageIndex]) -> FuzzyVocabulary:
+        """
+        Typo index over an index's terms, weighted by document frequency
+        
+        Built with every snapshot, so no request waits for it. Terms added
+        later by live ingests aren't in it until the next reload.
+        """
+        postings = search_index.postings
+        frequencies = {term: len(postings.get(term, ())) for term in postings}
+        if passage_index is not None:
+            for term in passage_index.postings:
+                frequencies.setdefault(term, 0)
+        return FuzzyVocabulary(frequencies, frequencies)
+    
+    def search_enhanced_content(self, processed_question: Dict[str, Any],
+                                snapshot: Optional[KnowledgeSnapshot] = None) -> List[Dict[str, Any]]:
+        """Search enhanced content sources"""
+        snapshot = snapshot or self.snapshot
+        with timed_stage('search'):
+            query_weights = self.build_query_weights(processed_question, snapshot)
+            return self.rank_with_passages(snapshot, query_weights, self.top_k_for(processed_question))
+    
+    def rank_with_passages(self, snapshot: KnowledgeSnapshot, query_weights: Dict[str, float],
+                           top_k: int) -> List[Dict[str, Any]]:
+        """Top documents with each topic boosted by its best passage, attaching that passage as the snippet"""
+        if self.sharded_search is not None and self.sharded_search.serves(snapshot):
+            results = self.sharded_search.search(query_weights, top_k)
+            if results is not None:
+                return results
+        return self.rank_local(snapshot, query_weights, top_k)
+    
+    def rank_local(self, snapshot: KnowledgeSnapshot, query_weights: Dict[str, float],
+                   top_k: int) -> List[Dict[str, Any]]:
+        """rank_with_passages() on this process's copy of the index"""
+        ranked, best_passages = passage_boosted_top_k(snapshot.search_index, snapshot.passage_index, query_weights, top_k)
+        return attach_passages(snapshot.search_index.results(ranked), best_passages, snapshot.passage_index)
+    
+    def rank_local_batch(self, snapshot: KnowledgeSnapshot,
+                         queries: List[Tuple[Dict[str, float], int]]) -> List[List[Dict[str, Any]]]:
+        """rank_local() for a batch, fetching each distinct term's postings once"""
+        if not queries:
+            return []
+        return [
+            attach_passages(snapshot.search_index.results(ranked), best_passages, snapshot.passage_index)
+            for ranked, best_passages in passage_boosted_top_k_batch(snapshot.search_index, snapshot.passage_index, queries)
+        ]
     
     def generate_contextual_answer(self, processed_question: Dict[str, Any], relevant_content: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate answer from relevant content"""
@@ -330,46 +464,139 @@ class AnswerGenerator:
         links = []
         
         for content_item in relevant_content:
-            if content_item['type'] == 'course_content':
-                course_data = content_item['data']
-                answer_parts.append(course_data.get('content', ''))
-                links.append({
-                    'url': course_data.get('url', ''),
-                    'title': course_data.get('title', 'TDS Course Content')
-                })
-            
-            elif content_item['type'] == 'discourse':
-                discourse_data = content_item['data']
-                if discourse_data.get('answer_summary'):
-                    answer_parts.append(discourse_data['answer_summary'])
-                links.append({
-                    'url': discourse_data.get('url', ''),
-                    'title': discourse_data.get('title', 'Discourse Discussion')
-                })
+            answer_part, link = self.describe_content_item(content_item)
+            if answer_part is not None:
+                answer_parts.append(answer_part)
+            if link is not None:
+                links.append(link)
         
         # Combine answer
         if answer_parts:
-            answer = "Based on the TDS course materials and discussions: " + " ".join(answer_parts[:2])
+            answer = CONTEXTUAL_ANSWER_PREFIX + " ".join(answer_parts[:2])
         else:
-            answer = "I found relevant discussions about your question. Please check the linked resources for detailed information."
+            answer = NO_SUMMARY_ANSWER
         
         return {
-            'answer': answer[:500] + "..." if len(answer) > 500 else answer,
-            'links': links[:3]
+            'answer': answer[:MAX_ANSWER_LENGTH] + "..." if len(answer) > MAX_ANSWER_LENGTH else answer,
+            'links': links,
+            'context': self.synthesis_context(relevant_content)
         }
     
+    def synthesis_context(self, relevant_content: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Title, URL and text of each search result, for LLM synthesis"""
+        context = []
+        for content_item in relevant_content:
+            data = content_item['data']
+            if content_item['type'] == 'course_content':
+                text = data.get('content', '')
+            else:
+                # Summary plus the best-matching reply, not the whole (possibly huge) thread
+                passage = content_item.get('passage')
+                parts = [data.get('answer_summary', '')]
+                if passage:
+                    parts.append(f"{passage['username']}: {passage['text']}")
+                text = ' '.join(part for part in parts if part)
+            context.append({'title': data.get('title', ''), 'url': data.get('url', ''), 'text': text})
+        return context
+    
+    def describe_content_item(self, content_item: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+        """Answer text (None if there is none) and link for one search result"""
+        if content_item['type'] == 'course_content':
+            course_data = content_item['data']
+            return course_data.get('content', ''), {
+                'url': course_data.get('url', ''),
+                'title': course_data.get('title', 'TDS Course Content')
+            }
+        
+        if content_item['type'] == 'discourse':
+            discourse_data = content_item['data']
+            # The best-matching reply passage, else the topic's summary
+            passage = content_item.get('passage')
+            snippet = passage['text'] if passage else discourse_data.get('answer_summary')
+            return snippet or None, {
+                'url': discourse_data.get('url', ''),
+                'title': discourse_data.get('title', 'Discourse Discussion')
+            }
+        
+        return None, None
+    
+    def generate_answer_stream(self, processed_question: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield the answer as events while it is being produced
+        
+        Events are {'type': 'link', 'url', 'title'} and {'type': 'answer',
+        'text'} fragments, then {'type': 'done', 'answer_data'} with what
+        generate_answer returns; the fragments concatenate to its answer.
+        Predefined and semantic cache answers are checked first, as there.
+        """
+        snapshot = self.snapshot
+        
+        answer_data = self.find_predefined_answer(processed_question)
+        if answer_data is not None:
+            ANSWERS_BY_PATH.inc('predefined')
+            yield from self.stream_answer_data(answer_data)
+            return
+        
+        answer_data, question_vector = self.lookup_semantic_cache(processed_question, snapshot)
+        if answer_data is not None:
+            ANSWERS_BY_PATH.inc('semantic_cache')
+            yield from self.stream_answer_data(answer_data)
+            return
+        
+        relevant_content = self.search_enhanced_content(processed_question, snapshot)
+        if not relevant_content:
+            ANSWERS_BY_PATH.inc('fallback')
+            yield from self.stream_answer_data(self.generate_fallback_answer(processed_question))
+            return
+        
+        ANSWERS_BY_PATH.inc('contextual')
+        for event in self.stream_contextual_answer(relevant_content):
+            if event['type'] == 'done':
+                self.store_semantic_cache(processed_question, snapshot, question_vector, event['answer_data'])
+            yield event
+    
+    def stream_answer_data(self, answer_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Events for an answer that is already complete"""
+        for link in answer_data['links']:
+            yield dict(link, type='link')
+        yield {'type': 'answer', 'text': answer_data['answer']}
+        yield {'type': 'done', 'answer_data': answer_data}
+    
+    def stream_contextual_answer(self, relevant_content: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Incremental generate_contextual_answer that stops at the length limit"""
+        fragments = []
+        links = []
+        parts_used = 0
+        length = 0
+        truncated = False
+        
+        for content_item in relevant_content:
+            answer_part, link = self.describe_content_item(content_item)
+            if link is not None:
+                links.append(link)
+                yield dict(link, type='link')
+            
+            if answer_part is None or parts_used >= 2 or truncated:
+                continue
+            
+            text = (CONTEXTUAL_ANSWER_PREFIX if parts_used == 0 else " ") + answer_part
+            parts_used += 1
+            if length + len(text) > MAX_ANSWER_LENGTH:
+                text = text[:MAX_ANSWER_LENGTH - length] + "..."
+                truncated = True
+            length += len(text)
+            fragments.append(text)
+            yield {'type': 'answer', 'text': text}
+        
+        if not fragments:
+            fragments.append(NO_SUMMARY_ANSWER)
+            yield {'type': 'answer', 'text': NO_SUMMARY_ANSWER}
+        
+        yield {'type': 'done', 'answer_data': {
+            'answer': ''.join(fragments),
+            'links': links,
+            'context': self.synthesis_context(relevant_content)
+        }}
+    
     def generate_fallback_answer(self, processed_question: Dict[str, Any]) -> Dict[str, Any]:
         """Enhanced fallback with comprehensive knowledge"""
-        return {
-            'answer': "I don't have specific information about this question in my current knowledge base. Please check the official TDS course materials at https://tds.s-anand.net/ or ask on the Discourse forum for community assistance.",
-            'links': [
-                {
-                    'url': 'https://tds.s-anand.net',
-                    'title': 'Official TDS Course Materials'
-                },
-                {
-                    'url': 'https://discourse.onlinedegree.iitm.ac.in',
-                    'title': 'TDS Discourse Forum'
-                }
-            ]
-        }
+        return FALLBACK_ANSWER
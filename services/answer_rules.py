@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from services.answer_encoding import with_encoding
+from services.question_matcher import QuestionMatcher
+
+
+DEFAULT_RULES_PATH = os.path.join('data', 'predefined_answers.json')
+
+
+class AnswerRuleBook:
+    """
+    Predefined answers and the phrase rules that select them, loaded from a
+    JSON data file.
+
+    Each rule has a 'category.name' key, a priority (higher is checked
+    first, file order breaks ties), a 'match_all' list of phrase groups that
+    must each have at least one phrase in the question, and the answer with
+    its links. Once started, a watcher thread re-reads the file when its
+    modification time changes, checking once per reload interval, so FAQs
+    can be edited without a deploy. Requests only read the current rules;
+    parsing and recompiling never happen on the request path.
+    """
+
+    def __init__(self, filepath: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.filepath = filepath or os.getenv('PREDEFINED_ANSWERS_PATH', DEFAULT_RULES_PATH)
+        if reload_interval is None:
+            reload_interval = float(os.getenv('PREDEFINED_ANSWERS_RELOAD_INTERVAL', 5))
+        self.reload_interval = reload_interval
+
+        self.rules: List[Tuple[str, List[List[str]]]] = []
+        self.answers: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.matcher = QuestionMatcher([], classification_rules=[], answer_rules=[])
+        self.version = 0
+        self.loaded_mtime: Optional[float] = None
+        self.listeners: List[Callable[[], None]] = []
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.reload()
+
+    def load(self) -> Tuple[List[Tuple[str, List[List[str]]]], Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        Parse and validate the rules file into (rules, answers)
+        """
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = []
+        for position, rule in enumerate(data.get('rules', [])):
+            key = rule['key']
+            if '.' not in key:
+                raise ValueError(f"Rule key '{key}' must look like 'category.name'")
+            groups = [[phrase.lower() for phrase in group] for group in rule['match_all']]
+            if not groups or not all(groups):
+                raise ValueError(f"Rule '{key}' needs at least one non-empty phrase group")
+            entries.append((-rule.get('priority', 0), position, key, groups, rule))
+
+        entries.sort(key=lambda entry: entry[:2])
+
+        rules = []
+        answers: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for _, _, key, groups, rule in entries:
+            category, name = key.split('.', 1)
+            rules.append((key, groups))
+            # Serialized once here; serving a canned answer is a dictionary lookup
+            answers.setdefault(category, {})[name] = with_encoding({
+                'answer': rule['answer'],
+                'links': rule.get('links', [])
+            })
+
+        return rules, answers
+
+    def reload(self) -> bool:
+        """
+        Re-read the rules file; the previous rules stay active on error
+        """
+        try:
+            mtime = os.path.getmtime(self.filepath)
+            rules, answers = self.load()
+            matcher = QuestionMatcher([], classification_rules=[], answer_rules=rules)
+        except Exception as e:
+            print(f"Error loading predefined answers: {e}")
+            return False
+
+        self.rules, self.answers, self.matcher = rules, answers, matcher
+        self.loaded_mtime = mtime
+
+        for listener in self.listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Error rebuilding after predefined answers reload: {e}")
+        # Bumped last, so cache keys only change once derived matchers are in place
+        self.version += 1
+        return True
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Call listener after every reload (on the watcher thread), to rebuild
+        state derived from the rules
+        """
+        self.listeners.append(listener)
+
+    def start(self) -> None:
+        """
+        Start the watcher thread (no-op if the reload interval is 0)
+        """
+        if self.reload_interval <= 0 or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, name='answer-rules-watcher', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.reload_interval):
+            self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload if the file's modification time changed
+        """
+        try:
+            mtime = os.path.getmtime(self.filepath)
+        except OSError:
+            return False
+
+        if mtime == self.loaded_mtime:
+            return False
+        return self.reload()
+
+    def lookup(self, answer_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a 'category.name' key to its answer
+        """
+        if not answer_key:
+            return None
+
+        category, name = answer_key.split('.', 1)
+        return self.answers.get(category, {}).get(name)
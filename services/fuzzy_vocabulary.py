@@ -0,0 +1,179 @@
+import os
+from functools import lru_cache
+from typing import Any, List, Dict, Iterable, Optional, Set, Tuple
+
+
+DEFAULT_WORDLIST_PATH = 'data/english_words.txt'
+# Shortest word that is ever corrected; shorter typos are too ambiguous ("see" vs "sep")
+MIN_CORRECTION_LENGTH = 4
+# Corrections must keep this share of the word's letters (one edit per four letters)
+MIN_SIMILARITY = 0.75
+# Most edits ever allowed, however long the word
+MAX_DISTANCE = 2
+# Letters of a word whose deletions are indexed; longer words are told apart by edit distance
+PREFIX_LENGTH = 7
+# Suffixes stripped to find the base form of a regular inflection in the wordlist
+INFLECTION_SUFFIXES = ('s', 'es', 'ed', 'ing', 'ly')
+
+
+def deletions(word: str, depth: int) -> Set[str]:
+    """
+    The word's first letter followed by every string left after deleting
+    up to depth letters from the rest of its first PREFIX_LENGTH letters
+    """
+    head, tail = word[0], word[1:PREFIX_LENGTH]
+    found = {tail}
+    frontier = {tail}
+    for _ in range(depth):
+        frontier = {text[:position] + text[position + 1:] for text in frontier for position in range(len(text))}
+        found |= frontier
+    return {head + text for text in found}
+
+
+def edit_distance(source: str, target: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions
+    and adjacent transpositions), or limit + 1 once it must exceed limit
+    """
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class Wordlist:
+    """
+    Correctly spelled general-English words, so ordinary words that happen
+    to be close to a keyword ("rose" and "roe") are never corrected.
+    Regular inflections of listed words count as listed.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = frozenset(words)
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'Wordlist':
+        """One word per line; '#' starts a comment line"""
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return cls(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
+        except OSError as e:
+            print(f"Error loading wordlist {filepath}: {e}")
+            return cls(())
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        if word in self.words:
+            return True
+        for suffix in INFLECTION_SUFFIXES:
+            if word.endswith(suffix) and len(word) > len(suffix) + 2:
+                stem = word[:-len(suffix)]
+                if stem in self.words:
+                    return True
+                # "used" -> "use", "making" -> "make", "stopped" -> "stop"
+                if suffix in ('ed', 'ing') and (stem + 'e' in self.words or
+                                                (stem[-1] == stem[-2] and stem[:-1] in self.words)):
+                    return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def english_words() -> Wordlist:
+    """The shared general-English wordlist (ENGLISH_WORDLIST_PATH overrides the file)"""
+    return Wordlist.from_file(os.getenv('ENGLISH_WORDLIST_PATH', DEFAULT_WORDLIST_PATH))
+
+
+class FuzzyVocabulary:
+    """
+    Symmetric-delete (SymSpell) dictionary over a vocabulary for correcting
+    misspelled words.
+
+    Every word is stored under each string left after deleting up to two
+    of its letters (the first letter is kept, since typos rarely hit it,
+    and only the first PREFIX_LENGTH letters are used). A word within two
+    edits of a typo shares at least one such deletion with it, so a lookup
+    generates the typo's deletions, reads those entries and confirms the
+    few words found with a bounded edit distance. The work depends on the
+    typo's length, not on the vocabulary size; the price is memory and
+    build time, both linear in the vocabulary (see
+    benchmarks/bench_spelling.py).
+    """
+
+    def __init__(self, words: Iterable[str], frequencies: Optional[Dict[str, int]] = None,
+                 min_length: int = MIN_CORRECTION_LENGTH):
+        self.min_length = min_length
+        self.words: List[str] = sorted({word for word in words if len(word) >= min_length and word.isalpha()})
+        self.word_ids: Dict[str, int] = {word: word_id for word_id, word in enumerate(self.words)}
+        self.frequencies = frequencies or {}
+
+        # Deletion -> word id, or list of word ids once several words share it
+        self.deletions: Dict[str, Any] = {}
+        for word_id, word in enumerate(self.words):
+            # Deep enough for the budget of a typo up to MAX_DISTANCE letters longer
+            depth = self.max_distance(word + '?' * MAX_DISTANCE)
+            for deletion in deletions(word, depth):
+                entry = self.deletions.get(deletion)
+                if entry is None:
+                    self.deletions[deletion] = word_id
+                elif isinstance(entry, int):
+                    self.deletions[deletion] = [entry, word_id]
+                else:
+                    entry.append(word_id)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.word_ids
+
+    @staticmethod
+    def max_distance(word: str) -> int:
+        """Edits allowed for a word while keeping MIN_SIMILARITY, at most MAX_DISTANCE"""
+        return min(MAX_DISTANCE, int(len(word) * (1 - MIN_SIMILARITY)))
+
+    def candidates(self, word: str) -> List[Tuple[str, int]]:
+        """(vocabulary word, distance) pairs with the same first letter within the word's edit budget"""
+        limit = self.max_distance(word)
+        seen = set()
+        matches = []
+        for deletion in deletions(word, limit):
+            entry = self.deletions.get(deletion)
+            if entry is None:
+                continue
+            for word_id in ((entry,) if isinstance(entry, int) else entry):
+                if word_id in seen:
+                    continue
+                seen.add(word_id)
+                candidate = self.words[word_id]
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    matches.append((candidate, distance))
+        return matches
+
+    def correct(self, word: str) -> Optional[str]:
+        """
+        Closest vocabulary word for an unknown word (ties go to the more
+        frequent word), or None if the word is known (to this vocabulary or
+        as an English word), too short or has no close match. Typos rarely
+        hit the first letter, so it must agree.
+        """
+        if len(word) < self.min_length or not word.isalpha() or word in self.word_ids or word in english_words():
+            return None
+        matches = self.candidates(word)
+        if not matches:
+            return None
+        return min(matches, key=lambda match: (match[1], -self.frequencies.get(match[0], 0), match[0]))[0]
@@ -0,0 +1,192 @@
+import binascii
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+
+# Base64 characters decoded per step; a multiple of 4 so chunks decode independently
+CHUNK_CHARS = 64 * 1024
+WHITESPACE = ' \t\r\n'
+WHITESPACE_BYTES = WHITESPACE.encode('ascii')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic), which carry the dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+class ImageTooLarge(ValueError):
+    """
+    Raised when a decoded image would exceed the configured maximum size
+    """
+
+
+def payload_start(image_b64: str) -> int:
+    """Offset of the base64 payload, skipping a data: URL prefix"""
+    if image_b64.startswith('data:'):
+        return image_b64.find(',') + 1
+    return 0
+
+
+def decoded_size(image_b64: str) -> int:
+    """
+    Bytes the base64 string decodes to, computed from its length without
+    decoding anything (whitespace and padding excluded)
+    """
+    start = payload_start(image_b64)
+    length = len(image_b64) - start
+    for char in WHITESPACE:
+        # find() is a memchr scan, much faster than count() when there is none
+        if image_b64.find(char, start) != -1:
+            length -= image_b64.count(char, start)
+
+    padding = 0
+    position = len(image_b64) - 1
+    while position >= start and padding < 2:
+        char = image_b64[position]
+        if char == '=':
+            padding += 1
+        elif char not in WHITESPACE:
+            break
+        position -= 1
+    return max(0, length * 3 // 4 - padding)
+
+
+class Base64Reader:
+    """
+    Decodes a base64 string a chunk at a time, so only the bytes asked for
+    (plus at most one chunk) are ever held in memory
+    """
+
+    def __init__(self, image_b64: str):
+        self.source = image_b64
+        self.position = payload_start(image_b64)
+        self.carry = b''  # Characters left over from a chunk that wasn't a multiple of 4
+        self.buffer = b''
+        self.offset = 0  # Bytes of the buffer already consumed
+
+    @property
+    def buffered(self) -> int:
+        return len(self.buffer) - self.offset
+
+    def fill(self) -> bool:
+        """Decode the next chunk into the buffer; False at the end of the input"""
+        if self.position >= len(self.source):
+            if not self.carry:
+                return False
+            # Unpadded tail
+            chunk, self.carry = self.carry + b'=' * (-len(self.carry) % 4), b''
+        else:
+            text = self.source[self.position:self.position + CHUNK_CHARS]
+            self.position += len(text)
+            chunk = self.carry + text.encode('ascii').translate(None, WHITESPACE_BYTES)
+            usable = len(chunk) - len(chunk) % 4
+            chunk, self.carry = chunk[:usable], chunk[usable:]
+        self.buffer = self.buffer[self.offset:] + binascii.a2b_base64(chunk)
+        self.offset = 0
+        return True
+
+    def read(self, size: int) -> bytes:
+        """Up to size bytes; fewer only at the end of the input"""
+        while self.buffered < size and self.fill():
+            pass
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+    def unread(self, data: bytes) -> None:
+        """Put bytes back in front of the stream"""
+        self.buffer = data + self.buffer[self.offset:]
+        self.offset = 0
+
+    def skip(self, size: int) -> bool:
+        """Discard size bytes a chunk at a time; False if the input ends first"""
+        while size > 0:
+            if not self.buffered and not self.fill():
+                return False
+            skipped = min(size, self.buffered)
+            self.offset += skipped
+            size -= skipped
+        return True
+
+
+def png_dimensions(reader: Base64Reader, head: bytes) -> Optional[Tuple[int, int]]:
+    """Width and height from the IHDR chunk that must follow the signature"""
+    head += reader.read(24 - len(head))
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', head[16:24])
+
+
+def webp_dimensions(reader: Base64Reader, head: bytes) -> Optional[Tuple[int, int]]:
+    """Width and height from the first chunk header of a lossy, lossless or extended WebP"""
+    head += reader.read(30 - len(head))
+    if len(head) < 30:
+        return None
+    chunk_type = head[12:16]
+    if chunk_type == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk_type == b'VP8L' and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk_type == b'VP8X':
+        return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    return None
+
+
+def jpeg_dimensions(reader: Base64Reader, head: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Width and height from the first start-of-frame segment, skipping over
+    the segments before it (EXIF, ICC profiles, tables) without keeping them
+    """
+    reader.unread(head[2:])
+    pending = b''
+    while True:
+        marker = pending + reader.read(2 - len(pending))
+        pending = b''
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # Fill byte before the real marker
+            pending = marker[1:]
+            continue
+        if code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code in (0xD9, 0xDA):  # End of image or start of scan before any frame header
+            return None
+
+        length_bytes = reader.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if length < 2:
+            return None
+        if code in JPEG_SOF_MARKERS:
+            frame = reader.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+        if not reader.skip(length - 2):
+            return None
+
+
+def sniff_image(image_b64: str) -> Dict[str, Any]:
+    """
+    Format and pixel dimensions from the PNG, JPEG or WebP header, decoding
+    only the header bytes
+    """
+    reader = Base64Reader(image_b64)
+    head = reader.read(12)
+
+    image_format, dimensions = 'unknown', None
+    if head.startswith(PNG_SIGNATURE):
+        image_format, dimensions = 'png', png_dimensions(reader, head)
+    elif head.startswith(b'\xff\xd8'):
+        image_format, dimensions = 'jpeg', jpeg_dimensions(reader, head)
+    elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        image_format, dimensions = 'webp', webp_dimensions(reader, head)
+
+    width, height = dimensions if dimensions is not None else (None, None)
+    return {'format': image_format, 'width': width, 'height': height}
@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+from services.fuzzy_vocabulary import FuzzyVocabulary
+from services.passage_index import PassageIndex
+from services.search_index import BM25Index
+
+
+# Files the knowledge base is loaded from; scraped data takes precedence
+KNOWLEDGE_SOURCES = [
+    os.path.join('scraped_data', 'enhanced_course_content.json'),
+    os.path.join('data', 'course_content.json'),
+    os.path.join('scraped_data', 'enhanced_discourse_posts.json'),
+    os.path.join('data', 'discourse_posts.json'),
+    os.path.join('scraped_data', 'comprehensive_tds_knowledge.json'),
+]
+
+
+def source_signature(paths: List[str] = KNOWLEDGE_SOURCES) -> Tuple:
+    """
+    (path, mtime, size) for each source file that exists, used to detect changes
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class KnowledgeSnapshot:
+    """
+    One fully built, read-only version of the knowledge base.
+
+    A request reads the snapshot reference once and keeps using it, so a
+    reload that swaps in a newer snapshot never changes data mid-request.
+    Nothing changes a snapshot once it is published: live ingests apply
+    to a copy (see copy()) and publish it under the next version.
+    """
+
+    __slots__ = ('version', 'course_content', 'discourse_posts', 'comprehensive_knowledge',
+                 'search_index', 'passage_index', 'signature', 'built_at', 'build_seconds', 'source',
+                 'ingest_signature', 'term_vocabulary')
+
+    def __init__(self,
+                 version: int,
+                 course_content: Sequence[Dict[str, Any]],
+                 discourse_posts: Sequence[Dict[str, Any]],
+                 comprehensive_knowledge: Dict[str, Any],
+                 search_index: BM25Index,
+                 signature: Tuple,
+                 build_seconds: float,
+                 source: str = 'json',
+                 passage_index: Optional[PassageIndex] = None,
+                 ingest_signature: Tuple = (),
+                 term_vocabulary: Optional[FuzzyVocabulary] = None):
+        self.version = version
+        # Freeze JSON-loaded lists; compiled snapshots are already read-only views
+        self.course_content = tuple(course_content) if isinstance(course_content, list) else course_content
+        self.discourse_posts = tuple(discourse_posts) if isinstance(discourse_posts, list) else discourse_posts
+        self.comprehensive_knowledge = comprehensive_knowledge
+        self.search_index = search_index
+        self.passage_index = passage_index
+        self.signature = signature
+        self.built_at = datetime.now(timezone.utc)
+        self.build_seconds = build_seconds
+        self.source = source
+        # Signature of the ingest log already folded in at compile time (() if none)
+        self.ingest_signature = ingest_signature
+        # Typo index over the indexed terms (None: query terms aren't corrected)
+        self.term_vocabulary = term_vocabulary
+
+    def copy(self, version: int) -> 'KnowledgeSnapshot':
+        """
+        An unpublished copy to apply changes to. The indexes are shallow
+        copies sharing this snapshot's posting dicts, so changes to them
+        must be made with copy_on_write.
+        """
+        started = time.perf_counter()
+        search_index = self.search_index.copy()
+        passage_index = self.passage_index.copy() if self.passage_index is not None else None
+        return KnowledgeSnapshot(
+            version=version,
+            course_content=self.course_content,
+            discourse_posts=self.discourse_posts,
+            comprehensive_knowledge=self.comprehensive_knowledge,
+            search_index=search_index,
+            signature=self.signature,
+            build_seconds=time.perf_counter() - started,
+            source=self.source,
+            passage_index=passage_index,
+            ingest_signature=self.ingest_signature,
+            term_vocabulary=self.term_vocabulary
+        )
+
+    @classmethod
+    def empty(cls) -> 'KnowledgeSnapshot':
+        """
+        Version 0 placeholder with nothing indexed, active until the first
+        real snapshot is loaded
+        """
+        return cls(
+            version=0,
+            course_content=[],
+            discourse_posts=[],
+            comprehensive_knowledge={},
+            search_index=BM25Index(),
+            signature=(),
+            build_seconds=0.0,
+            source='pending',
+            passage_index=PassageIndex()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'source': self.source,
+            'built_at': self.built_at.isoformat(),
+            'build_seconds': round(self.build_seconds, 4),
+            'indexed_documents': len(self.search_index),
+            'indexed_terms': len(self.search_index.postings),
+            'indexed_passages': len(self.passage_index) if self.passage_index is not None else 0
+        }
+
+
+class KnowledgeReloader:
+    """
+    Background thread that rebuilds the knowledge base when source files change
+    """
+
+    def __init__(self, answer_generator, interval: float = 30.0):
+        self.answer_generator = answer_generator
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, name='knowledge-reloader', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                if self.answer_generator.knowledge_changed():
+                    self.answer_generator.reload_knowledge()
+            except Exception as e:
+                print(f"Error reloading knowledge base: {e}")
+
+
+class KnowledgeLoader:
+    """
+    Loads the first knowledge snapshot, either before the server starts or
+    (lazy) on a background thread so it binds and answers liveness probes
+    straight away. on_ready runs once the snapshot is in place.
+    """
+
+    def __init__(self, load: Callable[[], None], on_ready: Callable[[], None], lazy: bool = False):
+        self.load_func = load
+        self.on_ready = on_ready
+        self.lazy = lazy
+        self.ready_event = threading.Event()
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_event.is_set()
+
+    def load(self) -> None:
+        started = time.perf_counter()
+        self.load_func()
+        self.load_seconds = time.perf_counter() - started
+        self.ready_event.set()
+
+    def start(self) -> None:
+        """Run on_ready now if loaded, otherwise load in the background first"""
+        if self.ready:
+            self.on_ready()
+            return
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, name='knowledge-loader', daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error loading knowledge base: {e}")
+            return
+        print(f"Knowledge base loaded in {self.load_seconds:.1f}s")
+        self.on_ready()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'mode': 'lazy' if self.lazy else 'eager',
+            'ready': self.ready,
+            'error': self.error,
+            'load_seconds': round(self.load_seconds, 4) if self.load_seconds is not None else None
+        }
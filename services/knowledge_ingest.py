@@ -0,0 +1,366 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+from services.knowledge_base import KnowledgeSnapshot, source_signature
+
+
+DEFAULT_INGEST_LOG_PATH = os.path.join('data', 'ingest_log.jsonl')
+DISCOURSE_BASE_URL = os.getenv('DISCOURSE_BASE_URL', 'https://discourse.onlinedegree.iitm.ac.in')
+ANSWER_SUMMARY_LENGTH = 300
+TOPIC_FIELDS = ('title', 'url', 'category', 'keywords', 'answer_summary')
+
+
+class IngestError(Exception):
+    """
+    Raised for ingest payloads that cannot be applied
+    """
+
+
+class IngestUnavailable(Exception):
+    """
+    Raised while the index cannot take ingests yet; callers should retry later
+    """
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class IngestLog:
+    """
+    Append-only JSON-lines log of ingested topics and posts
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def from_env(cls) -> 'IngestLog':
+        return cls(os.getenv('INGEST_LOG_PATH', DEFAULT_INGEST_LOG_PATH))
+
+    def signature(self) -> Tuple:
+        """(path, mtime, size) of the log, or () when there is none"""
+        return source_signature([self.path])
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Logged entries in order, skipping lines that don't parse (e.g. a
+        write cut short by a crash)
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable ingest log line {line_number} in {self.path}")
+
+
+def merge_topic(existing: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a topic update on top of the stored topic.
+
+    Fields present in the update replace the stored ones; posts are merged
+    by post id, so replaying an entry twice is harmless. An accepted post
+    becomes the answer summary unless the update sets one explicitly.
+    """
+    topic_id = update['id']
+    topic = dict(existing) if existing else {
+        'id': topic_id,
+        'title': '',
+        'url': f"{DISCOURSE_BASE_URL}/t/{topic_id}",
+        'category': '',
+        'posts': [],
+        'keywords': [],
+        'answer_summary': ''
+    }
+
+    for field in TOPIC_FIELDS:
+        if update.get(field) is not None:
+            topic[field] = update[field]
+
+    posts = list(topic.get('posts', []))
+    positions = {post['id']: position for position, post in enumerate(posts)}
+    for post in update.get('posts', []):
+        stored_post = {
+            'id': post['id'],
+            'username': post.get('username', ''),
+            'content': post.get('content', ''),
+            'created_at': post.get('created_at')
+        }
+        if post['id'] in positions:
+            posts[positions[post['id']]] = stored_post
+        else:
+            positions[post['id']] = len(posts)
+            posts.append(stored_post)
+        if post.get('accepted') and update.get('answer_summary') is None:
+            topic['answer_summary'] = stored_post['content'][:ANSWER_SUMMARY_LENGTH]
+    topic['posts'] = posts
+
+    return topic
+
+
+def indexed_topics(snapshot: KnowledgeSnapshot) -> Tuple[Dict[str, Any], ...]:
+    """
+    The discourse topics of a snapshot's index, ingested ones included, in
+    document order (the order fold_into() produces)
+    """
+    return tuple(document['data'] for document in snapshot.search_index.documents
+                 if document['type'] == 'discourse')
+
+
+def entry_update(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The topic update a log entry describes
+    """
+    if entry.get('op') == 'topic':
+        return entry['topic']
+    if entry.get('op') == 'post':
+        return {'id': entry['topic_id'], 'posts': [entry['post']]}
+    raise IngestError(f"Unknown ingest operation {entry.get('op')!r}")
+
+
+class KnowledgeIngestor:
+    """
+    Applies single-topic and single-post ingests to the live search index.
+
+    An ingest never changes the published snapshot: it copies the snapshot
+    (sharing every posting dict), re-indexes the one discourse document
+    (and its passages) in the copy, touching only the postings of terms
+    that changed, appends the entry to a log and only then publishes the
+    copy under the next version. The log is replayed into every snapshot
+    the answer generator builds, at startup and on reload, so ingested
+    answers survive restarts and re-scrapes.
+    """
+
+    def __init__(self, answer_generator, log_path: Optional[str] = None):
+        self.answer_generator = answer_generator
+        self.log = IngestLog(log_path) if log_path else IngestLog.from_env()
+        self.lock = threading.Lock()
+
+        self.revision = 0
+        self.log_entries = 0
+        self.last_ingest_at: Optional[datetime] = None
+        self.rebuilding = False
+
+        # topic id -> document id, for the snapshot it was computed from
+        self.indexed_snapshot: Optional[KnowledgeSnapshot] = None
+        self.topic_doc_ids: Dict[int, int] = {}
+
+    def attach(self) -> None:
+        """
+        Replay the log into the active snapshot and hook into future reloads
+        """
+        with self.lock:
+            self.answer_generator.ingestor = self
+            self.answer_generator.snapshot = self.prepare(self.answer_generator.snapshot)
+
+    def prepare(self, snapshot: KnowledgeSnapshot) -> KnowledgeSnapshot:
+        """
+        The snapshot with every logged ingest applied; the caller holds self.lock.
+
+        A compiled snapshot that already folds in the current log is used
+        as is and stays memory-mapped. Other compiled snapshots are rebuilt
+        from the JSON sources, since a replay needs a mutable index. A
+        snapshot that is already published is copied first.
+        """
+        if snapshot.search_index.read_only:
+            if snapshot.ingest_signature == self.log.signature():
+                self.log_entries = sum(1 for _ in self.log.entries())
+                return snapshot
+            return self.rebuild_mutable_snapshot(snapshot)
+        if not self.log.signature():
+            self.log_entries = 0
+            return snapshot
+        published = snapshot is self.answer_generator.snapshot
+        if published:
+            snapshot = snapshot.copy(version=snapshot.version + 1)
+        self.replay(snapshot, copy_on_write=published)
+        return snapshot
+
+    def fold_into(self, discourse_posts: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The discourse topics with every logged entry merged in, in the order
+        a replay would index them; for compiling a snapshot that needs none
+        """
+        topics = list(discourse_posts)
+        positions = {topic.get('id'): position for position, topic in enumerate(topics)}
+        for entry in self.log.entries():
+            try:
+                update = entry_update(entry)
+                position = positions.get(update['id'])
+                if position is None and entry['op'] == 'post':
+                    raise IngestError(f"Topic {update['id']} does not exist; ingest the topic first")
+                topic = merge_topic(topics[position] if position is not None else None, update)
+                if position is None:
+                    positions[update['id']] = len(topics)
+                    topics.append(topic)
+                else:
+                    topics[position] = topic
+            except (IngestError, KeyError, TypeError, ValueError) as e:
+                print(f"Skipping ingest log entry: {e}")
+        return topics
+
+    def rebuild_mutable_snapshot(self, snapshot: KnowledgeSnapshot) -> KnowledgeSnapshot:
+        """
+        Compiled snapshots are read-only; rebuild this one from the JSON
+        sources so ingests can be applied. Only runs off the request path:
+        at startup, on a reload or on start_rebuild()'s thread.
+        """
+        print("Live ingest needs a mutable index; loading JSON sources instead of the compiled snapshot")
+        rebuilt = self.answer_generator.build_snapshot(version=snapshot.version + 1, allow_compiled=False)
+        self.replay(rebuilt)
+        return rebuilt
+
+    def start_rebuild(self) -> None:
+        """
+        Replace a read-only compiled snapshot with a mutable one on a
+        background thread; the caller holds self.lock
+        """
+        if self.rebuilding:
+            return
+        self.rebuilding = True
+        threading.Thread(target=self.rebuild, name='ingest-rebuild', daemon=True).start()
+
+    def rebuild(self) -> None:
+        try:
+            if self.answer_generator.reload_knowledge(allow_compiled=False) is None:
+                print("A knowledge reload is already running; the next ingest will retry the rebuild")
+        except Exception as e:
+            print(f"Error rebuilding the knowledge base for live ingest: {e}")
+        finally:
+            self.rebuilding = False
+
+    def replay(self, snapshot: KnowledgeSnapshot, copy_on_write: bool = False) -> int:
+        """
+        Apply every logged entry to an unpublished snapshot; the caller
+        holds self.lock. copy_on_write is needed when the snapshot shares
+        posting dicts with a published one (see KnowledgeSnapshot.copy).
+        """
+        doc_ids = self.doc_ids_for(snapshot)
+        applied = 0
+        for entry in self.log.entries():
+            try:
+                self.apply(snapshot, entry, doc_ids, copy_on_write)
+                applied += 1
+            except (IngestError, KeyError, TypeError, ValueError) as e:
+                print(f"Skipping ingest log entry: {e}")
+        snapshot.discourse_posts = indexed_topics(snapshot)
+        self.log_entries = applied
+        return applied
+
+    def doc_ids_for(self, snapshot: KnowledgeSnapshot) -> Dict[int, int]:
+        if self.indexed_snapshot is not snapshot:
+            self.topic_doc_ids = {
+                document['data'].get('id'): doc_id
+                for doc_id, document in enumerate(snapshot.search_index.documents)
+                if document['type'] == 'discourse' and document['data'].get('id') is not None
+            }
+            self.indexed_snapshot = snapshot
+        return self.topic_doc_ids
+
+    def apply(self, snapshot: KnowledgeSnapshot, entry: Dict[str, Any], doc_ids: Dict[int, int],
+              copy_on_write: bool) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Re-index the one document an entry touches; returns its id and the
+        topic it replaced (None for a new topic)
+        """
+        update = entry_update(entry)
+        index = snapshot.search_index
+        topic_id = update['id']
+        doc_id = doc_ids.get(topic_id)
+        existing = index.documents[doc_id]['data'] if doc_id is not None else None
+        if existing is None and entry['op'] == 'post':
+            raise IngestError(f"Topic {topic_id} does not exist; ingest the topic first")
+
+        topic = merge_topic(existing, update)
+        doc_id = index.upsert_document(
+            doc_id,
+            'discourse',
+            topic,
+            self.answer_generator.discourse_search_text(topic),
+            old_text=self.answer_generator.discourse_search_text(existing) if existing else '',
+            copy_on_write=copy_on_write
+        )
+        if snapshot.passage_index is not None:
+            snapshot.passage_index.replace_topic(doc_id, existing, topic, copy_on_write=copy_on_write)
+        doc_ids[topic_id] = doc_id
+        return doc_id, existing
+
+    def ingest(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply an entry to a copy of the live snapshot, log it, then publish the copy
+
+        A failed write to the log leaves the served snapshot unchanged.
+        Raises IngestUnavailable while a compiled snapshot is being
+        replaced with a mutable one.
+        """
+        received_at = datetime.now(timezone.utc)
+        entry = dict(entry, at=received_at.isoformat())
+        # Stamp undated posts now so replays reproduce the same record
+        posts = entry['topic'].get('posts', []) if entry['op'] == 'topic' else [entry['post']]
+        for post in posts:
+            if not post.get('created_at'):
+                post['created_at'] = entry['at']
+
+        with self.lock:
+            previous = self.answer_generator.snapshot
+            if previous.search_index.read_only:
+                self.start_rebuild()
+                raise IngestUnavailable(
+                    "The compiled knowledge snapshot is being replaced with a mutable index; retry shortly"
+                )
+
+            snapshot = previous.copy(version=previous.version + 1)
+            # Searches may be running on the previous snapshot, so copy touched postings
+            doc_ids = dict(self.doc_ids_for(previous))
+            doc_id, existing = self.apply(snapshot, entry, doc_ids, copy_on_write=True)
+            snapshot.discourse_posts = indexed_topics(snapshot)
+            self.log.append(entry)
+
+            self.publish(previous, snapshot, doc_id, existing)
+            self.indexed_snapshot, self.topic_doc_ids = snapshot, doc_ids
+            self.log_entries += 1
+            self.revision += 1
+            self.last_ingest_at = received_at
+            return {'document_id': doc_id, 'revision': self.revision}
+
+    def publish(self, previous: KnowledgeSnapshot, snapshot: KnowledgeSnapshot, doc_id: int,
+                old_topic: Optional[Dict[str, Any]]) -> None:
+        """Swap in an ingested snapshot, moving search shards along with it"""
+        sharded_search = self.answer_generator.sharded_search
+        # Claimed before the swap, so no search starts a full rebuild in between
+        updating_shards = sharded_search is not None and sharded_search.begin_update(previous)
+        self.answer_generator.snapshot = snapshot
+        if updating_shards:
+            sharded_search.finish_update(snapshot, doc_id, old_topic)
+
+    def ingest_topic(self, topic: Dict[str, Any]) -> Dict[str, Any]:
+        """Create or update a topic (and any posts it carries)"""
+        return dict(self.ingest({'op': 'topic', 'topic': topic}), topic_id=topic['id'])
+
+    def ingest_post(self, topic_id: int, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Append or update one post of an existing topic"""
+        return dict(self.ingest({'op': 'post', 'topic_id': topic_id, 'post': post}), topic_id=topic_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'log_path': self.log.path,
+            'log_entries': self.log_entries,
+            'revision': self.revision,
+            'last_ingest_at': self.last_ingest_at.isoformat() if self.last_ingest_at else None,
+            'rebuilding': self.rebuilding
+        }
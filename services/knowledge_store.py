@@ -0,0 +1,368 @@
+import bisect
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+
+from services.passage_index import PassageIndex, MappedPassageIndex
+from services.search_index import BM25Index
+
+
+# Compiled knowledge base layout (all integers native-endian):
+#   MAGIC | uint32 header length | JSON header | 8-byte aligned sections
+# The header records each section's (offset, length) plus counts, the
+# source file signature the snapshot was compiled from and the byte order.
+MAGIC = b'TDSKB\x00\x00\x01'
+FORMAT_VERSION = 2
+ALIGNMENT = 8
+
+DEFAULT_SNAPSHOT_PATH = os.path.join('data', 'knowledge_base.bin')
+
+
+class SnapshotFormatError(Exception):
+    """
+    Raised when a compiled snapshot is missing, corrupt or incompatible
+    """
+
+
+def _offsets(chunks: List[bytes]) -> array:
+    offsets = array('Q', [0])
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+    return offsets
+
+
+def _posting_sections(prefix: str, postings: Dict[str, Dict[int, int]]) -> List[Tuple[str, bytes]]:
+    """Sorted term table plus CSR-style postings arrays"""
+    terms = sorted(postings)
+    term_chunks = [term.encode('utf-8') for term in terms]
+
+    posting_offsets = array('Q', [0])
+    posting_docs = array('I')
+    posting_tfs = array('I')
+    for term in terms:
+        for doc_id, tf in sorted(postings[term].items()):
+            posting_docs.append(doc_id)
+            posting_tfs.append(tf)
+        posting_offsets.append(len(posting_docs))
+
+    return [
+        (f'{prefix}term_offsets', _offsets(term_chunks).tobytes()),
+        (f'{prefix}term_blob', b''.join(term_chunks)),
+        (f'{prefix}posting_offsets', posting_offsets.tobytes()),
+        (f'{prefix}posting_docs', posting_docs.tobytes()),
+        (f'{prefix}posting_tfs', posting_tfs.tobytes()),
+    ]
+
+
+def write_snapshot_file(path: str,
+                        course_content: Sequence[Dict[str, Any]],
+                        discourse_posts: Sequence[Dict[str, Any]],
+                        comprehensive_knowledge: Dict[str, Any],
+                        search_index: BM25Index,
+                        signature: Tuple,
+                        passage_index: Optional[PassageIndex] = None,
+                        ingest_signature: Tuple = ()) -> Dict[str, Any]:
+    """
+    Serialize a built knowledge base into the compiled snapshot format
+
+    ingest_signature identifies the ingest log already folded into the
+    discourse posts, if any, so loaders know not to replay it.
+    """
+    if passage_index is not None and passage_index.removed:
+        raise ValueError("Passage index has replaced passages; rebuild it before compiling")
+
+    if len(search_index) != len(course_content) + len(discourse_posts):
+        raise ValueError("Search index must cover course content followed by discourse posts")
+
+    doc_types = sorted({document['type'] for document in search_index.documents})
+    type_codes = {doc_type: code for code, doc_type in enumerate(doc_types)}
+
+    doc_chunks = [
+        json.dumps(document['data'], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        for document in search_index.documents
+    ]
+
+    sections = [
+        ('doc_types', array('B', (type_codes[document['type']] for document in search_index.documents)).tobytes()),
+        ('doc_lengths', array('I', search_index.doc_lengths).tobytes()),
+        ('doc_offsets', _offsets(doc_chunks).tobytes()),
+        ('doc_blob', b''.join(doc_chunks)),
+    ]
+    sections.extend(_posting_sections('', search_index.postings))
+    sections.append(('knowledge', json.dumps(comprehensive_knowledge, ensure_ascii=False).encode('utf-8')))
+
+    if passage_index is not None:
+        sections.extend([
+            ('passage_topics', array('I', passage_index.passage_topics).tobytes()),
+            ('passage_posts', array('I', passage_index.passage_posts).tobytes()),
+            ('passage_starts', array('I', passage_index.passage_starts).tobytes()),
+            ('passage_ends', array('I', passage_index.passage_ends).tobytes()),
+            ('passage_lengths', array('I', passage_index.doc_lengths).tobytes()),
+        ])
+        sections.extend(_posting_sections('passage_', passage_index.postings))
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'compiled_at': datetime.now(timezone.utc).isoformat(),
+        'signature': [list(entry) for entry in signature],
+        'ingest_signature': [list(entry) for entry in ingest_signature],
+        'doc_types': doc_types,
+        'course_content_count': len(course_content),
+        'discourse_post_count': len(discourse_posts),
+        'document_count': len(search_index),
+        'term_count': len(search_index.postings),
+        'total_length': search_index.total_length,
+        'k1': search_index.k1,
+        'b': search_index.b,
+        'passages': None if passage_index is None else {
+            'count': len(passage_index),
+            'total_length': passage_index.total_length,
+            'window': passage_index.window,
+            'stride': passage_index.stride,
+            'k1': passage_index.k1,
+            'b': passage_index.b
+        },
+        'sections': {}
+    }
+
+    # Section offsets depend on the header size, which depends on the offsets;
+    # reserve generous space for the digits and pad the header to fit.
+    placeholder = json.dumps(dict(header, sections={name: [10 ** 15, 10 ** 15] for name, _ in sections}))
+    header_space = len(MAGIC) + 4 + len(placeholder.encode('utf-8'))
+    position = header_space + (-header_space) % ALIGNMENT
+    for name, payload in sections:
+        header['sections'][name] = [position, len(payload)]
+        position += len(payload) + (-len(payload)) % ALIGNMENT
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (len(placeholder.encode('utf-8')) - len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, 'little'))
+        f.write(header_bytes)
+        for name, payload in sections:
+            offset = header['sections'][name][0]
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(payload)
+    os.replace(tmp_path, path)
+
+    return header
+
+
+class _BlobTable(Sequence):
+    """
+    Read-only sequence of variable-length byte strings backed by the mapping
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview, start: int = 0, stop: Optional[int] = None):
+        self.offsets = offsets
+        self.blob = blob
+        self.start = start
+        self.stop = len(offsets) - 1 if stop is None else stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def raw(self, index: int) -> memoryview:
+        position = self.start + index
+        return self.blob[self.offsets[position]:self.offsets[position + 1]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.decode(self.raw(index))
+
+    def decode(self, raw: memoryview):
+        return bytes(raw).decode('utf-8')
+
+
+class _DocumentTable(_BlobTable):
+    """Documents decoded from JSON on access"""
+
+    def decode(self, raw: memoryview):
+        return json.loads(bytes(raw))
+
+
+class _IndexedDocuments(Sequence):
+    """The {'type', 'data'} view BM25Index expects, decoded lazily"""
+
+    def __init__(self, types: memoryview, type_names: List[str], table: _DocumentTable):
+        self.types = types
+        self.type_names = type_names
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, doc_id: int) -> Dict[str, Any]:
+        return {'type': self.type_names[self.types[doc_id]], 'data': self.table[doc_id]}
+
+
+class _PostingList:
+    """Postings for one term as parallel doc id / term frequency arrays"""
+
+    __slots__ = ('doc_ids', 'tfs')
+
+    def __init__(self, doc_ids: memoryview, tfs: memoryview):
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.doc_ids, self.tfs)
+
+
+class _MappedPostings:
+    """Term -> postings lookup by binary search over the sorted term table"""
+
+    def __init__(self, terms: _BlobTable, offsets: memoryview, doc_ids: memoryview, tfs: memoryview):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def term_id(self, term: str) -> int:
+        position = bisect.bisect_left(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            return position
+        return -1
+
+    def __contains__(self, term: str) -> bool:
+        return self.term_id(term) >= 0
+
+    def get(self, term: str, default=None):
+        term_id = self.term_id(term)
+        if term_id < 0:
+            return default
+        start, stop = self.offsets[term_id], self.offsets[term_id + 1]
+        return _PostingList(self.doc_ids[start:stop], self.tfs[start:stop])
+
+    def __getitem__(self, term: str) -> _PostingList:
+        postings = self.get(term)
+        if postings is None:
+            raise KeyError(term)
+        return postings
+
+
+class MappedBM25Index(BM25Index):
+    """
+    BM25Index whose documents and postings live in a memory-mapped snapshot.
+
+    Nothing is decoded up front: terms are found by binary search, postings
+    are zero-copy array views and documents are parsed only when returned.
+    """
+
+    def __init__(self, documents: _IndexedDocuments, doc_lengths: memoryview, postings: _MappedPostings,
+                 total_length: int, k1: float, b: float):
+        super().__init__(k1=k1, b=b)
+        self.documents = documents
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.total_length = total_length
+
+    read_only = True
+
+    def add_document(self, doc_type: str, data: Dict[str, Any], text: str) -> int:
+        raise TypeError("Compiled snapshots are read-only; recompile to add documents")
+
+    def upsert_document(self, *args, **kwargs) -> int:
+        raise TypeError("Compiled snapshots are read-only; recompile to add documents")
+
+    def copy(self) -> BM25Index:
+        raise TypeError("Compiled snapshots are read-only; load the JSON sources to change them")
+
+
+class CompiledKnowledge:
+    """
+    A memory-mapped compiled snapshot, exposing the same pieces that the
+    JSON loaders produce
+    """
+
+    def __init__(self, path: str):
+        try:
+            with open(path, 'rb') as f:
+                self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotFormatError(f"Cannot map {path}: {e}")
+
+        view = memoryview(self.mapping)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise SnapshotFormatError(f"{path} is not a compiled knowledge snapshot")
+
+        header_length = int.from_bytes(view[len(MAGIC):len(MAGIC) + 4], 'little')
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[header_start:header_start + header_length]))
+
+        if self.header.get('format_version') != FORMAT_VERSION:
+            raise SnapshotFormatError(f"Unsupported snapshot format {self.header.get('format_version')}")
+        if self.header.get('byteorder') != sys.byteorder:
+            raise SnapshotFormatError("Snapshot was compiled on a machine with a different byte order")
+
+        def section(name: str, fmt: str = 'B') -> memoryview:
+            offset, length = self.header['sections'][name]
+            return view[offset:offset + length].cast(fmt)
+
+        n_course = self.header['course_content_count']
+        doc_offsets = section('doc_offsets', 'Q')
+        doc_blob = section('doc_blob')
+
+        self.signature = tuple(tuple(entry) for entry in self.header['signature'])
+        self.ingest_signature = tuple(tuple(entry) for entry in self.header.get('ingest_signature', []))
+        self.course_content = _DocumentTable(doc_offsets, doc_blob, 0, n_course)
+        self.discourse_posts = _DocumentTable(doc_offsets, doc_blob, n_course)
+        self.comprehensive_knowledge = json.loads(bytes(section('knowledge')))
+
+        def mapped_postings(prefix: str) -> _MappedPostings:
+            return _MappedPostings(
+                _BlobTable(section(f'{prefix}term_offsets', 'Q'), section(f'{prefix}term_blob')),
+                section(f'{prefix}posting_offsets', 'Q'),
+                section(f'{prefix}posting_docs', 'I'),
+                section(f'{prefix}posting_tfs', 'I')
+            )
+
+        self.search_index = MappedBM25Index(
+            documents=_IndexedDocuments(section('doc_types'), self.header['doc_types'],
+                                        _DocumentTable(doc_offsets, doc_blob)),
+            doc_lengths=section('doc_lengths', 'I'),
+            postings=mapped_postings(''),
+            total_length=self.header['total_length'],
+            k1=self.header['k1'],
+            b=self.header['b']
+        )
+
+        self.passage_index = None
+        passages = self.header.get('passages')
+        if passages is not None:
+            self.passage_index = MappedPassageIndex(
+                passage_topics=section('passage_topics', 'I'),
+                passage_posts=section('passage_posts', 'I'),
+                passage_starts=section('passage_starts', 'I'),
+                passage_ends=section('passage_ends', 'I'),
+                doc_lengths=section('passage_lengths', 'I'),
+                postings=mapped_postings('passage_'),
+                total_length=passages['total_length'],
+                window=passages['window'],
+                stride=passages['stride'],
+                k1=passages['k1'],
+                b=passages['b']
+            )
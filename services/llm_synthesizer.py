@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+from services.metrics import LLM_SYNTHESIS
+from services.tracing import observe_stage
+
+
+SYSTEM_PROMPT = (
+    "You are a teaching assistant for the Tools in Data Science (TDS) course at IIT Madras. "
+    "Answer the student's question using only the numbered context. Be concise and concrete. "
+    "If the context does not answer the question, say so and point to the most relevant source."
+)
+MAX_CONTEXT_CHARS = 1500
+
+
+class LLMSynthesizer:
+    """
+    Optional answer synthesis over the retrieved context with an
+    OpenAI-compatible chat completions API.
+
+    One pooled async client is shared by all requests. Each call gets the
+    remaining latency budget of its request; callers fall back to the
+    retrieval answer when it runs out. Identical prompts in flight at the
+    same time share a single upstream request.
+    """
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 model: str = 'gpt-4o-mini',
+                 deadline: float = 4.0,
+                 max_connections: int = 20,
+                 max_tokens: int = 300,
+                 temperature: float = 0.2):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.deadline = deadline
+        self.max_connections = max_connections
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+        self.client = None
+        self.inflight: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional['LLMSynthesizer']:
+        """
+        Synthesizer configured from LLM_* / OPENAI_* variables, or None
+        unless LLM_SYNTHESIS=true
+        """
+        if os.getenv('LLM_SYNTHESIS', 'False').lower() != 'true':
+            return None
+        return cls(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=os.getenv('OPENAI_BASE_URL') or None,
+            model=os.getenv('LLM_MODEL', 'gpt-4o-mini'),
+            deadline=float(os.getenv('LLM_DEADLINE', 4.0)),
+            max_connections=int(os.getenv('LLM_MAX_CONNECTIONS', 20)),
+            max_tokens=int(os.getenv('LLM_MAX_TOKENS', 300))
+        )
+
+    def start(self) -> None:
+        """
+        Create the client up front so the first request's budget isn't
+        spent importing the SDK
+        """
+        self.get_client()
+
+    def get_client(self):
+        if self.client is None:
+            # Imported here so the SDK only loads when synthesis is enabled
+            import httpx
+            from openai import AsyncOpenAI
+
+            # Keep-alive pool sized for concurrent requests; retries would blow the deadline
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.deadline + 1.0, connect=min(self.deadline, 2.0))
+            )
+            self.client = AsyncOpenAI(
+                api_key=self.api_key or 'not-set',
+                base_url=self.base_url,
+                http_client=http_client,
+                max_retries=0
+            )
+        return self.client
+
+    def build_messages(self, question: str, context: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        sources = []
+        for number, item in enumerate(context, 1):
+            text = item.get('text', '')[:MAX_CONTEXT_CHARS]
+            sources.append(f"[{number}] {item.get('title', '')} ({item.get('url', '')})\n{text}")
+        return [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': "Context:\n" + "\n\n".join(sources) + f"\n\nQuestion: {question}"}
+        ]
+
+    async def complete(self, messages: List[Dict[str, str]]) -> str:
+        response = await self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature
+        )
+        return (response.choices[0].message.content or '').strip()
+
+    async def synthesize(self, question: str, context: List[Dict[str, str]],
+                         budget: Optional[float] = None) -> Optional[str]:
+        """
+        Synthesized answer, or None if the budget (default: the configured
+        deadline) ran out, the call failed or the reply was empty
+        """
+        budget = self.deadline if budget is None else min(budget, self.deadline)
+        if budget <= 0 or not context:
+            LLM_SYNTHESIS.inc('timeout')
+            return None
+
+        messages = self.build_messages(question, context)
+        prompt_key = hashlib.blake2b(
+            json.dumps([self.model, messages]).encode('utf-8'), digest_size=16
+        ).hexdigest()
+
+        task = self.inflight.get(prompt_key)
+        coalesced = task is not None
+        if not coalesced:
+            task = asyncio.ensure_future(self.complete(messages))
+            self.inflight[prompt_key] = task
+            task.add_done_callback(lambda done: self.finish(prompt_key, done))
+
+        started = time.perf_counter()
+        try:
+            # Shielded so one caller timing out doesn't cancel the shared call
+            answer = await asyncio.wait_for(asyncio.shield(task), budget)
+        except asyncio.TimeoutError:
+            LLM_SYNTHESIS.inc('timeout')
+            return None
+        except Exception as e:
+            LLM_SYNTHESIS.inc('error')
+            print(f"LLM synthesis failed: {e}")
+            return None
+        finally:
+            observe_stage('llm_synthesis', time.perf_counter() - started)
+
+        LLM_SYNTHESIS.inc('coalesced' if coalesced else 'ok')
+        return answer or None
+
+    def finish(self, prompt_key: str, task: asyncio.Task) -> None:
+        self.inflight.pop(prompt_key, None)
+        # Retrieve the error so calls every caller gave up on don't log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'base_url': self.base_url,
+            'deadline': self.deadline,
+            'in_flight': len(self.inflight)
+        }
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
@@ -0,0 +1,268 @@
+import bisect
+import re
+from array import array
+from collections import Counter
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from services.search_index import BM25Index, tokenize
+
+
+PASSAGE_WINDOW = 80  # Words per passage
+PASSAGE_STRIDE = 60  # Words between passage starts, so windows overlap by 20
+WORD_PATTERN = re.compile(r'\S+')
+REMOVED = 0xFFFFFFFF  # passage_topics marker for passages replaced by an ingest
+PASSAGE_SCORE_WEIGHT = 0.5  # Share of a topic's best passage score added to its own
+PASSAGE_CANDIDATES_PER_RESULT = 10  # Top passages considered for boosts, per requested result
+
+
+def passage_spans(text: str, window: int = PASSAGE_WINDOW, stride: int = PASSAGE_STRIDE) -> List[Tuple[int, int]]:
+    """
+    (start, end) character offsets of overlapping word windows; a post
+    shorter than the window is a single passage
+    """
+    words = [(match.start(), match.end()) for match in WORD_PATTERN.finditer(text)]
+    spans = []
+    for first in range(0, len(words), stride):
+        last = min(first + window, len(words)) - 1
+        spans.append((words[first][0], words[last][1]))
+        if last == len(words) - 1:
+            break
+    return spans
+
+
+class PassageIndex(BM25Index):
+    """
+    BM25 over Discourse posts split into overlapping passages.
+
+    Passages don't store text or dicts: each one is an entry in parallel
+    integer arrays (topic document id in the main index, post position,
+    start and end offsets into that post's content), 16 bytes apiece plus
+    postings, so threads with hundreds of replies stay cheap. Text, post id
+    and username are read back from the topic when a passage is returned.
+    """
+
+    def __init__(self, window: int = PASSAGE_WINDOW, stride: int = PASSAGE_STRIDE,
+                 k1: float = 1.2, b: float = 0.75):
+        super().__init__(k1=k1, b=b)
+        self.window = window
+        self.stride = stride
+        self.passage_topics = array('I')
+        self.passage_posts = array('I')
+        self.passage_starts = array('I')
+        self.passage_ends = array('I')
+        self.doc_lengths = array('I')
+        self.removed = 0
+
+        # topic document id -> (first passage, stop); ranges are contiguous
+        self.topic_ranges: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.passage_topics) - self.removed
+
+    def copy(self) -> 'PassageIndex':
+        with self.lock:
+            clone = super().copy()
+            clone.passage_topics = self.passage_topics[:]
+            clone.passage_posts = self.passage_posts[:]
+            clone.passage_starts = self.passage_starts[:]
+            clone.passage_ends = self.passage_ends[:]
+            clone.topic_ranges = dict(self.topic_ranges)
+        return clone
+
+    def topic_passages(self, topic: Dict[str, Any]) -> List[Tuple[int, int, int, List[str]]]:
+        """(post position, start, end, tokens) for every passage of a topic"""
+        passages = []
+        for position, post in enumerate(topic.get('posts', [])):
+            content = post.get('content', '')
+            for start, end in passage_spans(content, self.window, self.stride):
+                passages.append((position, start, end, tokenize(content[start:end])))
+        return passages
+
+    def add_topic(self, topic_doc_id: int, topic: Dict[str, Any], copy_on_write: bool = False) -> None:
+        passages = self.topic_passages(topic)
+        with self.lock:
+            self.append_passages(topic_doc_id, passages, copy_on_write)
+
+    def append_passages(self, topic_doc_id: int, passages: List[Tuple[int, int, int, List[str]]],
+                        copy_on_write: bool) -> None:
+        first = len(self.passage_topics)
+        for position, start, end, tokens in passages:
+            passage_id = len(self.passage_topics)
+            self.passage_posts.append(position)
+            self.passage_starts.append(start)
+            self.passage_ends.append(end)
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            self.update_postings(passage_id, Counter(tokens), copy_on_write)
+            # Appended last so concurrent readers never see a half-built passage
+            self.passage_topics.append(topic_doc_id)
+        self.topic_ranges[topic_doc_id] = (first, len(self.passage_topics))
+
+    def replace_topic(self, topic_doc_id: int, old_topic: Optional[Dict[str, Any]], topic: Dict[str, Any],
+                      copy_on_write: bool = True) -> None:
+        """
+        Re-index a topic after an ingest: its old passages are dropped from
+        the postings and marked removed, and the new ones appended
+        """
+        old_passages = self.topic_passages(old_topic) if old_topic is not None else []
+        passages = self.topic_passages(topic)
+        with self.lock:
+            first, stop = self.topic_ranges.get(topic_doc_id, (0, 0))
+            for passage_id, (_, _, _, tokens) in zip(range(first, stop), old_passages):
+                self.passage_topics[passage_id] = REMOVED
+                self.total_length -= self.doc_lengths[passage_id]
+                self.doc_lengths[passage_id] = 0
+                self.update_postings(passage_id, Counter({token: 0 for token in tokens}), copy_on_write)
+                self.removed += 1
+            self.append_passages(topic_doc_id, passages, copy_on_write)
+
+    def update_postings(self, passage_id: int, counts: Counter, copy_on_write: bool) -> None:
+        """Set (or with a zero count, remove) a passage's term frequencies"""
+        for term, count in counts.items():
+            term_postings = self.postings.get(term, {})
+            if copy_on_write:
+                term_postings = dict(term_postings)
+            if count:
+                term_postings[passage_id] = count
+            else:
+                term_postings.pop(passage_id, None)
+
+            if term_postings:
+                self.postings[term] = term_postings
+            else:
+                self.postings.pop(term, None)
+        self.mutations += 1
+
+    def best_passages(self, scores: Dict[int, float]) -> Dict[int, Dict[str, Any]]:
+        """
+        Per topic document id: the best passage score overall (used for
+        ranking) and the best-scoring reply passage (used as the snippet;
+        the opening post is usually the question itself)
+        """
+        best: Dict[int, Dict[str, Any]] = {}
+        for passage_id, score in scores.items():
+            topic_doc_id = self.passage_topics[passage_id]
+            if topic_doc_id == REMOVED:
+                continue
+            entry = best.setdefault(topic_doc_id, {'score': 0.0, 'snippet': None, 'snippet_score': 0.0})
+            entry['score'] = max(entry['score'], score)
+            if self.passage_posts[passage_id] > 0 and score > entry['snippet_score']:
+                entry['snippet'] = passage_id
+                entry['snippet_score'] = score
+        return best
+
+    def first_passage(self, topic_doc_id: int) -> Optional[int]:
+        """Id of a topic's first passage (None if it has none)"""
+        first, stop = self.topic_ranges.get(topic_doc_id, (0, 0))
+        return first if stop > first else None
+
+    def passage(self, passage_id: int, topic: Dict[str, Any]) -> Dict[str, Any]:
+        """Text, post id and username of a passage of topic"""
+        post = topic['posts'][self.passage_posts[passage_id]]
+        start, end = self.passage_starts[passage_id], self.passage_ends[passage_id]
+        return {
+            'post_id': post.get('id'),
+            'username': post.get('username', ''),
+            'text': post.get('content', '')[start:end]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'passages': len(self),
+            'terms': len(self.postings),
+            'window': self.window,
+            'stride': self.stride
+        }
+
+
+class MappedPassageIndex(PassageIndex):
+    """
+    PassageIndex over arrays and postings in a memory-mapped snapshot
+    """
+
+    read_only = True
+
+    def __init__(self, passage_topics: Sequence[int], passage_posts: Sequence[int], passage_starts: Sequence[int],
+                 passage_ends: Sequence[int], doc_lengths: Sequence[int], postings, total_length: int,
+                 window: int, stride: int, k1: float, b: float):
+        super().__init__(window=window, stride=stride, k1=k1, b=b)
+        self.passage_topics = passage_topics
+        self.passage_posts = passage_posts
+        self.passage_starts = passage_starts
+        self.passage_ends = passage_ends
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.total_length = total_length
+
+    def first_passage(self, topic_doc_id: int) -> Optional[int]:
+        # Compiled passages are stored in topic order
+        position = bisect.bisect_left(self.passage_topics, topic_doc_id)
+        if position < len(self.passage_topics) and self.passage_topics[position] == topic_doc_id:
+            return position
+        return None
+
+    def add_topic(self, *args, **kwargs) -> None:
+        raise TypeError("Compiled snapshots are read-only; recompile to add passages")
+
+    def replace_topic(self, *args, **kwargs) -> None:
+        raise TypeError("Compiled snapshots are read-only; recompile to add passages")
+
+    def copy(self) -> PassageIndex:
+        raise TypeError("Compiled snapshots are read-only; load the JSON sources to change them")
+
+
+def passage_boosted_top_k(search_index: BM25Index, passage_index: Optional[PassageIndex],
+                          query_weights: Dict[str, float],
+                          top_k: int) -> Tuple[List[Tuple[int, float]], Dict[int, Dict[str, Any]]]:
+    """
+    Top (doc_id, score) pairs with each topic boosted by its best passage,
+    and the best_passages() entries the boosts came from.
+
+    Boosts come from the best PASSAGE_CANDIDATES_PER_RESULT * top_k
+    passages, so a topic whose passages all rank below those gets none.
+    """
+    passage_hits = passage_index.top_k(query_weights, PASSAGE_CANDIDATES_PER_RESULT * top_k) if passage_index else []
+    return boosted_top_k(search_index, passage_index, passage_hits, query_weights, top_k)
+
+
+def passage_boosted_top_k_batch(search_index: BM25Index, passage_index: Optional[PassageIndex],
+                                queries: List[Tuple[Dict[str, float], int]]
+                                ) -> List[Tuple[List[Tuple[int, float]], Dict[int, Dict[str, Any]]]]:
+    """
+    passage_boosted_top_k() for several (query_weights, top_k) queries; each
+    index fetches every distinct term's postings once for the whole batch
+    """
+    if passage_index:
+        passage_hits = passage_index.top_k_batch([
+            (query_weights, PASSAGE_CANDIDATES_PER_RESULT * top_k, None) for query_weights, top_k in queries
+        ])
+    else:
+        passage_hits = [[] for _ in queries]
+
+    best_passages = [
+        passage_index.best_passages(dict(hits)) if passage_index else {} for hits in passage_hits
+    ]
+    ranked = search_index.top_k_batch([
+        (query_weights, top_k, {doc_id: PASSAGE_SCORE_WEIGHT * best['score'] for doc_id, best in best.items()})
+        for (query_weights, top_k), best in zip(queries, best_passages)
+    ])
+    return list(zip(ranked, best_passages))
+
+
+def boosted_top_k(search_index: BM25Index, passage_index: Optional[PassageIndex], passage_hits: List[Tuple[int, float]],
+                  query_weights: Dict[str, float],
+                  top_k: int) -> Tuple[List[Tuple[int, float]], Dict[int, Dict[str, Any]]]:
+    """passage_boosted_top_k() with the boosting (passage id, score) pairs already chosen"""
+    best_passages = passage_index.best_passages(dict(passage_hits)) if passage_index else {}
+    boosts = {doc_id: PASSAGE_SCORE_WEIGHT * best['score'] for doc_id, best in best_passages.items()}
+    return search_index.top_k(query_weights, top_k, boosts), best_passages
+
+
+def attach_passages(results: List[Dict[str, Any]], best_passages: Dict[int, Dict[str, Any]],
+                    passage_index: Optional[PassageIndex]) -> List[Dict[str, Any]]:
+    """Add each result's best reply passage as its 'passage'"""
+    for result in results:
+        best = best_passages.get(result['doc_id'])
+        if best is not None and best['snippet'] is not None:
+            result['passage'] = passage_index.passage(best['snippet'], result['data'])
+    return results
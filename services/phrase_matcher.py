@@ -0,0 +1,93 @@
+from collections import deque
+from typing import List, Dict, Set, Iterable
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton for matching many phrases in a single pass.
+
+    Matching follows the semantics of ``phrase in text``: a phrase is found
+    wherever it occurs as a substring, including inside longer words.
+    """
+
+    def __init__(self, phrases: Iterable[str] = ()):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[str]] = [[]]
+        self.built = False
+
+        for phrase in phrases:
+            self.add(phrase)
+        self.build()
+
+    def add(self, phrase: str) -> None:
+        """
+        Add a phrase to the trie (requires build() before matching)
+        """
+        if not phrase:
+            return
+
+        state = 0
+        for char in phrase:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.transitions[state][char] = next_state
+            state = next_state
+
+        if phrase not in self.outputs[state]:
+            self.outputs[state].append(phrase)
+        self.built = False
+
+    def build(self) -> None:
+        """
+        Compute failure links breadth-first and merge suffix outputs
+        """
+        queue = deque()
+        for next_state in self.transitions[0].values():
+            self.fail[next_state] = 0
+            queue.append(next_state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+
+                for phrase in self.outputs[self.fail[next_state]]:
+                    if phrase not in self.outputs[next_state]:
+                        self.outputs[next_state].append(phrase)
+
+        self.built = True
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Return every registered phrase that occurs in text
+        """
+        if not self.built:
+            self.build()
+
+        found: Set[str] = set()
+        transitions = self.transitions
+        fail = self.fail
+        outputs = self.outputs
+        state = 0
+
+        for char in text:
+            next_state = transitions[state].get(char)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = transitions[state].get(char)
+            state = next_state or 0
+            if outputs[state]:
+                found.update(outputs[state])
+
+        return found
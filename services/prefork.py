@@ -0,0 +1,177 @@
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+
+# Seconds to wait before replacing a worker that exited
+RESTART_DELAY = 1.0
+
+# Memory counters read from /proc/<pid>/smaps_rollup, in kB
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+# Set in each forked worker so /api/stats can report the whole process group
+_worker_slot: Optional[int] = None
+_master_pid: Optional[int] = None
+_worker_pids = None
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    RSS, PSS, USS (private pages) and shared bytes of a process
+
+    Linux only; None where /proc isn't available or the process is gone.
+    """
+    counters = dict.fromkeys(SMAPS_FIELDS, 0)
+    for path in (f'/proc/{pid}/smaps_rollup', f'/proc/{pid}/smaps'):
+        try:
+            with open(path) as f:
+                for line in f:
+                    field, _, value = line.partition(':')
+                    if field in counters:
+                        counters[field] += int(value.split()[0])
+            break
+        except (OSError, ValueError):
+            continue
+    else:
+        return None
+
+    return {
+        'rss_bytes': counters['Rss'] * 1024,
+        'pss_bytes': counters['Pss'] * 1024,
+        'uss_bytes': (counters['Private_Clean'] + counters['Private_Dirty']) * 1024,
+        'shared_bytes': (counters['Shared_Clean'] + counters['Shared_Dirty']) * 1024
+    }
+
+
+def serving_prefork() -> bool:
+    """Whether this process is one of PreforkServer's workers"""
+    return _worker_pids is not None
+
+
+def worker_stats() -> Dict[str, Any]:
+    """
+    Memory of this process; under PreforkServer also of the master and
+    every sibling worker, so one request shows how much is really shared
+    """
+    pid = os.getpid()
+    if _worker_pids is None:
+        return {'mode': 'single', 'pid': pid, 'memory': process_memory(pid)}
+
+    workers = [
+        {'slot': slot, 'pid': worker_pid, 'memory': process_memory(worker_pid)}
+        for slot, worker_pid in enumerate(_worker_pids) if worker_pid
+    ]
+    return {
+        'mode': 'prefork',
+        'pid': pid,
+        'slot': _worker_slot,
+        'master': {'pid': _master_pid, 'memory': process_memory(_master_pid)},
+        'workers': workers,
+        'total_uss_bytes': sum(worker['memory']['uss_bytes'] for worker in workers if worker['memory'])
+    }
+
+
+class PreforkServer:
+    """
+    Serves an already-loaded ASGI app from several forked uvicorn workers.
+
+    The master binds the socket and forks; workers inherit the knowledge
+    snapshot instead of each loading their own, and pages stay shared
+    until something writes to them. The memory-mapped compiled snapshot
+    and NumPy arrays are never written, and gc.freeze() keeps the cyclic
+    collector from touching the remaining objects' headers. Dead workers
+    are replaced; SIGTERM/SIGINT stop them all.
+
+    Workers are read-only copies: a change made in one would not reach the
+    others, so knowledge reloads and live ingests are disabled in them.
+    Restart the server to pick up new sources or ingests.
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int, log_level: str = 'info'):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.log_level = log_level
+        # Shared memory, so every worker sees replacements of its siblings
+        self.worker_pids = RawArray('i', self.workers)
+        self.stopping = False
+        self.sock: Optional[socket.socket] = None
+
+    def run(self) -> None:
+        self.sock = uvicorn.Config(self.app, host=self.host, port=self.port).bind_socket()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Everything loaded so far is long-lived; keep the collector off it
+        gc.freeze()
+        for slot in range(self.workers):
+            self.spawn(slot)
+        self.supervise()
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self.run_worker(slot)
+        self.worker_pids[slot] = pid
+        print(f"Started worker {slot} (pid {pid})")
+
+    def run_worker(self, slot: int) -> None:
+        global _worker_slot, _master_pid, _worker_pids
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        _worker_slot, _master_pid, _worker_pids = slot, os.getppid(), self.worker_pids
+        self.worker_pids[slot] = os.getpid()
+
+        exit_code = 0
+        try:
+            config = uvicorn.Config(self.app, log_level=self.log_level)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException as e:
+            print(f"Worker {slot} failed: {e}")
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(exit_code)
+
+    def supervise(self) -> None:
+        """Wait for workers, replacing any that exit until stop() is called"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            slot = self.slot_of(pid)
+            if slot is None:
+                continue
+            self.worker_pids[slot] = 0
+            if not self.stopping:
+                print(f"Worker {slot} (pid {pid}) exited with status {status}, restarting")
+                time.sleep(RESTART_DELAY)
+                if not self.stopping:
+                    self.spawn(slot)
+        self.sock.close()
+
+    def slot_of(self, pid: int) -> Optional[int]:
+        for slot, worker_pid in enumerate(self.worker_pids):
+            if worker_pid == pid:
+                return slot
+        return None
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in self.live_pids():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def live_pids(self) -> List[int]:
+        return [pid for pid in self.worker_pids if pid]
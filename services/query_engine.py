@@ -0,0 +1,273 @@
+import heapq
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.tracing import add_trace_counts
+
+
+SEED_POSTINGS = 64  # Highest-impact postings kept per term to seed the top-k threshold
+BOUND_SLACK = 1 + 1e-9  # Keeps float rounding from making an upper bound too tight
+
+
+class TermPostings:
+    """
+    One term's postings as doc-id-sorted arrays, with what BM25 needs to
+    score any subset of them and an upper bound on their contribution
+    """
+
+    __slots__ = ('doc_ids', 'tfs', 'denominators', 'idf', 'k1', 'max_impact', 'seed_positions')
+
+    def __init__(self, doc_ids: np.ndarray, tfs: np.ndarray, norms: np.ndarray, idf: float, k1: float):
+        order = np.argsort(doc_ids, kind='stable')
+        self.doc_ids = doc_ids[order]
+        self.tfs = tfs[order]
+        self.denominators = self.tfs + norms[self.doc_ids]
+        self.idf = idf
+        self.k1 = k1
+
+        impacts = self.contributions(1.0)
+        self.max_impact = float(impacts.max())
+        if len(impacts) > SEED_POSTINGS:
+            self.seed_positions = np.argpartition(-impacts, SEED_POSTINGS - 1)[:SEED_POSTINGS]
+        else:
+            self.seed_positions = np.arange(len(impacts))
+
+    def contributions(self, weight: float, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        BM25 contribution of the term at weight, in the same operation
+        order as BM25Index.score_terms so scores match it bit for bit
+        """
+        if positions is None:
+            return (weight * self.idf) * self.tfs * (self.k1 + 1) / self.denominators
+        return (weight * self.idf) * self.tfs[positions] * (self.k1 + 1) / self.denominators[positions]
+
+
+class _QueryList:
+    """A weighted term (or the extra per-document scores) inside one query"""
+
+    __slots__ = ('doc_ids', 'weight', 'postings', 'values', 'bound', 'seed_positions')
+
+    def __init__(self, doc_ids: np.ndarray, bound: float, seed_positions: np.ndarray, weight: float = 0.0,
+                 postings: Optional[TermPostings] = None, values: Optional[np.ndarray] = None):
+        self.doc_ids = doc_ids
+        self.weight = weight
+        self.postings = postings
+        self.values = values
+        self.bound = bound
+        self.seed_positions = seed_positions
+
+    def contributions(self, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        if self.postings is not None:
+            return self.postings.contributions(self.weight, positions)
+        return self.values if positions is None else self.values[positions]
+
+    def add_scores(self, candidates: np.ndarray, scores: np.ndarray) -> None:
+        """Add this list's contribution to each candidate that appears in it"""
+        positions = np.minimum(np.searchsorted(self.doc_ids, candidates), len(self.doc_ids) - 1)
+        hits = self.doc_ids[positions] == candidates
+        scores[hits] += self.contributions(positions[hits])
+
+
+class _EngineCache:
+    """Per-term arrays for one state of the index; replaced whenever the index changes"""
+
+    def __init__(self, state: Tuple[int, int, int], norms: np.ndarray):
+        self.state = state
+        self.norms = norms
+        self.terms: Dict[str, Optional[TermPostings]] = {}
+
+
+class _StaleNorms(Exception):
+    """A term's postings reference documents the cached doc lengths don't cover"""
+
+
+def index_state(index) -> Tuple[int, int, int]:
+    return (index.mutations, len(index.doc_lengths), index.total_length)
+
+
+def copy_doc_lengths(doc_lengths) -> np.ndarray:
+    """
+    Doc lengths as floats. Mutable arrays are copied item by item: a buffer
+    view (np.array over array('I')) would block a concurrent append with
+    BufferError. Memory-mapped lengths never change, so they're copied directly.
+    """
+    if isinstance(doc_lengths, memoryview):
+        return np.array(doc_lengths, dtype=np.float64)
+    return np.fromiter(doc_lengths, dtype=np.float64, count=len(doc_lengths))
+
+
+class TopKQueryEngine:
+    """
+    Exact top-k BM25 retrieval with MaxScore pruning.
+
+    Query terms are ordered by the most they can add to any document's
+    score. Once the k best documents seen so far set a threshold, the
+    lowest-bound terms whose bounds sum below it become non-essential:
+    no document matching only those can enter the top k, so candidates
+    are drawn from the essential terms alone, and only their postings
+    that could still reach the threshold are scored. Non-essential terms
+    are then looked up (binary search) for those candidates only. The
+    final top k is selected with a bounded heap instead of sorting every
+    match.
+
+    A term's postings are converted to arrays the first time it is
+    queried and reused until the index changes. Conversion holds the
+    index's lock, which writers (live ingests) also hold, so doc lengths
+    and postings are always copied from the same state.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.cache: Optional[_EngineCache] = None
+
+    def current_cache(self) -> _EngineCache:
+        with self.index.lock:
+            index = self.index
+            state = index_state(index)
+            cache = self.cache
+            if cache is None or cache.state != state:
+                avg_length = index.avg_doc_length or 1.0
+                doc_lengths = copy_doc_lengths(index.doc_lengths)
+                norms = index.k1 * (1 - index.b + index.b * doc_lengths / avg_length)
+                cache = self.cache = _EngineCache(state, norms)
+            return cache
+
+    def query_postings(self, terms: List[str]) -> List[Optional[TermPostings]]:
+        """Arrays for each term, all built against the same index state"""
+        cache = self.cache
+        if cache is not None and cache.state == index_state(self.index) and all(term in cache.terms for term in terms):
+            # Cached arrays are immutable; at worst they're one write behind
+            return [cache.terms[term] for term in terms]
+
+        with self.index.lock:
+            try:
+                cache = self.current_cache()
+                return [self.term_postings(cache, term) for term in terms]
+            except _StaleNorms:
+                # Something wrote without the lock; start over from the current lengths
+                self.cache = None
+                cache = self.current_cache()
+                return [self.term_postings(cache, term) for term in terms]
+
+    def term_postings(self, cache: _EngineCache, term: str) -> Optional[TermPostings]:
+        if term in cache.terms:
+            return cache.terms[term]
+
+        postings = self.index.postings.get(term)
+        if not postings:
+            term_postings = None
+        else:
+            if isinstance(postings, dict):
+                doc_ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+                tfs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            else:
+                doc_ids = np.array(postings.doc_ids, dtype=np.int64)
+                tfs = np.array(postings.tfs, dtype=np.float64)
+            if int(doc_ids.max()) >= len(cache.norms):
+                raise _StaleNorms(term)
+            term_postings = TermPostings(doc_ids, tfs, cache.norms, self.index.idf(term), self.index.k1)
+        cache.terms[term] = term_postings
+        return term_postings
+
+    def top_k(self, query_weights: Dict[str, float], k: int,
+              extra_scores: Optional[Dict[int, float]] = None) -> List[Tuple[int, float]]:
+        """
+        The k best (doc_id, score) pairs, best first (ties by doc id),
+        exactly as ranking score_terms() would order them. extra_scores are
+        added to their documents after the terms, e.g. a passage boost.
+        """
+        terms = list(query_weights)
+        return self.rank(query_weights, dict(zip(terms, self.query_postings(terms))), k, extra_scores)
+
+    def top_k_batch(self, queries: List[Tuple[Dict[str, float], int, Optional[Dict[int, float]]]]) -> List[List[Tuple[int, float]]]:
+        """
+        top_k() for several (query_weights, k, extra_scores) queries. Every
+        distinct term's arrays are fetched once for the whole batch, in one
+        pass under the index lock when any need building, and shared by the
+        queries containing it.
+        """
+        terms = list(dict.fromkeys(term for query_weights, _, _ in queries for term in query_weights))
+        postings_by_term = dict(zip(terms, self.query_postings(terms)))
+        return [
+            self.rank(query_weights, postings_by_term, k, extra_scores)
+            for query_weights, k, extra_scores in queries
+        ]
+
+    def rank(self, query_weights: Dict[str, float], postings_by_term: Dict[str, Optional[TermPostings]], k: int,
+             extra_scores: Optional[Dict[int, float]] = None) -> List[Tuple[int, float]]:
+        """MaxScore top k of one query over already fetched term arrays"""
+        lists: List[_QueryList] = []
+        for term, weight in query_weights.items():
+            postings = postings_by_term[term]
+            if postings is not None:
+                lists.append(_QueryList(postings.doc_ids, weight * postings.max_impact * BOUND_SLACK,
+                                        postings.seed_positions, weight=weight, postings=postings))
+        terms_evaluated = len(lists)
+
+        if extra_scores:
+            extra_ids = np.fromiter(extra_scores.keys(), dtype=np.int64, count=len(extra_scores))
+            extra_values = np.fromiter(extra_scores.values(), dtype=np.float64, count=len(extra_scores))
+            order = np.argsort(extra_ids)
+            extra_values = extra_values[order]
+            seeds = np.argsort(-extra_values)[:SEED_POSTINGS]
+            lists.append(_QueryList(extra_ids[order], float(extra_values.max()) * BOUND_SLACK, seeds,
+                                    values=extra_values))
+
+        if not lists or k <= 0:
+            add_trace_counts(query_terms=len(query_weights))
+            return []
+
+        # Seed the threshold with the highest-impact postings of every list
+        seeds = np.unique(np.concatenate([query_list.doc_ids[query_list.seed_positions] for query_list in lists]))
+        threshold = self.kth_score(seeds, self.score_candidates(lists, seeds), k)
+
+        # Lists sorted by bound; the longest prefix summing below the threshold is non-essential
+        by_bound = sorted(lists, key=lambda query_list: query_list.bound)
+        total_bound = sum(query_list.bound for query_list in by_bound)
+        non_essential = 0
+        prefix_bound = 0.0
+        for query_list in by_bound:
+            if prefix_bound + query_list.bound >= threshold:
+                break
+            prefix_bound += query_list.bound
+            non_essential += 1
+
+        candidate_parts = []
+        postings_visited = 0
+        for query_list in by_bound[non_essential:]:
+            postings_visited += len(query_list.doc_ids)
+            reachable = query_list.contributions() + (total_bound - query_list.bound) >= threshold
+            candidate_parts.append(query_list.doc_ids[reachable])
+        candidates = np.unique(np.concatenate(candidate_parts))
+        scores = self.score_candidates(lists, candidates)
+
+        add_trace_counts(
+            query_terms=len(query_weights),
+            terms_evaluated=terms_evaluated,
+            terms_skipped=non_essential,
+            postings_visited=postings_visited,
+            candidates_scored=len(candidates)
+        )
+        return self.select(candidates, scores, k)
+
+    def score_candidates(self, lists: List[_QueryList], candidates: np.ndarray) -> np.ndarray:
+        """Exact scores of candidates, summed in query order like score_terms()"""
+        scores = np.zeros(len(candidates))
+        for query_list in lists:
+            query_list.add_scores(candidates, scores)
+        return scores
+
+    def kth_score(self, candidates: np.ndarray, scores: np.ndarray, k: int) -> float:
+        """Score a document must reach to enter the top k (0 until k documents are known)"""
+        if len(candidates) < k:
+            return 0.0
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+    def select(self, candidates: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Top k of the scored candidates through a bounded heap, ties to the lower doc id"""
+        if len(candidates) > k:
+            keep = scores >= np.partition(scores, len(scores) - k)[len(scores) - k]
+            candidates, scores = candidates[keep], scores[keep]
+        best = heapq.nlargest(k, zip(scores.tolist(), (-candidates).tolist()))
+        return [(-negated_doc_id, score) for score, negated_doc_id in best]
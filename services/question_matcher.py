@@ -0,0 +1,129 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+
+from services.phrase_matcher import PhraseMatcher
+
+
+# Ordered (question_type, phrases) pairs; the first rule with a match wins
+CLASSIFICATION_RULES: List[Tuple[str, List[str]]] = [
+    ('course_info', ['what is tds', 'tds full form', 'stands for', 'about tds', 'tools in data science']),
+    ('grading_system', ['grade', 'grading', 'deadline', 'due date', 'project 01', 'project 1', 's grade']),
+    ('model_usage', ['gpt', 'model', 'ai-proxy', 'openai']),
+    ('environment_setup', ['docker', 'podman', 'container']),
+    ('assignment_help', ['ga4', 'ga5', 'graded assignment', 'assignment']),
+    ('grading_system', ['dashboard', 'score', 'marks', 'bonus']),
+    ('schedule_inquiry', ['exam', 'end-term', 'when is']),
+]
+
+# Model names and assignment references are pulled out with their original
+# spelling. Each lookahead group mirrors one of the former separate findall
+# patterns, so overlapping matches ("gpt-4o-mini" and "gpt-4") are kept. The
+# leading literal 'g' lets the regex engine skip ahead between candidates;
+# groups therefore start after it and are sliced back out of the question.
+EXTRACTION_PATTERN = re.compile(
+    r'g(?:'
+    r'(?=(pt-?3\.?5-?turbo-?0125))?'
+    r'(?=(pt-?4o-?mini))?'
+    r'(?=(pt-?4))?'
+    r'(?=(pt-?3\.?5))?'
+    r'pt'
+    r'|(a\d+))',
+    flags=re.IGNORECASE
+)
+
+
+class QuestionMatcher:
+    """
+    Compiles keyword, classification and predefined-answer phrases into one
+    automaton so a question is scanned once for all three.
+
+    Answer rules are ordered (answer_key, condition groups) pairs. Every
+    group must have at least one matching phrase; the first fully satisfied
+    rule wins.
+    """
+
+    def __init__(self,
+                 keywords: Sequence[str],
+                 classification_rules: Sequence[Tuple[str, List[str]]] = CLASSIFICATION_RULES,
+                 answer_rules: Sequence[Tuple[str, List[List[str]]]] = ()):
+        self.keywords = list(keywords)
+        self.classification_rules = list(classification_rules)
+        self.answer_rules = list(answer_rules)
+
+        # phrase -> lowest classification rule index it belongs to
+        self.phrase_to_type_rule: Dict[str, int] = {}
+        # phrase -> [(answer rule index, group index)]
+        self.phrase_to_answer_groups: Dict[str, List[Tuple[int, int]]] = {}
+        # phrase -> keywords reported when it is found
+        self.phrase_to_keywords: Dict[str, List[str]] = {}
+
+        for keyword in self.keywords:
+            self.phrase_to_keywords.setdefault(keyword.lower(), []).append(keyword)
+
+        for rule_index, (_, phrases) in enumerate(self.classification_rules):
+            for phrase in phrases:
+                self.phrase_to_type_rule.setdefault(phrase.lower(), rule_index)
+
+        for rule_index, (_, groups) in enumerate(self.answer_rules):
+            for group_index, phrases in enumerate(groups):
+                for phrase in phrases:
+                    self.phrase_to_answer_groups.setdefault(phrase.lower(), []).append((rule_index, group_index))
+
+        self.phrase_matcher = PhraseMatcher(
+            set(self.phrase_to_keywords) | set(self.phrase_to_type_rule) | set(self.phrase_to_answer_groups)
+        )
+
+    def match(self, question: str) -> Dict[str, Any]:
+        """
+        Scan the question once and return keywords, question type and the
+        predefined answer key (or None)
+        """
+        found = self.phrase_matcher.find_all(question.lower())
+
+        return {
+            'keywords': self.collect_keywords(question, found),
+            'question_type': self.resolve_question_type(found),
+            'predefined_answer_key': self.resolve_answer_key(found)
+        }
+
+    def answer_key(self, question: str) -> Optional[str]:
+        """Only the predefined answer key for a question"""
+        return self.resolve_answer_key(self.phrase_matcher.find_all(question.lower()))
+
+    def collect_keywords(self, question: str, found: set) -> List[str]:
+        """Combine matched keyword phrases with extracted model/assignment names"""
+        keywords = []
+        for phrase in found:
+            keywords.extend(self.phrase_to_keywords.get(phrase, ()))
+
+        for match in EXTRACTION_PATTERN.finditer(question):
+            for group_index, group in enumerate(match.groups(), start=1):
+                if group:
+                    keywords.append(question[match.start():match.end(group_index)])
+
+        return list(set(keywords))  # Remove duplicates
+
+    def resolve_question_type(self, found: set) -> str:
+        """Pick the earliest classification rule with a matching phrase"""
+        best_rule = None
+        for phrase in found:
+            rule_index = self.phrase_to_type_rule.get(phrase)
+            if rule_index is not None and (best_rule is None or rule_index < best_rule):
+                best_rule = rule_index
+
+        if best_rule is None:
+            return 'general'
+        return self.classification_rules[best_rule][0]
+
+    def resolve_answer_key(self, found: set) -> Optional[str]:
+        """Pick the earliest answer rule whose condition groups are all satisfied"""
+        satisfied: Dict[int, set] = {}
+        for phrase in found:
+            for rule_index, group_index in self.phrase_to_answer_groups.get(phrase, ()):
+                satisfied.setdefault(rule_index, set()).add(group_index)
+
+        for rule_index in sorted(satisfied):
+            if len(satisfied[rule_index]) == len(self.answer_rules[rule_index][1]):
+                return self.answer_rules[rule_index][0]
+
+        return None
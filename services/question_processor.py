@@ -1,27 +1,89 @@
-import base64
 import json
 from io import BytesIO
+import os
 import re
-from typing import Optional, List, Dict, Any
+import time
+from typing import Callable, Optional, List, Dict, Any, Tuple
+
+from services.answer_rules import AnswerRuleBook
+from services.fuzzy_vocabulary import FuzzyVocabulary, edit_distance
+from services.image_info import ImageTooLarge, decoded_size, sniff_image
+from services.metrics import QUESTIONS_BY_TYPE
+from services.question_matcher import QuestionMatcher, CLASSIFICATION_RULES
+from services.tracing import observe_stage, timed_stage
+
+
+WORD_PATTERN = re.compile(r'[A-Za-z]+')
+# Largest decoded image accepted, unless MAX_IMAGE_BYTES overrides it
+DEFAULT_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+# Model names normalized by clean_question, so their words get typo-corrected too
+SPELLING_PHRASES = ['gpt-4o-mini', 'gpt-3.5-turbo-0125']
+# "gpt4o mini" and its suffix misspelled ("gpt4o mni"); the suffix is too short
+# for the typo index, so it is compared with 'mini' right here
+GPT_4O_MINI_PATTERN = re.compile(r'gpt[- ]?4o[- ]?([a-z]{2,5})\b', flags=re.IGNORECASE)
 
 
 class QuestionProcessor:
-    def __init__(self):
+    def __init__(self, answer_rules: Optional[AnswerRuleBook] = None,
+                 known_terms: Optional[Callable[[str], bool]] = None):
         self.common_tds_keywords = [
             'gpt', 'openai', 'ai-proxy', 'docker', 'podman', 'ga4', 'ga5', 
             'graded assignment', 'dashboard', 'bonus', 'end-term', 'exam',
             'discourse', 'tds', 'tools in data science', 'anand', 'professor'
         ]
+        
+        # Words that are spelled correctly even though they aren't keywords
+        # (e.g. the search index vocabulary), so they are never "corrected"
+        self.known_terms = known_terms or (lambda term: False)
+        
+        # Keyword, classification and predefined-answer phrases in one automaton,
+        # recompiled on the rule book's watcher thread whenever the rules change
+        self.answer_rules = answer_rules or AnswerRuleBook()
+        self.rebuild_matcher()
+        self.answer_rules.add_listener(self.rebuild_matcher)
+        
+        self.max_image_bytes = int(os.getenv('MAX_IMAGE_BYTES', DEFAULT_MAX_IMAGE_BYTES))
+    
+    def rebuild_matcher(self) -> None:
+        """
+        Compile the matcher (and the typo index over its phrase words)
+        against the current predefined answer rules, then swap both in
+        """
+        rules = self.answer_rules.rules
+        phrases = self.common_tds_keywords + SPELLING_PHRASES
+        for _, rule_phrases in CLASSIFICATION_RULES:
+            phrases.extend(rule_phrases)
+        for _, groups in rules:
+            for group in groups:
+                phrases.extend(group)
+        keyword_vocabulary = FuzzyVocabulary(
+            word for phrase in phrases for word in WORD_PATTERN.findall(phrase.lower())
+        )
+        question_matcher = QuestionMatcher(self.common_tds_keywords, answer_rules=rules)
+        
+        self.question_matcher, self.keyword_vocabulary = question_matcher, keyword_vocabulary
     
     def process_question(self, question: str, image_b64: Optional[str] = None) -> Dict[str, Any]:
         """
         Process the incoming question and extract relevant information
         """
+        started = time.perf_counter()
+        question_matcher = self.question_matcher
+        
+        corrected_question, corrections = self.correct_spelling(question)
+        cleaned_question = self.clean_question(corrected_question)
+        match = question_matcher.match(cleaned_question)
+        if corrections:
+            # A canned answer must be asked for as written, never via a correction
+            match['predefined_answer_key'] = question_matcher.answer_key(self.clean_question(question))
+        
         processed = {
             'original_question': question,
-            'cleaned_question': self.clean_question(question),
-            'keywords': self.extract_keywords(question),
-            'question_type': self.classify_question(question),
+            'cleaned_question': cleaned_question,
+            'spelling_corrections': corrections,
+            'keywords': match['keywords'],
+            'question_type': match['question_type'],
+            'predefined_answer_key': match['predefined_answer_key'],
             'has_image': image_b64 is not None,
             'image_info': None
         }
@@ -29,8 +91,31 @@ class QuestionProcessor:
         if image_b64:
             processed['image_info'] = self.process_image(image_b64)
         
+        observe_stage('process_question', time.perf_counter() - started)
+        QUESTIONS_BY_TYPE.inc(processed['question_type'])
         return processed
     
+    def correct_spelling(self, question: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Replace misspelled keyword words ("dokcer", "podmn") with the
+        closest keyword vocabulary word; returns the corrected question and
+        the {typo: correction} map. Words in the corpus or the English
+        wordlist are left alone.
+        """
+        corrections: Dict[str, str] = {}
+        
+        def replace(match) -> str:
+            word = match.group(0).lower()
+            if word in self.keyword_vocabulary or self.known_terms(word):
+                return match.group(0)
+            correction = self.keyword_vocabulary.correct(word)
+            if correction is None:
+                return match.group(0)
+            corrections[word] = correction
+            return correction
+        
+        return WORD_PATTERN.sub(replace, question), corrections
+    
     def clean_question(self, question: str) -> str:
         """
         Clean and normalize the question text
@@ -40,78 +125,51 @@ class QuestionProcessor:
         
         # Normalize common terms
         cleaned = re.sub(r'gpt-?3\.?5-?turbo-?0125', 'gpt-3.5-turbo-0125', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'gpt-?4o-?mini', 'gpt-4o-mini', cleaned, flags=re.IGNORECASE)
+        cleaned = GPT_4O_MINI_PATTERN.sub(self.normalize_gpt_4o_mini, cleaned)
         
         return cleaned
     
+    @staticmethod
+    def normalize_gpt_4o_mini(match) -> str:
+        if edit_distance(match.group(1).lower(), 'mini', 1) <= 1:
+            return 'gpt-4o-mini'
+        return match.group(0)
+    
     def extract_keywords(self, question: str) -> List[str]:
         """
         Extract relevant keywords from the question
         """
-        keywords = []
-        question_lower = question.lower()
-        
-        for keyword in self.common_tds_keywords:
-            if keyword.lower() in question_lower:
-                keywords.append(keyword)
-        
-        # Extract model names
-        model_patterns = [
-            r'gpt-?3\.?5-?turbo-?0125',
-            r'gpt-?4o-?mini',
-            r'gpt-?4',
-            r'gpt-?3\.?5'
-        ]
-        
-        for pattern in model_patterns:
-            matches = re.findall(pattern, question, flags=re.IGNORECASE)
-            keywords.extend(matches)
-        
-        # Extract assignment references
-        assignment_matches = re.findall(r'ga\d+', question, flags=re.IGNORECASE)
-        keywords.extend(assignment_matches)
-        
-        return list(set(keywords))  # Remove duplicates
+        return self.question_matcher.match(question)['keywords']
     
     def classify_question(self, question: str) -> str:
         """
         Classify the type of question being asked
         """
-        question_lower = question.lower()
-        
-        # Course information questions
-        if any(phrase in question_lower for phrase in ['what is tds', 'tds full form', 'stands for', 'about tds', 'tools in data science']):
-            return 'course_info'
-        # Grading and deadline questions
-        elif any(word in question_lower for word in ['grade', 'grading', 'deadline', 'due date', 'project 01', 'project 1', 's grade']):
-            return 'grading_system'
-        # Model usage questions
-        elif any(word in question_lower for word in ['gpt', 'model', 'ai-proxy', 'openai']):
-            return 'model_usage'
-        elif any(word in question_lower for word in ['docker', 'podman', 'container']):
-            return 'environment_setup'
-        elif any(word in question_lower for word in ['ga4', 'ga5', 'graded assignment', 'assignment']):
-            return 'assignment_help'
-        elif any(word in question_lower for word in ['dashboard', 'score', 'marks', 'bonus']):
-            return 'grading_system'
-        elif any(word in question_lower for word in ['exam', 'end-term', 'when is']):
-            return 'schedule_inquiry'
-        else:
-            return 'general'
+        return self.question_matcher.match(question)['question_type']
+    
+    def check_image_size(self, image_b64: Optional[str]) -> int:
+        """
+        Decoded size of an image, measured from the base64 length alone;
+        raises ImageTooLarge if it is over max_image_bytes
+        """
+        if image_b64 is None:
+            return 0
+        size = decoded_size(image_b64)
+        if size > self.max_image_bytes:
+            raise ImageTooLarge(f"Image too large: {size} bytes (max {self.max_image_bytes})")
+        return size
     
     def process_image(self, image_b64: str) -> Optional[Dict[str, Any]]:
         """
-        Process base64 encoded image and extract basic information
+        Size, format and pixel dimensions of a base64 encoded image
+        
+        Only the PNG/JPEG/WebP header is decoded, never the whole image.
+        Raises ImageTooLarge for images over max_image_bytes.
         """
+        size = self.check_image_size(image_b64)
         try:
-            # Decode base64 image to get basic info
-            image_data = base64.b64decode(image_b64)
-            
-            return {
-                'size_bytes': len(image_data),
-                'format': 'base64_decoded',
-                'note': 'Image received but detailed processing not available'
-            }
+            with timed_stage('image_decode'):
+                return {'size_bytes': size, **sniff_image(image_b64)}
         except Exception as e:
             print(f"Error processing image: {e}")
             return None
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def make_cache_key(normalized_question: str, image_b64: Optional[str] = None, *extra: Hashable) -> Tuple:
+    """
+    Build a cache key from the normalized question and an image digest
+
+    extra values (e.g. data versions) are appended so entries built from
+    older data never match.
+    """
+    image_digest = None
+    if image_b64 is not None:
+        image_digest = hashlib.blake2b(image_b64.encode('utf-8'), digest_size=16).hexdigest()
+    return (normalized_question, image_digest) + extra
+
+
+class ResponseCache:
+    """
+    Bounded in-process answer cache with TTL expiry and LRU eviction.
+
+    Concurrent requests for the same key are coalesced: the first caller
+    computes the value and the others await the same future.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Return (found, value), dropping the entry if it has expired
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        return True, value
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        get() that also counts the hit or miss
+        """
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found, value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries over max_size
+        """
+        if not self.enabled:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, computing it at most once at a time
+        """
+        if not self.enabled:
+            return await compute()
+
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self.in_flight[key]
+
+        self.put(key, value)
+        future.set_result(value)
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Counters for /api/stats
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'enabled': self.enabled,
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'in_flight': len(self.in_flight),
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
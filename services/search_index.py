@@ -0,0 +1,211 @@
+import copy
+import math
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.query_engine import TopKQueryEngine
+from services.tracing import add_trace_counts
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Token-level inverted index scored with Okapi BM25.
+
+    Documents are added once at load time; queries only touch the postings
+    of the terms they contain instead of scanning the whole corpus, and
+    top_k() skips the postings that cannot reach the k best results.
+    """
+
+    read_only = False
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Dict[str, Any]] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self.mutations = 0  # Bumped on every change so the query engine drops stale arrays
+        # Held by every write and while the query engine copies doc lengths
+        # and postings, so it never pairs postings with older lengths
+        self.lock = threading.RLock()
+        self.query_engine = TopKQueryEngine(self)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def copy(self) -> 'BM25Index':
+        """
+        A new index sharing this one's documents and posting dicts. Changes
+        made to the copy with copy_on_write leave this index untouched.
+        """
+        with self.lock:
+            clone = copy.copy(self)
+            clone.documents = list(self.documents)
+            clone.doc_lengths = self.doc_lengths[:]
+            clone.postings = dict(self.postings)
+        clone.lock = threading.RLock()
+        clone.query_engine = TopKQueryEngine(clone)
+        return clone
+
+    @property
+    def avg_doc_length(self) -> float:
+        n_docs = len(self)
+        if not n_docs:
+            return 0.0
+        return self.total_length / n_docs
+
+    def add_document(self, doc_type: str, data: Dict[str, Any], text: str) -> int:
+        """
+        Index a document and return its internal id
+        """
+        tokens = tokenize(text)
+        with self.lock:
+            doc_id = len(self.documents)
+            self.documents.append({'type': doc_type, 'data': data})
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            self.mutations += 1
+
+            for token in tokens:
+                term_postings = self.postings.setdefault(token, {})
+                term_postings[doc_id] = term_postings.get(doc_id, 0) + 1
+
+        return doc_id
+
+    def upsert_document(self, doc_id: Optional[int], doc_type: str, data: Dict[str, Any], text: str,
+                        old_text: str = '', copy_on_write: bool = True) -> int:
+        """
+        Add a document (doc_id None) or replace one, touching only the
+        postings of terms whose counts changed. old_text must be the text
+        the document was indexed with.
+
+        With copy_on_write, each changed posting dict is replaced rather than
+        mutated, so searches running concurrently never see a dict change
+        size mid-iteration.
+        """
+        new_counts = Counter(tokenize(text))
+        old_counts = Counter(tokenize(old_text)) if doc_id is not None else Counter()
+        new_length = sum(new_counts.values())
+
+        with self.lock:
+            return self.apply_counts(doc_id, doc_type, data, old_counts, new_counts, new_length, copy_on_write)
+
+    def apply_counts(self, doc_id: Optional[int], doc_type: str, data: Dict[str, Any], old_counts: Counter,
+                     new_counts: Counter, new_length: int, copy_on_write: bool) -> int:
+        """upsert_document's index changes, made while holding the lock"""
+        if doc_id is None:
+            doc_id = len(self.documents)
+            self.doc_lengths.append(new_length)
+            self.documents.append({'type': doc_type, 'data': data})
+            self.total_length += new_length
+        else:
+            self.total_length += new_length - self.doc_lengths[doc_id]
+            self.doc_lengths[doc_id] = new_length
+            self.documents[doc_id] = {'type': doc_type, 'data': data}
+
+        for term in old_counts.keys() | new_counts.keys():
+            if old_counts[term] == new_counts[term]:
+                continue
+            term_postings = self.postings.get(term, {})
+            if copy_on_write:
+                term_postings = dict(term_postings)
+            if new_counts[term]:
+                term_postings[doc_id] = new_counts[term]
+            else:
+                term_postings.pop(doc_id, None)
+
+            if term_postings:
+                self.postings[term] = term_postings
+            else:
+                self.postings.pop(term, None)
+
+        self.mutations += 1
+        return doc_id
+
+    def idf(self, term: str) -> float:
+        """
+        BM25 inverse document frequency (always positive)
+        """
+        doc_freq = len(self.postings.get(term, ()))
+        n_docs = len(self)
+        return math.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def score_terms(self, query_weights: Dict[str, float]) -> Dict[int, float]:
+        """
+        Accumulate BM25 scores for every document containing a query term
+
+        The exhaustive reference that top_k() must match exactly; searches
+        go through top_k()/top_k_batch().
+        """
+        scores: Dict[int, float] = {}
+        avg_length = self.avg_doc_length or 1.0
+        terms_evaluated = postings_visited = 0
+
+        for term, weight in query_weights.items():
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+
+            terms_evaluated += 1
+            postings_visited += len(term_postings)
+            idf = self.idf(term)
+            for doc_id, tf in term_postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                contribution = weight * idf * tf * (self.k1 + 1) / (tf + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + contribution
+
+        add_trace_counts(
+            query_terms=len(query_weights),
+            terms_evaluated=terms_evaluated,
+            postings_visited=postings_visited,
+            candidates_scored=len(scores)
+        )
+        return scores
+
+    def top_k(self, query_weights: Dict[str, float], k: int,
+              extra_scores: Optional[Dict[int, float]] = None) -> List[Tuple[int, float]]:
+        """
+        The k best (doc_id, score) pairs for a query, skipping documents
+        that cannot make the cut (see TopKQueryEngine)
+        """
+        return self.query_engine.top_k(query_weights, k, extra_scores)
+
+    def top_k_batch(self, queries: List[Tuple[Dict[str, float], int, Optional[Dict[int, float]]]]) -> List[List[Tuple[int, float]]]:
+        """
+        top_k() for several (query_weights, k, extra_scores) queries, sharing
+        each distinct term's postings arrays across the batch
+        """
+        return self.query_engine.top_k_batch(queries)
+
+    def search(self, query_weights: Dict[str, float], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Return the top_k documents as {'type', 'data', 'relevance', 'doc_id'} dicts
+        """
+        return self.results(self.top_k(query_weights, top_k))
+
+    def results(self, ranked: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        """
+        Result dicts for ranked (doc_id, score) pairs
+        """
+        return [
+            {
+                'type': self.documents[doc_id]['type'],
+                'data': self.documents[doc_id]['data'],
+                'relevance': round(score, 4),
+                'doc_id': doc_id
+            }
+            for doc_id, score in ranked
+        ]
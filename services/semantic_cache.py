@@ -0,0 +1,162 @@
+import re
+import threading
+import time
+import zlib
+from typing import List, Dict, Any, FrozenSet, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:\.[a-z0-9]+)*')
+# Function words only; content words like 'use' or 'allowed' can change the answer
+STOP_WORDS = frozenset((
+    'a', 'an', 'the', 'i', 'me', 'my', 'we', 'our', 'you', 'your', 'it', 'its', 'this', 'that', 'these', 'those',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'am', 'do', 'does', 'did', 'have', 'has', 'had',
+    'can', 'could', 'should', 'would', 'will', 'shall', 'may', 'might', 'must',
+    'to', 'of', 'in', 'on', 'for', 'with', 'at', 'by', 'from', 'about', 'as', 'into', 'than',
+    'or', 'and', 'so', 'if', 'but', 'what', 'how', 'when', 'which', 'who', 'why', 'where', 'there', 'any'
+))
+
+
+def question_identifiers(question: str) -> FrozenSet[str]:
+    """
+    Tokens with a digit in them (ga4, 6, 3.5): they name one assignment,
+    week or model, so questions that differ in them need different answers
+    however similar the rest is
+    """
+    return frozenset(token for token in TOKEN_PATTERN.findall(question.lower()) if any(char.isdigit() for char in token))
+
+
+def question_features(question: str) -> List[str]:
+    """
+    Words, word bigrams and character trigrams of a question's content words
+    """
+    words = [word for word in TOKEN_PATTERN.findall(question.lower()) if word not in STOP_WORDS]
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        features.extend(f"c:{padded[start:start + 3]}" for start in range(len(padded) - 2))
+    return features
+
+
+class HashedVectorizer:
+    """
+    Maps questions to L2-normalized hashed bag-of-n-grams vectors (the
+    hashing trick, with a sign bit to keep collisions unbiased)
+    """
+
+    # Word features carry more meaning than character trigrams
+    WEIGHTS = {'w': 3.0, 'b': 2.0, 'c': 1.0}
+
+    def __init__(self, dimensions: int = 2048):
+        self.dimensions = dimensions
+
+    def transform(self, question: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in question_features(question):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign * self.WEIGHTS[feature[0]]
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """
+    Bounded cache of answers looked up by question similarity.
+
+    Vectors live in one preallocated matrix, so a lookup is a single
+    matrix-vector product over all entries. An entry matches when its
+    cosine similarity reaches the threshold and it was stored under the
+    same generation (e.g. rule book and knowledge versions). When full, the
+    least recently used entry is replaced.
+    """
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.85, ttl: float = 3600.0,
+                 dimensions: int = 2048):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectorizer = HashedVectorizer(dimensions)
+        self.lock = threading.Lock()
+
+        self.matrix = np.zeros((max(max_size, 0), dimensions), dtype=np.float32)
+        self.values: List[Optional[Any]] = [None] * max(max_size, 0)
+        self.generations: List[Optional[Hashable]] = [None] * max(max_size, 0)
+        self.expires_at = np.zeros(max(max_size, 0), dtype=np.float64)
+        self.last_used = np.zeros(max(max_size, 0), dtype=np.float64)
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def lookup(self, question: str, generation: Hashable) -> Tuple[Optional[Any], np.ndarray]:
+        """
+        (cached value or None, question vector); pass the vector to put()
+        on a miss so it isn't computed twice
+        """
+        vector = self.vectorizer.transform(question)
+        if not self.enabled:
+            return None, vector
+
+        with self.lock:
+            now = time.monotonic()
+            if self.size:
+                similarities = self.matrix[:self.size] @ vector
+                # Expired slots can't match
+                similarities[self.expires_at[:self.size] <= now] = -1.0
+                for slot in np.argsort(similarities)[::-1][:4]:
+                    if similarities[slot] < self.threshold:
+                        break
+                    if self.generations[slot] == generation:
+                        self.last_used[slot] = now
+                        self.hits += 1
+                        return self.values[slot], vector
+            self.misses += 1
+            return None, vector
+
+    def put(self, vector: np.ndarray, generation: Hashable, value: Any) -> None:
+        if not self.enabled or not vector.any():
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            if self.size < self.max_size:
+                slot = self.size
+                self.size += 1
+            else:
+                slot = int(np.argmin(self.last_used))
+                self.evictions += 1
+
+            self.matrix[slot] = vector
+            self.values[slot] = value
+            self.generations[slot] = generation
+            self.expires_at[slot] = now + self.ttl
+            self.last_used[slot] = now
+
+    def clear(self) -> None:
+        with self.lock:
+            self.size = 0
+            self.values = [None] * max(self.max_size, 0)
+            self.generations = [None] * max(self.max_size, 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': self.size,
+            'max_size': self.max_size,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,482 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from services.passage_index import PASSAGE_CANDIDATES_PER_RESULT, PassageIndex, attach_passages, boosted_top_k
+from services.search_index import BM25Index, tokenize
+
+
+SHARD_TIMEOUT = 10.0  # Seconds to wait for a shard before answering from the local index
+PENDING_SEARCHES = 256  # First-phase passage hits a shard keeps for searches in flight
+# Below this many documents a local search is faster than the round trips to the shards
+DEFAULT_MIN_DOCUMENTS = 100000
+
+# The one shard owned by a shard worker process (built by its initializer)
+_shard: Optional['SearchShard'] = None
+
+
+class GlobalStatistics:
+    """
+    Mixin for an index holding part of a corpus: idf and average length
+    come from the whole corpus, so a shard scores each of its documents
+    exactly as the unsharded index would
+    """
+
+    def set_global_statistics(self, n_docs: int, total_length: int, doc_freqs: Dict[str, int]) -> None:
+        self.global_docs = n_docs
+        self.global_length = total_length
+        self.global_doc_freqs = doc_freqs
+
+    def update_global_statistics(self, n_docs: int, total_length: int, doc_freqs: Dict[str, int]) -> None:
+        """Apply corpus-wide statistics after an ingest; doc_freqs holds only the changed terms"""
+        self.global_docs = n_docs
+        self.global_length = total_length
+        for term, doc_freq in doc_freqs.items():
+            if doc_freq:
+                self.global_doc_freqs[term] = doc_freq
+            else:
+                self.global_doc_freqs.pop(term, None)
+        # Every idf and length norm may have changed, so the query engine must rebuild its arrays
+        self.mutations += 1
+
+    @property
+    def avg_doc_length(self) -> float:
+        if not self.global_docs:
+            return 0.0
+        return self.global_length / self.global_docs
+
+    def idf(self, term: str) -> float:
+        doc_freq = self.global_doc_freqs.get(term, 0)
+        return math.log(1 + (self.global_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+class ShardIndex(GlobalStatistics, BM25Index):
+    """BM25Index over one shard's documents, scored with corpus-wide statistics"""
+
+
+class ShardPassageIndex(GlobalStatistics, PassageIndex):
+    """PassageIndex over one shard's topics, scored with corpus-wide statistics"""
+
+
+def index_statistics(index: BM25Index, terms: Optional[Iterable[str]] = None) -> Tuple[int, int, Dict[str, int]]:
+    """(document count, total length, document frequency per term) of a whole index, or of some terms"""
+    if terms is None:
+        terms = index.postings
+    return len(index), index.total_length, {term: len(index.postings.get(term, ())) for term in terms}
+
+
+class SearchShard:
+    """
+    One shard's indexes; lives in a shard worker process.
+
+    Local document ids follow global document ids and local passage ids
+    follow global passage ids, so ties broken by local id inside the shard
+    agree with the unsharded order.
+    """
+
+    def __init__(self, documents: List[Tuple[int, str, Dict[str, Any], str, Optional[int]]],
+                 index_stats: Tuple[int, int, Dict[str, int]],
+                 passage_stats: Optional[Tuple[int, int, Dict[str, int]]]):
+        self.global_ids: List[int] = []
+        self.local_ids: Dict[int, int] = {}
+        self.search_index = ShardIndex()
+        self.search_index.set_global_statistics(*index_stats)
+        local_ids = self.local_ids
+        for global_id, doc_type, data, text, _ in documents:
+            local_ids[global_id] = self.search_index.add_document(doc_type, data, text)
+            self.global_ids.append(global_id)
+
+        self.passage_index = None
+        self.global_passage_ids = array('I')
+        if passage_stats is not None:
+            self.passage_index = ShardPassageIndex()
+            self.passage_index.set_global_statistics(*passage_stats)
+            topics = [document for document in documents if document[4] is not None]
+            for global_id, _, data, _, first_passage in sorted(topics, key=lambda document: document[4]):
+                self.passage_index.add_topic(local_ids[global_id], data)
+                first, stop = self.passage_index.topic_ranges[local_ids[global_id]]
+                self.global_passage_ids.extend(range(first_passage, first_passage + stop - first))
+
+        # Passage hits from the first phase of a search, by request token
+        self.pending_passages: 'OrderedDict[int, List[List[Tuple[int, float]]]]' = OrderedDict()
+
+    def update(self, document: Optional[Tuple[int, Dict[str, Any], str, str, Optional[int]]],
+               index_stats: Tuple[int, int, Dict[str, int]],
+               passage_stats: Optional[Tuple[int, int, Dict[str, int]]]) -> None:
+        """
+        Follow an ingest: take the new corpus-wide statistics and, on the
+        shard owning it, re-index the ingested (global id, topic, text, old
+        text, first global passage id) discourse document. A new document
+        has the highest global id, and its passages the highest global
+        passage ids, so appending keeps local ids in global order.
+        """
+        self.search_index.update_global_statistics(*index_stats)
+        if self.passage_index is not None:
+            self.passage_index.update_global_statistics(*passage_stats)
+        if document is None:
+            return
+
+        global_id, topic, text, old_text, first_passage = document
+        local_id = self.local_ids.get(global_id)
+        old_topic = self.search_index.documents[local_id]['data'] if local_id is not None else None
+        local_id = self.search_index.upsert_document(local_id, 'discourse', topic, text, old_text=old_text,
+                                                     copy_on_write=False)
+        if global_id not in self.local_ids:
+            self.local_ids[global_id] = local_id
+            self.global_ids.append(global_id)
+        if self.passage_index is not None:
+            self.passage_index.replace_topic(local_id, old_topic, topic, copy_on_write=False)
+            first, stop = self.passage_index.topic_ranges[local_id]
+            if stop > first:
+                self.global_passage_ids.extend(range(first_passage, first_passage + stop - first))
+
+    def top_passages(self, queries: List[Tuple[Dict[str, float], int]]) -> List[List[Tuple[int, float]]]:
+        if self.passage_index is None:
+            return [[] for _ in queries]
+        return [
+            self.passage_index.top_k(query_weights, PASSAGE_CANDIDATES_PER_RESULT * top_k)
+            for query_weights, top_k in queries
+        ]
+
+    def gather_passages(self, token: int,
+                        queries: List[Tuple[Dict[str, float], int]]) -> List[List[Tuple[float, int]]]:
+        """First phase: (score, global passage id) of this shard's best boost passages per query"""
+        passage_hits = self.top_passages(queries)
+        self.pending_passages[token] = passage_hits
+        while len(self.pending_passages) > PENDING_SEARCHES:
+            self.pending_passages.popitem(last=False)
+        return [[(score, self.global_passage_ids[passage_id]) for passage_id, score in hits] for hits in passage_hits]
+
+    def search(self, token: int, queries: List[Tuple[Dict[str, float], int]],
+               cutoffs: List[Optional[Tuple[float, int]]]) -> List[List[Tuple[float, int, Dict[str, Any]]]]:
+        """
+        Second phase: (score, global doc id, result dict) for this shard's
+        top_k documents per query, boosted only by passages that made the
+        corpus-wide cut (ordered at or before the cutoff)
+        """
+        passage_hits = self.pending_passages.pop(token, None) or self.top_passages(queries)
+        shard_hits = []
+        for (query_weights, top_k), hits, cutoff in zip(queries, passage_hits, cutoffs):
+            if cutoff is not None:
+                hits = [(passage_id, score) for passage_id, score in hits
+                        if (-score, self.global_passage_ids[passage_id]) <= cutoff]
+            ranked, best_passages = boosted_top_k(self.search_index, self.passage_index, hits, query_weights, top_k)
+            results = attach_passages(self.search_index.results(ranked), best_passages, self.passage_index)
+            query_hits = []
+            for (doc_id, score), result in zip(ranked, results):
+                result['doc_id'] = self.global_ids[doc_id]
+                query_hits.append((score, result['doc_id'], result))
+            shard_hits.append(query_hits)
+        return shard_hits
+
+
+def _init_shard_worker(documents, index_stats, passage_stats) -> None:
+    global _shard
+    _shard = SearchShard(documents, index_stats, passage_stats)
+
+
+def _shard_size() -> int:
+    return len(_shard.search_index)
+
+
+def _update_shard(document, index_stats, passage_stats) -> None:
+    _shard.update(document, index_stats, passage_stats)
+
+
+def _gather_shard_passages(token: int, queries: List[Tuple[Dict[str, float], int]]) -> List[List[Tuple[float, int]]]:
+    return _shard.gather_passages(token, queries)
+
+
+def _search_shard(token: int, queries: List[Tuple[Dict[str, float], int]],
+                  cutoffs: List[Optional[Tuple[float, int]]]) -> List[List[Tuple[float, int, Dict[str, Any]]]]:
+    return _shard.search(token, queries, cutoffs)
+
+
+class ShardedSearch:
+    """
+    Scatter-gather retrieval over a corpus split across worker processes.
+
+    Documents of the active snapshot are dealt round-robin to
+    SEARCH_SHARDS single-process pools, each indexing its share (with
+    passages) using corpus-wide BM25 statistics. A query is sent to every
+    shard at once, and the per-shard top-k lists are merged by score, then
+    global document id, which gives the same ranking as one index.
+
+    Shards are built from a snapshot; when a reload replaces the active
+    snapshot, searches fall back to the local index while the shards are
+    rebuilt in the background. The same happens when a shard worker dies:
+    its pools are dropped and built again. A live ingest doesn't rebuild
+    anything: the ingested document goes to the shard that owns it and
+    the changed corpus statistics to every shard.
+
+    Each search pays two round trips to every shard, so snapshots with
+    fewer than min_documents documents are always searched locally.
+    """
+
+    def __init__(self, answer_generator, shard_count: int, min_documents: int = DEFAULT_MIN_DOCUMENTS):
+        self.answer_generator = answer_generator
+        self.shard_count = max(1, shard_count)
+        self.min_documents = min_documents
+        self.lock = threading.Lock()
+
+        self.pools: List[ProcessPoolExecutor] = []
+        self.shard_sizes: List[int] = []
+        self.has_passages = False
+        self.built_for = None  # The snapshot the shards hold
+        self.tokens = itertools.count(1)
+        self.building = False
+        self.build_seconds: Optional[float] = None
+
+        self.searches = 0
+        self.fallbacks = 0
+        self.failures = 0
+        self.updates = 0
+
+    @classmethod
+    def from_env(cls, answer_generator) -> Optional['ShardedSearch']:
+        """
+        A sharded search attached to answer_generator when SEARCH_SHARDS > 0,
+        else None. Shards are capped at one fewer than the CPU count, since
+        the main process needs a core of its own to merge their results.
+        """
+        shard_count = int(os.getenv('SEARCH_SHARDS', 0))
+        if shard_count <= 0:
+            return None
+        spare_cpus = (os.cpu_count() or 1) - 1
+        if spare_cpus < 1:
+            print("SEARCH_SHARDS ignored: sharded search needs at least 2 CPUs")
+            return None
+        if shard_count > spare_cpus:
+            print(f"SEARCH_SHARDS={shard_count} capped to {spare_cpus} shards, one per spare CPU")
+            shard_count = spare_cpus
+        min_documents = int(os.getenv('SEARCH_SHARD_MIN_DOCUMENTS', DEFAULT_MIN_DOCUMENTS))
+        sharded_search = cls(answer_generator, shard_count, min_documents)
+        answer_generator.sharded_search = sharded_search
+        return sharded_search
+
+    def serves(self, snapshot) -> bool:
+        """
+        Whether the shards hold snapshot; if not, a rebuild is started and
+        the caller should search locally. Snapshots smaller than
+        min_documents are never sharded.
+        """
+        if len(snapshot.search_index) < self.min_documents:
+            return False
+        if self.built_for is snapshot:
+            return True
+        self.fallbacks += 1
+        self.start_build()
+        return False
+
+    def start_build(self) -> None:
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self.build_loop, name='shard-build', daemon=True).start()
+
+    def build_loop(self) -> None:
+        """Rebuild until the shards match the active snapshot"""
+        try:
+            while True:
+                snapshot = self.answer_generator.snapshot
+                if self.built_for is snapshot:
+                    return
+                self.build(snapshot)
+        except Exception as e:
+            self.failures += 1
+            print(f"Error building search shards: {e}")
+        finally:
+            with self.lock:
+                self.building = False
+
+    def build(self, snapshot) -> None:
+        """Start a pool per shard over snapshot's documents and swap them in"""
+        started = time.perf_counter()
+        generator = self.answer_generator
+        passage_index = snapshot.passage_index
+        shards: List[List[Tuple[int, str, Dict[str, Any], str, Optional[int]]]] = [[] for _ in range(self.shard_count)]
+        for doc_id, document in enumerate(snapshot.search_index.documents):
+            data = document['data']
+            first_passage = None
+            if document['type'] == 'discourse':
+                text = generator.discourse_search_text(data)
+                if passage_index is not None:
+                    first_passage = passage_index.first_passage(doc_id)
+            else:
+                text = generator.course_search_text(data)
+            shards[doc_id % self.shard_count].append((doc_id, document['type'], data, text, first_passage))
+
+        index_stats = index_statistics(snapshot.search_index)
+        passage_stats = index_statistics(passage_index) if passage_index is not None else None
+
+        pools = [
+            ProcessPoolExecutor(max_workers=1, initializer=_init_shard_worker,
+                                initargs=(documents, index_stats, passage_stats))
+            for documents in shards
+        ]
+        try:
+            # Wait for every shard to finish indexing before taking traffic
+            shard_sizes = [future.result() for future in [pool.submit(_shard_size) for pool in pools]]
+        except Exception:
+            self.shutdown_pools(pools)
+            raise
+
+        with self.lock:
+            old_pools = self.pools
+            self.pools, self.shard_sizes, self.has_passages = pools, shard_sizes, passage_index is not None
+            self.built_for = snapshot
+        self.build_seconds = time.perf_counter() - started
+        self.shutdown_pools(old_pools)
+        print(f"Search shards ready: {len(pools)} shards, {sum(shard_sizes)} documents in {self.build_seconds:.1f}s")
+
+    def begin_update(self, previous) -> bool:
+        """
+        Claim the shards for an ingest replacing previous, if they hold it
+        and no build is running. Until finish_update() searches use the
+        local index, and none of them starts a rebuild.
+        """
+        with self.lock:
+            if self.building or self.built_for is not previous:
+                return False
+            self.building = True
+            self.built_for = None
+            return True
+
+    def finish_update(self, snapshot, doc_id: int, old_topic: Optional[Dict[str, Any]]) -> None:
+        """
+        Send an ingested document to its shard and the new statistics of
+        the terms it touched to every shard, then serve snapshot
+        """
+        pools = self.pools
+        try:
+            generator = self.answer_generator
+            topic = snapshot.search_index.documents[doc_id]['data']
+            text = generator.discourse_search_text(topic)
+            old_text = generator.discourse_search_text(old_topic) if old_topic is not None else ''
+            index_stats = index_statistics(snapshot.search_index, set(tokenize(text)) | set(tokenize(old_text)))
+
+            passage_index = snapshot.passage_index
+            passage_stats = None
+            first_passage = None
+            if passage_index is not None:
+                passage_terms = set()
+                for changed_topic in (old_topic, topic):
+                    if changed_topic is not None:
+                        for _, _, _, tokens in passage_index.topic_passages(changed_topic):
+                            passage_terms.update(tokens)
+                passage_stats = index_statistics(passage_index, passage_terms)
+                first_passage = passage_index.first_passage(doc_id)
+
+            document = (doc_id, topic, text, old_text, first_passage)
+            owner = doc_id % self.shard_count
+            futures = [
+                pool.submit(_update_shard, document if position == owner else None, index_stats, passage_stats)
+                for position, pool in enumerate(pools)
+            ]
+            for future in futures:
+                future.result(timeout=SHARD_TIMEOUT)
+            if old_topic is None:
+                self.shard_sizes[owner] += 1
+            self.updates += 1
+            self.built_for = snapshot
+        except Exception as e:
+            self.failures += 1
+            print(f"Updating search shards failed, rebuilding them: {e!r}")
+            self.discard(pools)
+        finally:
+            with self.lock:
+                self.building = False
+
+    def search(self, query_weights: Dict[str, float], top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Merged top_k results, or None if a shard failed"""
+        results = self.search_batch([(query_weights, top_k)])
+        return results[0] if results is not None else None
+
+    def search_batch(self, queries: List[Tuple[Dict[str, float], int]]) -> Optional[List[List[Dict[str, Any]]]]:
+        """
+        Fan a list of (query weights, top_k) out to every shard, one
+        message per shard and phase, and merge the answers per query.
+
+        The first phase collects each shard's best boost passages, so the
+        corpus-wide cut can be applied before the shards rank documents in
+        the second; results then match the unsharded index exactly.
+        """
+        pools = self.pools
+        token = next(self.tokens)
+        try:
+            cutoffs: List[Optional[Tuple[float, int]]] = [None] * len(queries)
+            if self.has_passages:
+                futures = [pool.submit(_gather_shard_passages, token, queries) for pool in pools]
+                shard_passages = [future.result(timeout=SHARD_TIMEOUT) for future in futures]
+                cutoffs = [
+                    self.passage_cutoff([passages[query_position] for passages in shard_passages],
+                                        PASSAGE_CANDIDATES_PER_RESULT * top_k)
+                    for query_position, (_, top_k) in enumerate(queries)
+                ]
+
+            futures = [pool.submit(_search_shard, token, queries, cutoffs) for pool in pools]
+            shard_hits = [future.result(timeout=SHARD_TIMEOUT) for future in futures]
+        except Exception as e:
+            self.failures += 1
+            print(f"Sharded search failed, searching locally: {e!r}")
+            self.discard(pools)
+            return None
+
+        self.searches += len(queries)
+        merged = []
+        for query_position, (_, top_k) in enumerate(queries):
+            hits = heapq.merge(*[hits[query_position] for hits in shard_hits], key=lambda hit: (-hit[0], hit[1]))
+            merged.append([result for _, _, result in itertools.islice(hits, top_k)])
+        return merged
+
+    def passage_cutoff(self, shard_passages: List[List[Tuple[float, int]]], count: int) -> Optional[Tuple[float, int]]:
+        """
+        (-score, global passage id) of the count-th best passage across
+        shards, or None when fewer passages matched (all of them count)
+        """
+        passages = heapq.merge(*shard_passages, key=lambda passage: (-passage[0], passage[1]))
+        best = list(itertools.islice(passages, count))
+        if len(best) < count:
+            return None
+        score, passage_id = best[-1]
+        return (-score, passage_id)
+
+    def discard(self, pools: List[ProcessPoolExecutor]) -> None:
+        """
+        Drop pools after one of their shards failed (a dead worker leaves
+        its pool broken for good), so the next search starts a rebuild
+        """
+        with self.lock:
+            if self.pools is not pools:
+                return  # Already replaced by a rebuild
+            self.pools, self.shard_sizes, self.built_for = [], [], None
+        self.shutdown_pools(pools)
+
+    def shutdown_pools(self, pools: List[ProcessPoolExecutor]) -> None:
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self.shutdown_pools(self.pools)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'shards': self.shard_count,
+            'min_documents': self.min_documents,
+            'shard_documents': self.shard_sizes,
+            'snapshot_version': self.built_for.version if self.built_for is not None else None,
+            'building': self.building,
+            'build_seconds': round(self.build_seconds, 4) if self.build_seconds is not None else None,
+            'searches': self.searches,
+            'fallbacks': self.fallbacks,
+            'failures': self.failures,
+            'updates': self.updates
+        }
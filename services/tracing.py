@@ -0,0 +1,155 @@
+import contextvars
+import cProfile
+import functools
+import itertools
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import STAGE_LATENCY
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('request_trace', default=None)
+_trace_ids = itertools.count(1)
+
+
+class RequestTrace:
+    """
+    Timing breakdown and work counters for one traced request.
+
+    Services record into the active trace through timed_stage() and
+    add_trace_counts(); both are no-ops when no trace is active.
+    """
+
+    def __init__(self, reason: str, profile_dir: Optional[str] = None):
+        self.trace_id = f"{int(time.time())}-{os.getpid()}-{next(_trace_ids)}"
+        self.reason = reason
+        self.profile_dir = profile_dir
+        self.profile_path: Optional[str] = None
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_counts(self, **counts: int) -> None:
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self.started
+
+    def profile_call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func under cProfile and dump the stats into profile_dir
+
+        The .prof file loads in pstats, snakeviz, or flameprof for a flamegraph.
+        """
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args)
+        finally:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self.profile_path = os.path.join(self.profile_dir, f"trace-{self.trace_id}.prof")
+            profiler.dump_stats(self.profile_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'reason': self.reason,
+            'total_ms': round((self.total_seconds or 0.0) * 1000, 3),
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            'counts': dict(self.counts),
+            'profile': self.profile_path
+        }
+
+
+class TraceSampler:
+    """
+    Decides which requests are traced: explicitly via header (when allowed)
+    or randomly at sample_rate. profile_dir enables cProfile dumps.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, allow_header: bool = False, profile_dir: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.profile_dir = profile_dir or None
+
+    @classmethod
+    def from_env(cls) -> 'TraceSampler':
+        """
+        Configure from TRACE_SAMPLE_RATE, TRACE_ALLOW_HEADER and TRACE_PROFILE_DIR
+        """
+        return cls(
+            sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', 0)),
+            allow_header=os.getenv('TRACE_ALLOW_HEADER', 'False').lower() == 'true',
+            profile_dir=os.getenv('TRACE_PROFILE_DIR')
+        )
+
+    def start(self, trace_header: Optional[str] = None, profile_header: Optional[str] = None) -> Optional[RequestTrace]:
+        """
+        Begin a trace for this request if it is requested or sampled
+        """
+        requested = self.allow_header and trace_header is not None and trace_header.lower() in ('1', 'true')
+        if requested:
+            wants_profile = profile_header is not None and profile_header.lower() in ('1', 'true')
+            trace = RequestTrace('header', self.profile_dir if wants_profile else None)
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace = RequestTrace('sampled', self.profile_dir)
+        else:
+            return None
+
+        _current_trace.set(trace)
+        return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def profiled(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Run func under cProfile when the active trace asks for a profile
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any) -> Any:
+        trace = _current_trace.get()
+        if trace is None or trace.profile_dir is None or trace.profile_path is not None:
+            return func(*args)
+        return trace.profile_call(func, *args)
+    return wrapper
+
+
+class timed_stage:
+    """
+    Context manager recording a stage into the latency histogram and, when
+    a trace is active, into the request trace
+    """
+
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> 'timed_stage':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        observe_stage(self.stage, time.perf_counter() - self.started)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_LATENCY.observe(seconds, stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_stage(stage, seconds)
+
+
+def add_trace_counts(**counts: int) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_counts(**counts)
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+import app
+from models.response_models import AnswerResponse, BatchAnswerResponse
+from services import answer_encoding
+from services.answer_encoding import answer_payload, encode_answer, encode_batch, with_encoding
+from services.answer_generator import FALLBACK_ANSWER
+from services.answer_rules import AnswerRuleBook
+
+
+CONTEXTUAL_ANSWER = {
+    'answer': 'Use Podman — Docker works too. Scores are out of 10/10 “as announced”.',
+    'links': [{'url': 'https://example.com/t/1', 'title': 'Docker vs Podman'}, {'url': 'https://example.com/t/2'}],
+    'context': [{'title': 'not part of the response'}]
+}
+
+
+def json_response_body(answer_data: dict) -> bytes:
+    """What the routes sent before: the response model through FastAPI's JSONResponse"""
+    links = [{'url': link['url'], 'text': link.get('text', link.get('title', 'Link'))} for link in answer_data['links']]
+    return JSONResponse(jsonable_encoder(AnswerResponse(answer=answer_data['answer'], links=links))).body
+
+
+def canned_answers() -> list:
+    answers = [answer for category in AnswerRuleBook().answers.values() for answer in category.values()]
+    return answers + [FALLBACK_ANSWER]
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_encoded_answers_match_the_json_response(use_orjson, monkeypatch):
+    if not use_orjson:
+        monkeypatch.setattr(answer_encoding, 'orjson', None)
+    for answer_data in canned_answers() + [CONTEXTUAL_ANSWER]:
+        assert encode_answer(with_encoding(answer_data)) == json_response_body(answer_data)
+        assert encode_answer(answer_data) == json_response_body(answer_data)
+
+
+def test_batches_are_joined_from_encoded_answers():
+    answers = canned_answers()[:2] + [CONTEXTUAL_ANSWER]
+    body = encode_batch([encode_answer(answer_data) for answer_data in answers])
+    expected = BatchAnswerResponse(answers=[answer_payload(answer_data) for answer_data in answers])
+    assert json.loads(body) == jsonable_encoder(expected)
+    assert encode_batch([]) == b'{"answers":[]}'
+
+
+def test_canned_answers_are_served_as_pre_encoded_bytes():
+    rule_book = app.answer_rules
+    answer_key, groups = rule_book.rules[0]
+    question = ' '.join(group[0] for group in groups)
+    response = TestClient(app.app).post('/api/', json={'question': question})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    assert response.content == rule_book.lookup(answer_key)['encoded']
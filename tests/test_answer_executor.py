@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from services.answer_executor import AnswerExecutor, ExecutorSaturated
+
+
+def blocking_stream(release: threading.Event):
+    def stream_pipeline(question, image_b64, top_k=None):
+        yield {'type': 'answer', 'text': question}
+        release.wait(5)
+        yield {'type': 'done', 'answer_data': {'answer': question, 'links': []}}
+    return stream_pipeline
+
+
+def test_stream_events_arrive_while_the_job_runs():
+    release = threading.Event()
+    executor = AnswerExecutor(None, stream_pipeline=blocking_stream(release), max_workers=1)
+
+    async def consume():
+        events = executor.stream("first")
+        first = await events.__anext__()
+        # The job is still blocked, yet its first event is already here
+        assert not release.is_set()
+        release.set()
+        return [first] + [event async for event in events]
+
+    try:
+        events = asyncio.run(consume())
+    finally:
+        executor.shutdown()
+    assert [event['type'] for event in events] == ['answer', 'done']
+    assert executor.pending == 0 and executor.completed == 1
+
+
+def test_stream_is_refused_when_the_queue_is_full():
+    release = threading.Event()
+    executor = AnswerExecutor(None, stream_pipeline=blocking_stream(release), max_workers=1, max_queue=0)
+
+    async def overload():
+        events = executor.stream("first")
+        # Admission happens when the stream is created, before any event is awaited
+        with pytest.raises(ExecutorSaturated):
+            executor.stream("second")
+        release.set()
+        return [event async for event in events]
+
+    try:
+        asyncio.run(overload())
+    finally:
+        executor.shutdown()
+    assert executor.rejected == 1
+
+
+def test_api_answers_503_with_retry_after_when_the_queue_is_full(monkeypatch):
+    executor = AnswerExecutor(app.answer_pipeline, app.answer_batch_pipeline, app.answer_stream_pipeline,
+                              max_workers=1, max_queue=0, retry_after=7)
+    monkeypatch.setattr(app, 'answer_executor', executor)
+    # The only worker is taken by a job that is still running
+    executor.pending = 1
+    client = TestClient(app.app)
+
+    try:
+        response = client.post('/api/', json={'question': 'Is the queue full for GA4?'})
+        assert response.status_code == 503 and response.headers['Retry-After'] == '7'
+        response = client.post('/api/batch', json={'questions': [
+            {'question': 'Is the queue full for GA5?'}, {'question': 'And for GA6?'}
+        ]})
+        assert response.status_code == 503 and response.headers['Retry-After'] == '7'
+
+        stats = client.get('/api/stats').json()['executor']
+        assert stats['rejected'] == 2 and stats['submitted'] == 0
+
+        # Once the worker is free the same question is answered
+        executor.pending = 0
+        assert client.post('/api/', json={'question': 'Is the queue full for GA4?'}).status_code == 200
+    finally:
+        executor.shutdown()
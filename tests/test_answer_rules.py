@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+from services.answer_generator import AnswerGenerator
+from services.answer_rules import AnswerRuleBook
+from services.question_processor import QuestionProcessor
+
+
+def write_rules(path, phrase: str, mtime: float) -> None:
+    path.write_text(json.dumps({'rules': [
+        {'key': 'faq.answer', 'match_all': [[phrase]], 'answer': f"About {phrase}."}
+    ]}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_requests_never_read_the_rules_file(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    write_rules(rules_file, 'kubernetes', 1000)
+    processor = QuestionProcessor(AnswerRuleBook(str(rules_file), reload_interval=0))
+
+    rules_file.unlink()
+    assert processor.process_question("what about kubernetes")['predefined_answer_key'] == 'faq.answer'
+
+
+def test_watcher_swaps_in_edited_rules(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    write_rules(rules_file, 'kubernetes', 1000)
+    answer_rules = AnswerRuleBook(str(rules_file), reload_interval=0.01)
+    processor = QuestionProcessor(answer_rules)
+    answer_rules.start()
+    try:
+        write_rules(rules_file, 'terraform', 2000)
+        deadline = time.monotonic() + 5
+        while answer_rules.version < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert processor.process_question("what about terraform")['predefined_answer_key'] == 'faq.answer'
+        assert processor.process_question("what about kubernetes")['predefined_answer_key'] is None
+        # The typo index is rebuilt with the matcher
+        assert 'terraform' in processor.keyword_vocabulary
+    finally:
+        answer_rules.stop()
+
+
+def test_questions_without_a_matched_key_are_matched_on_their_text(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    write_rules(rules_file, 'kubernetes', 1000)
+    generator = AnswerGenerator(AnswerRuleBook(str(rules_file), reload_interval=0))
+
+    processed_question = {'original_question': "What about Kubernetes?"}
+    assert generator.find_predefined_answer(processed_question)['answer'] == "About kubernetes."
+    assert generator.get_predefined_answer("what about terraform") is None
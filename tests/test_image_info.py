@@ -0,0 +1,95 @@
+import base64
+import struct
+import zlib
+
+from fastapi.testclient import TestClient
+
+import app
+from services.image_info import decoded_size, sniff_image
+from services.question_processor import QuestionProcessor
+
+
+# Lossy and lossless 1x1 WebP images
+WEBP_LOSSY = 'UklGRiIAAABXRUJQVlA4IBYAAAAwAQCdASoBAAEADsD+JaQAA3AAAAAA'
+WEBP_LOSSLESS = 'UklGRhoAAABXRUJQVlA4TA0AAAAvAAAAEAcQERGIiP4HAA=='
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    """A black greyscale PNG"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + b'\x00' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+def jpeg_bytes(width: int, height: int) -> bytes:
+    """
+    A grey baseline JPEG: every 8x8 block has a zero DC difference and no AC
+    terms, each coded by the only (1-bit) code of its Huffman table.
+    A padding APP1 segment sits before the frame header, like EXIF data.
+    """
+    def segment(marker: int, data: bytes) -> bytes:
+        return bytes([0xFF, marker]) + struct.pack('>H', len(data) + 2) + data
+
+    blocks = ((width + 7) // 8) * ((height + 7) // 8)
+    bits = '00' * blocks
+    bits += '1' * (-len(bits) % 8)
+    scan = int(bits, 2).to_bytes(len(bits) // 8, 'big').replace(b'\xff', b'\xff\x00')
+    one_code = bytes([1] + [0] * 15)
+    return (b'\xff\xd8'
+            + segment(0xE0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00')
+            + segment(0xE1, b'Exif\x00\x00' + b'\x00' * 300)
+            + segment(0xDB, b'\x00' + b'\x01' * 64)
+            + segment(0xC0, struct.pack('>BHHB', 8, height, width, 1) + b'\x01\x11\x00')
+            + segment(0xC4, b'\x00' + one_code + b'\x00')
+            + segment(0xC4, b'\x10' + one_code + b'\x00')
+            + segment(0xDA, b'\x01\x01\x00\x00\x3f\x00')
+            + scan + b'\xff\xd9')
+
+
+def encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def test_sniffs_format_and_dimensions():
+    assert sniff_image(encode(png_bytes(5, 3))) == {'format': 'png', 'width': 5, 'height': 3}
+    assert sniff_image(encode(jpeg_bytes(24, 16))) == {'format': 'jpeg', 'width': 24, 'height': 16}
+    assert sniff_image(WEBP_LOSSY) == {'format': 'webp', 'width': 1, 'height': 1}
+    assert sniff_image(WEBP_LOSSLESS) == {'format': 'webp', 'width': 1, 'height': 1}
+    assert sniff_image(encode(b'GIF89a' + b'\x00' * 20)) == {'format': 'unknown', 'width': None, 'height': None}
+
+
+def test_size_is_measured_without_decoding():
+    image = png_bytes(5, 3)
+    image_b64 = encode(image)
+    assert decoded_size(image_b64) == len(image)
+    # Data URLs, line breaks and missing padding don't change the size
+    wrapped = '\n'.join(image_b64[start:start + 76] for start in range(0, len(image_b64), 76))
+    assert decoded_size('data:image/png;base64,' + wrapped) == len(image)
+    assert decoded_size(image_b64.rstrip('=')) == len(image)
+    assert sniff_image('data:image/png;base64,' + wrapped)['width'] == 5
+
+
+def test_truncated_and_invalid_images():
+    processor = QuestionProcessor()
+    # Cut off inside the IHDR chunk: the format is known, the dimensions aren't
+    truncated = encode(png_bytes(5, 3)[:20])
+    assert processor.process_image(truncated) == {'size_bytes': 20, 'format': 'png', 'width': None, 'height': None}
+    assert sniff_image(encode(jpeg_bytes(24, 16)[:200]))['width'] is None
+    # Not base64 at all
+    assert processor.process_image('iVBORw0KGgo&&&') is None
+
+
+def test_oversize_images_are_refused_with_413(monkeypatch):
+    image_b64 = encode(png_bytes(64, 64))
+    monkeypatch.setattr(app.question_processor, 'max_image_bytes', decoded_size(image_b64) - 1)
+    client = TestClient(app.app)
+
+    response = client.post('/api/', json={'question': 'What is in this image?', 'image': image_b64})
+    assert response.status_code == 413
+    response = client.post('/api/batch', json={'questions': [
+        {'question': 'What is GA5?'}, {'question': 'What is in this image?', 'image': image_b64}
+    ]})
+    assert response.status_code == 413
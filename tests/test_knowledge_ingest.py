@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from compile_knowledge import compile_snapshot, snapshot_is_current
+from services.answer_generator import AnswerGenerator
+from services.knowledge_ingest import IngestUnavailable, KnowledgeIngestor
+
+
+def zygomorphic_topic() -> dict:
+    return {
+        'id': 990001,
+        'title': 'Zygomorphic plots',
+        'posts': [{'id': 1, 'content': 'Use zygomorphic petals for the chart', 'accepted': True}]
+    }
+
+
+def search_titles(generator: AnswerGenerator, question: str) -> list:
+    processed_question = {'keywords': [], 'cleaned_question': question, 'top_k': 3}
+    return [result['data']['title'] for result in generator.search_enhanced_content(processed_question)]
+
+
+def test_compiled_snapshot_folds_in_the_ingest_log(tmp_path, monkeypatch):
+    snapshot_path = tmp_path / 'knowledge_base.bin'
+    monkeypatch.setenv('INGEST_LOG_PATH', str(tmp_path / 'ingest_log.jsonl'))
+    monkeypatch.setenv('KNOWLEDGE_SNAPSHOT_PATH', str(snapshot_path))
+
+    live = AnswerGenerator(use_compiled_snapshot=False)
+    live_ingestor = KnowledgeIngestor(live)
+    live_ingestor.attach()
+    live_ingestor.ingest_topic(zygomorphic_topic())
+    live_ingestor.ingest_post(163147, {'id': 2, 'username': 'ta', 'content': 'The xylophone chapter is optional'})
+
+    compile_snapshot(str(snapshot_path))
+    assert snapshot_is_current(str(snapshot_path))
+
+    served = AnswerGenerator()
+    KnowledgeIngestor(served).attach()
+    # The log is already in the compiled snapshot, so it stays memory-mapped
+    assert served.snapshot.source == 'compiled'
+    assert served.snapshot.search_index.read_only
+    for question in ('zygomorphic petals chart', 'xylophone chapter'):
+        assert search_titles(served, question) == search_titles(live, question)
+        assert search_titles(served, question)
+
+    # A later ingest makes the compiled snapshot stale
+    live_ingestor.ingest_post(990001, {'id': 3, 'content': 'Another reply'})
+    assert not snapshot_is_current(str(snapshot_path))
+    restarted = AnswerGenerator()
+    KnowledgeIngestor(restarted).attach()
+    assert restarted.snapshot.source == 'json'
+
+
+def test_ingest_publishes_a_new_snapshot(tmp_path):
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    ingestor = KnowledgeIngestor(generator, log_path=str(tmp_path / 'ingest_log.jsonl'))
+    ingestor.attach()
+    previous = generator.snapshot
+
+    ingestor.ingest_topic(zygomorphic_topic())
+
+    snapshot = generator.snapshot
+    assert snapshot is not previous and snapshot.version == previous.version + 1
+    assert search_titles(generator, 'zygomorphic petals') == ['Zygomorphic plots']
+    # Requests still holding the previous snapshot never see the ingest
+    assert 'zygomorphic' not in previous.search_index.postings
+    assert 'zygomorphic' not in previous.passage_index.postings
+    assert len(snapshot.discourse_posts) == len(previous.discourse_posts) + 1
+    assert snapshot.discourse_posts[-1]['title'] == 'Zygomorphic plots'
+
+
+def test_failed_log_write_changes_nothing(tmp_path, monkeypatch):
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    ingestor = KnowledgeIngestor(generator, log_path=str(tmp_path / 'ingest_log.jsonl'))
+    ingestor.attach()
+    previous = generator.snapshot
+
+    def full_disk(entry):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(ingestor.log, 'append', full_disk)
+    with pytest.raises(OSError):
+        ingestor.ingest_topic(zygomorphic_topic())
+
+    assert generator.snapshot is previous
+    assert ingestor.revision == 0 and ingestor.log_entries == 0
+    assert search_titles(generator, 'zygomorphic petals') != ['Zygomorphic plots']
+
+
+def test_ingest_on_a_compiled_snapshot_rebuilds_off_the_request(tmp_path, monkeypatch):
+    snapshot_path = tmp_path / 'knowledge_base.bin'
+    monkeypatch.setenv('KNOWLEDGE_SNAPSHOT_PATH', str(snapshot_path))
+    monkeypatch.setenv('INGEST_LOG_PATH', str(tmp_path / 'ingest_log.jsonl'))
+    compile_snapshot(str(snapshot_path))
+
+    generator = AnswerGenerator()
+    ingestor = KnowledgeIngestor(generator)
+    ingestor.attach()
+    assert generator.snapshot.search_index.read_only
+
+    with pytest.raises(IngestUnavailable):
+        ingestor.ingest_topic(zygomorphic_topic())
+    deadline = time.monotonic() + 60
+    while ingestor.rebuilding and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert not generator.snapshot.search_index.read_only
+    # Later reloads still prefer the compiled snapshot
+    assert generator.use_compiled_snapshot
+    ingestor.ingest_topic(zygomorphic_topic())
+    assert search_titles(generator, 'zygomorphic petals') == ['Zygomorphic plots']
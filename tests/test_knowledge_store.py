@@ -0,0 +1,40 @@
+from compile_knowledge import compile_snapshot, snapshot_is_current
+from services.answer_generator import AnswerGenerator
+from services.knowledge_store import MappedBM25Index
+
+
+QUESTIONS = (
+    'docker or podman for the project',
+    'when is the GA5 deadline',
+    'should I use gpt-4o-mini or gpt-3.5-turbo',
+    'how is the end term exam graded',
+    'uv pip install',
+    'zyzzyva'
+)
+
+
+def test_compiled_snapshot_searches_like_the_json_build(tmp_path, monkeypatch):
+    snapshot_path = str(tmp_path / 'knowledge_base.bin')
+    # No ingest log at all
+    monkeypatch.setenv('INGEST_LOG_PATH', str(tmp_path / 'ingest_log.jsonl'))
+    monkeypatch.setenv('KNOWLEDGE_SNAPSHOT_PATH', snapshot_path)
+
+    compile_snapshot(snapshot_path)
+    assert snapshot_is_current(snapshot_path)
+
+    built = AnswerGenerator(use_compiled_snapshot=False)
+    compiled = AnswerGenerator()
+    assert compiled.snapshot.source == 'compiled'
+    assert isinstance(compiled.snapshot.search_index, MappedBM25Index)
+    assert len(compiled.snapshot.search_index) == len(built.snapshot.search_index)
+    assert list(compiled.snapshot.discourse_posts) == list(built.snapshot.discourse_posts)
+    assert list(compiled.snapshot.course_content) == list(built.snapshot.course_content)
+
+    for question in QUESTIONS:
+        for top_k in (1, 3, 10):
+            processed_question = {'keywords': [], 'cleaned_question': question, 'top_k': top_k}
+            assert compiled.search_enhanced_content(processed_question) == built.search_enhanced_content(processed_question)
+
+    weights = [built.build_query_weights({'keywords': [], 'cleaned_question': question}) for question in QUESTIONS]
+    queries = [(query_weights, 5) for query_weights in weights]
+    assert compiled.rank_local_batch(compiled.snapshot, queries) == built.rank_local_batch(built.snapshot, queries)
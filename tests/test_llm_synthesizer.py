@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app
+from benchmarks.mock_openai_server import make_server
+from services.llm_synthesizer import LLMSynthesizer
+
+
+CONTEXT = [{'title': 'GA5 deadline', 'url': 'https://example.com/t/ga5/1', 'text': 'GA5 is due on Sunday.'}]
+
+
+@pytest.fixture
+def slow_openai():
+    """The mock chat completions server, answering after one second"""
+    server = make_server(0, latency=1.0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def synthesizer_for(server, deadline: float) -> LLMSynthesizer:
+    return LLMSynthesizer(base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", deadline=deadline)
+
+
+def test_slow_model_falls_back_within_the_deadline(slow_openai, monkeypatch):
+    synthesizer = synthesizer_for(slow_openai, deadline=0.2)
+    monkeypatch.setattr(app, 'llm_synthesizer', synthesizer)
+    retrieval_answer = {'answer': 'GA5 is due on Sunday.', 'links': [], 'context': CONTEXT}
+
+    async def run():
+        synthesizer.start()
+        started = time.perf_counter()
+        answer_data = await app.synthesize_answer('When is GA5 due?', retrieval_answer, started)
+        elapsed = time.perf_counter() - started
+        await synthesizer.close()
+        return answer_data, elapsed
+
+    answer_data, elapsed = asyncio.run(run())
+    assert answer_data is retrieval_answer
+    assert elapsed < 0.5
+
+
+def test_identical_prompts_share_one_upstream_call(slow_openai):
+    synthesizer = synthesizer_for(slow_openai, deadline=5.0)
+
+    async def run():
+        synthesizer.start()
+        answers = await asyncio.gather(*[synthesizer.synthesize('When is GA5 due?', CONTEXT) for _ in range(8)])
+        await synthesizer.close()
+        return answers
+
+    answers = asyncio.run(run())
+    assert len(set(answers)) == 1 and answers[0].startswith('(mock)')
+    assert slow_openai.RequestHandlerClass.completions == 1
@@ -0,0 +1,66 @@
+from services.passage_index import REMOVED, PassageIndex, passage_spans
+from services.search_index import BM25Index
+
+
+def numbered_words(count: int) -> str:
+    return ' '.join(f"w{number}" for number in range(count))
+
+
+def thread(replies: list) -> dict:
+    return {
+        'id': 7,
+        'title': 'Which container runtime?',
+        'posts': [{'id': 1, 'username': 'student', 'content': 'Should I use docker or podman for the project?'}]
+                 + [{'id': number, 'username': 'ta', 'content': content} for number, content in enumerate(replies, 2)]
+    }
+
+
+def test_windows_overlap_and_cover_the_whole_post():
+    text = numbered_words(210)
+    spans = passage_spans(text, window=80, stride=60)
+    windows = [text[start:end].split() for start, end in spans]
+    assert [len(words) for words in windows] == [80, 80, 80, 30]
+    assert [words[0] for words in windows] == ['w0', 'w60', 'w120', 'w180']
+    # Neighbouring windows share 20 words, and the last one ends the post
+    assert windows[0][-20:] == windows[1][:20]
+    assert windows[-1][-1] == 'w209'
+
+    assert passage_spans('too short  to split', window=80, stride=60) == [(0, 19)]
+    assert passage_spans('', window=80, stride=60) == []
+    # A post that fits exactly is one window, not a window plus a stub
+    assert len(passage_spans(numbered_words(140), window=80, stride=60)) == 2
+
+
+def test_best_passage_is_the_matching_reply():
+    topic = thread(['Podman is fine, but ' + numbered_words(100) + ' use docker compose for the project'])
+    index = PassageIndex()
+    index.add_topic(0, topic)
+    # The question and two windows of the reply; no text is stored
+    assert len(index) == 3
+    assert list(index.passage_posts) == [0, 1, 1]
+
+    best = index.best_passages(index.score_terms({'docker': 1.0, 'compose': 1.0}))
+    snippet = index.passage(best[0]['snippet'], topic)
+    assert snippet['post_id'] == 2 and snippet['username'] == 'ta'
+    assert snippet['text'].endswith('use docker compose for the project')
+    assert best[0]['score'] >= best[0]['snippet_score'] > 0
+
+    # The question alone matches: it boosts the topic but is never the snippet
+    best = index.best_passages(index.score_terms({'should': 1.0}))
+    assert best[0]['score'] > 0 and best[0]['snippet'] is None
+
+
+def test_replacing_a_topic_drops_its_old_passages():
+    old_topic = thread(['Use docker'])
+    index = PassageIndex()
+    search_index = BM25Index()
+    doc_id = search_index.add_document('discourse', old_topic, old_topic['title'])
+    index.add_topic(doc_id, old_topic)
+
+    new_topic = thread(['Use podman instead'])
+    index.replace_topic(doc_id, old_topic, new_topic)
+    assert list(index.passage_topics) == [REMOVED, REMOVED, doc_id, doc_id]
+    assert len(index) == 2
+    assert index.score_terms({'docker': 1.0}).keys() == {2}
+    best = index.best_passages(index.score_terms({'podman': 1.0}))
+    assert index.passage(best[doc_id]['snippet'], new_topic)['text'] == 'Use podman instead'
@@ -0,0 +1,84 @@
+import threading
+
+from services.passage_index import PassageIndex, passage_boosted_top_k, passage_boosted_top_k_batch
+from services.search_index import BM25Index
+
+
+def topic(topic_id: int, words: str) -> dict:
+    return {
+        'id': topic_id,
+        'title': f"topic {topic_id}",
+        'posts': [
+            {'id': 1, 'content': f"question about {words}"},
+            {'id': 2, 'content': f"answer about {words} and the assignment deadline"}
+        ]
+    }
+
+
+def test_search_during_live_ingest():
+    """Searches running alongside ingests never see postings newer than the doc lengths they use"""
+    index = BM25Index()
+    passage_index = PassageIndex()
+    for topic_id in range(50):
+        data = topic(topic_id, 'docker setup')
+        doc_id = index.add_document('discourse', data, f"{data['title']} docker setup")
+        passage_index.add_topic(doc_id, data)
+
+    stop = threading.Event()
+    errors = []
+
+    def search():
+        step = 0
+        while not stop.is_set():
+            query = {'assignment': 1.0, 'deadline': 1.0, f"term{step % 200}": 1.0}
+            try:
+                passage_boosted_top_k(index, passage_index, query, 3)
+            except Exception as e:
+                errors.append(e)
+                return
+            step += 1
+
+    searcher = threading.Thread(target=search)
+    searcher.start()
+    try:
+        for topic_id in range(50, 250):
+            words = f"term{topic_id - 50} assignment"
+            data = topic(topic_id, words)
+            doc_id = index.upsert_document(None, 'discourse', data, f"{data['title']} {words}")
+            passage_index.replace_topic(doc_id, None, data)
+            # Re-ingest an existing topic too, replacing its passages
+            old = topic(topic_id % 50, 'docker setup')
+            passage_index.replace_topic(topic_id % 50, old, topic(topic_id % 50, words))
+            old_text = f"{old['title']} docker setup"
+            index.upsert_document(topic_id % 50, 'discourse', old, f"{old['title']} {words}", old_text=old_text)
+    finally:
+        stop.set()
+        searcher.join()
+
+    assert errors == []
+    # The last ingest is searchable, both as a new topic and as a rewritten one
+    assert {doc_id for doc_id, _ in index.top_k({'term199': 1.0}, 3)} == {49, 249}
+
+
+def test_top_k_matches_exhaustive_scores():
+    index = BM25Index()
+    for doc_id in range(300):
+        index.add_document('course', {'n': doc_id}, ' '.join(['tds'] * (doc_id % 7 + 1) + ['word'] * (doc_id % 3)))
+    query = {'tds': 1.0, 'word': 0.5}
+    scores = index.score_terms(query)
+    expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:5]
+    assert index.top_k(query, 5) == expected
+
+
+def test_batch_matches_single_queries():
+    index = BM25Index()
+    passage_index = PassageIndex()
+    for topic_id in range(40):
+        words = ' '.join(['docker', 'podman', 'assignment', 'deadline'][:topic_id % 4 + 1])
+        data = topic(topic_id, words)
+        doc_id = index.add_document('discourse', data, f"{data['title']} {words}")
+        passage_index.add_topic(doc_id, data)
+
+    queries = [({'docker': 1.0}, 3), ({'assignment': 1.0, 'deadline': 0.8}, 5), ({'missing': 1.0}, 3), ({'docker': 1.0}, 1)]
+    batch = passage_boosted_top_k_batch(index, passage_index, queries)
+    assert batch == [passage_boosted_top_k(index, passage_index, query_weights, k) for query_weights, k in queries]
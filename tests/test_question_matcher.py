@@ -0,0 +1,37 @@
+import random
+
+from benchmarks.bench_question_matching import SAMPLE_QUESTIONS, LegacyMatcher
+from services.phrase_matcher import PhraseMatcher
+from services.question_processor import QuestionProcessor
+
+
+# Overlapping phrases, phrases inside other phrases and inside longer words
+PHRASES = ['he', 'she', 'his', 'hers', 'ga4', 'ga', 'gpt', 'gpt-4', 'gpt-4o-mini', 'o-m', 'when is', 'is']
+
+EXTRA_QUESTIONS = [
+    "GA4 and ga5: which GPT4 or gpt-3.5 model should the dashboard use?",
+    "Is the end-term exam graded? When is it due?",
+    "Can I use a container instead of Docker for project 1?",
+    "gpt-3.5-turbo-0125 vs gpt-4o-mini for GA10",
+    "",
+]
+
+
+def test_phrase_matcher_finds_every_substring_match():
+    matcher = PhraseMatcher(PHRASES)
+    rng = random.Random(7)
+    alphabet = 'ehirsga45pt-o m'
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert matcher.find_all(text) == {phrase for phrase in PHRASES if phrase in text}, text
+
+
+def test_question_matcher_agrees_with_the_separate_substring_checks():
+    processor = QuestionProcessor()
+    matcher = processor.question_matcher
+    legacy = LegacyMatcher(processor.common_tds_keywords, processor.answer_rules.rules)
+    for question in SAMPLE_QUESTIONS + EXTRA_QUESTIONS:
+        result = matcher.match(question)
+        assert sorted(result['keywords']) == sorted(legacy.extract_keywords(question)), question
+        assert result['question_type'] == legacy.classify_question(question), question
+        assert result['predefined_answer_key'] == legacy.get_predefined_answer_key(question), question
@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import response_cache as response_cache_module
+from services.response_cache import ResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResponseCache(max_size=4, ttl=10)
+    cache.put('ga5', b'GA5 answer')
+    clock.now += 9.9
+    assert cache.get('ga5') == (True, b'GA5 answer')
+    clock.now += 0.1
+    assert cache.get('ga5') == (False, None)
+    assert cache.expirations == 1 and len(cache.entries) == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ResponseCache(max_size=2, ttl=10)
+    cache.put('ga4', 1)
+    cache.put('ga5', 2)
+    # Reading ga4 makes ga5 the least recently used
+    assert cache.get('ga4') == (True, 1)
+    cache.put('ga6', 3)
+    assert cache.get('ga5') == (False, None)
+    assert cache.get('ga4') == (True, 1) and cache.get('ga6') == (True, 3)
+    assert cache.evictions == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache(max_size=4, ttl=10)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b'answer'
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_compute('ga5', compute) for _ in range(10)])
+
+    assert asyncio.run(run()) == [b'answer'] * 10
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 9)
+    assert asyncio.run(cache.get_or_compute('ga5', compute)) == b'answer' and cache.hits == 1
+
+
+def test_failed_computations_reach_every_waiter_and_are_not_cached():
+    cache = ResponseCache(max_size=4, ttl=10)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('search failed')
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_compute('ga5', compute) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get('ga5') == (False, None) and not cache.in_flight
+
+
+def test_cache_keys_separate_images_and_versions():
+    assert make_cache_key('what is ga5', None, 1) != make_cache_key('what is ga5', 'iVBORw0KGgo=', 1)
+    assert make_cache_key('what is ga5', None, 1) != make_cache_key('what is ga5', None, 2)
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+import pytest
+
+from scraper.discourse_scraper import DiscourseScraper
+from scraper.fixture_server import make_server
+
+
+TOPICS = [
+    {
+        'id': 101,
+        'title': 'Docker or Podman for the project?',
+        'category': 'courses/tds-kb',
+        'posts': [
+            {'id': 1001, 'username': 'student', 'content': 'Which one should I use?', 'created_at': '2025-04-01T10:00:00Z'},
+            {'id': 1002, 'username': 'ta', 'content': 'Either works.', 'created_at': '2025-04-01T11:00:00Z'}
+        ]
+    },
+    {
+        'id': 102,
+        'title': 'GA5 deadline',
+        'category': 'courses/tds-kb',
+        'posts': [
+            {'id': 1003, 'username': 'student', 'content': 'Is GA5 extended?', 'created_at': '2025-04-02T10:00:00Z'}
+        ]
+    }
+]
+
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    """The fixture site on a free port, recording the headers of every GET"""
+    discourse_path = tmp_path / 'discourse_posts.json'
+    discourse_path.write_text(json.dumps(TOPICS), encoding='utf-8')
+    server = make_server(0, str(discourse_path), str(tmp_path / 'course_content.json'))
+
+    requests_seen = []
+
+    class RecordingHandler(server.RequestHandlerClass):
+        def send_response(self, code, message=None):
+            requests_seen.append({'path': self.path.split('?')[0], 'headers': dict(self.headers), 'status': code})
+            super().send_response(code, message)
+
+    server.RequestHandlerClass = RecordingHandler
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", requests_seen
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def topic_mtimes(output_dir) -> dict:
+    topics_dir = os.path.join(output_dir, 'discourse_topics')
+    return {name: os.stat(os.path.join(topics_dir, name)).st_mtime_ns for name in os.listdir(topics_dir)}
+
+
+def test_rescrape_sends_validators_and_rewrites_nothing(fixture_server, tmp_path):
+    base_url, requests_seen = fixture_server
+    output_dir = str(tmp_path / 'scraped')
+
+    first = DiscourseScraper(base_url, output_dir=output_dir, max_workers=2).run()
+    assert first['topics_updated'] == len(TOPICS) and first['not_modified'] == 0
+    written = topic_mtimes(output_dir)
+    assert sorted(written) == ['101.json', '102.json']
+
+    # Forget one topic's post count, so the rerun asks the server for it again
+    state_path = os.path.join(output_dir, '.discourse_state.json')
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    state['topics']['101']['highest_post_number'] = 1
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    requests_seen.clear()
+    second = DiscourseScraper(base_url, output_dir=output_dir, max_workers=2).run()
+
+    # Listings are fetched unconditionally; the categories and the topic are not
+    conditional = {request['path']: request for request in requests_seen if request['path'] != '/latest.json'}
+    assert set(conditional) == {'/categories.json', '/t/101.json'}
+    for request in conditional.values():
+        assert 'If-None-Match' in request['headers'] and 'If-Modified-Since' in request['headers']
+        assert request['status'] == 304
+
+    assert second['topics_updated'] == 0 and second['not_modified'] == 2
+    assert topic_mtimes(output_dir) == written
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from services.answer_generator import AnswerGenerator
+from services.search_index import BM25Index, tokenize
+
+
+QUERIES = (
+    {'docker': 2.0, 'podman': 2.0, 'project': 1.0},
+    {'deadline': 1.0, 'extended': 1.0, 'ga5': 2.0},
+    {'gpt': 2.0, '4o': 2.0, 'mini': 2.0, 'openai': 1.0},
+    {'marks': 1.0, 'bonus': 1.0, 'dashboard': 1.0},
+    {'zyzzyva': 1.0}
+)
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    """(type, data, text) for every course section and discourse topic"""
+    generator = AnswerGenerator()
+    documents = [
+        ('course_content', content, content.get('content', '') + ' ' + ' '.join(content.get('keywords', [])))
+        for content in generator.load_enhanced_course_content()
+    ]
+    documents += [
+        ('discourse', topic, ' '.join([topic.get('title', ''), topic.get('answer_summary', ''), ' '.join(topic.get('keywords', []))]))
+        for topic in generator.load_enhanced_discourse_posts()
+    ]
+    return documents
+
+
+@pytest.fixture(scope='module')
+def index(corpus):
+    index = BM25Index()
+    for doc_type, data, text in corpus:
+        index.add_document(doc_type, data, text)
+    return index
+
+
+def linear_scan(corpus, query_weights, k1=1.5, b=0.75):
+    """Score every document by counting its tokens, with no inverted index"""
+    documents = [tokenize(text) for _, _, text in corpus]
+    avg_length = sum(len(tokens) for tokens in documents) / len(documents)
+    scores = {}
+    for term, weight in query_weights.items():
+        doc_freq = sum(1 for tokens in documents if term in tokens)
+        idf = math.log(1 + (len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+        for doc_id, tokens in enumerate(documents):
+            tf = tokens.count(term)
+            if tf:
+                norm = k1 * (1 - b + b * len(tokens) / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def test_index_scores_match_a_linear_scan(corpus, index):
+    assert len(index) == len(corpus)
+    for query_weights in QUERIES:
+        expected = linear_scan(corpus, query_weights)
+        scores = index.score_terms(query_weights)
+        assert scores.keys() == expected.keys()
+        for doc_id, score in expected.items():
+            assert scores[doc_id] == pytest.approx(score)
+
+
+def test_candidates_are_the_documents_the_old_scan_matched(corpus, index):
+    """
+    The old scan scored any document containing a keyword or a question term
+    longer than 3 characters; the index finds the same documents when those
+    terms are whole words
+    """
+    for query_weights in QUERIES:
+        matched = {
+            doc_id for doc_id, (_, _, text) in enumerate(corpus)
+            if any(term in tokenize(text) for term in query_weights)
+        }
+        assert set(index.score_terms(query_weights)) == matched
+        results = index.search(query_weights, top_k=3)
+        assert len(results) == min(3, len(matched))
+        assert [result['relevance'] for result in results] == sorted((result['relevance'] for result in results), reverse=True)
+        assert all(set(result) >= {'type', 'data', 'relevance'} for result in results)
@@ -0,0 +1,56 @@
+import pytest
+
+from services.answer_generator import AnswerGenerator
+from services.semantic_cache import SemanticCache, question_identifiers
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return AnswerGenerator()
+
+
+def processed(question: str) -> dict:
+    return {'cleaned_question': question, 'keywords': [], 'top_k': 3}
+
+
+def cache_answer(generator: AnswerGenerator, question: str) -> dict:
+    answer = {'answer': f"About: {question}", 'links': []}
+    _, vector = generator.lookup_semantic_cache(processed(question), generator.snapshot)
+    generator.store_semantic_cache(processed(question), generator.snapshot, vector, answer)
+    return answer
+
+
+def cached(generator: AnswerGenerator, question: str):
+    return generator.lookup_semantic_cache(processed(question), generator.snapshot)[0]
+
+
+@pytest.mark.parametrize('first, second', [
+    ('How do I submit GA4?', 'How do I submit GA5?'),
+    ('What is the deadline for GA4', 'What is the deadline for GA5'),
+    ('What is covered in week 6?', 'What is covered in week 7?'),
+    ('What topics and tools are covered in the week 6 lecture videos and notes?',
+     'What topics and tools are covered in the week 7 lecture videos and notes?'),
+])
+def test_different_assignments_and_weeks_do_not_share_answers(generator, first, second):
+    generator.semantic_cache.clear()
+    first_answer = cache_answer(generator, first)
+    assert cached(generator, second) is None
+    second_answer = cache_answer(generator, second)
+    assert cached(generator, first) is first_answer
+    assert cached(generator, second) is second_answer
+
+
+def test_rewordings_share_answers(generator):
+    generator.semantic_cache.clear()
+    answer = cache_answer(generator, 'Is the GA5 deadline extended?')
+    assert cached(generator, 'Has the GA5 deadline been extended') is answer
+    assert cached(generator, 'Should I use docker or podman?') is None
+
+
+def test_content_words_are_kept():
+    vectorizer = SemanticCache().vectorizer
+    # Only function words differ: the same question
+    assert vectorizer.transform('Can I use docker?') @ vectorizer.transform('use docker') == pytest.approx(1.0)
+    # 'allowed' and 'instead' carry meaning
+    assert vectorizer.transform('Is docker allowed?') @ vectorizer.transform('docker') < 0.85
+    assert question_identifiers('Use gpt-3.5 for GA4 in week 6') == {'3.5', 'ga4', '6'}
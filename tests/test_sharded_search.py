@@ -0,0 +1,99 @@
+import os
+import signal
+import time
+
+import pytest
+
+from services.answer_generator import AnswerGenerator
+from services.knowledge_ingest import KnowledgeIngestor
+from services.sharded_search import ShardedSearch
+
+
+QUESTIONS = ('docker podman', 'project submission deadline', 'graded assignment')
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return AnswerGenerator(use_compiled_snapshot=False)
+
+
+def query_weights(generator: AnswerGenerator, question: str) -> dict:
+    processed_question = {'keywords': [], 'cleaned_question': question, 'top_k': 3}
+    return generator.build_query_weights(processed_question, generator.snapshot)
+
+
+def result_ids(results: list) -> list:
+    return [result['doc_id'] for result in results]
+
+
+def wait_for_build(sharded: ShardedSearch, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while sharded.building and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_shards_are_rebuilt_after_a_worker_dies(generator):
+    snapshot = generator.snapshot
+    sharded = ShardedSearch(generator, 2, min_documents=0)
+    try:
+        sharded.build(snapshot)
+        assert sharded.serves(snapshot)
+        weights = query_weights(generator, QUESTIONS[0])
+        local = result_ids(generator.rank_local(snapshot, weights, 3))
+        assert result_ids(sharded.search(weights, 3)) == local
+
+        worker_pid = sharded.pools[0].submit(os.getpid).result()
+        os.kill(worker_pid, signal.SIGKILL)
+
+        # The broken pool is dropped and the caller searches locally
+        assert sharded.search(weights, 3) is None
+        assert sharded.failures == 1
+        assert sharded.built_for is None and sharded.pools == []
+
+        # The next search starts a rebuild; once it is done the shards serve again
+        assert not sharded.serves(snapshot)
+        wait_for_build(sharded)
+        assert sharded.serves(snapshot)
+        for question in QUESTIONS:
+            weights = query_weights(generator, question)
+            assert result_ids(sharded.search(weights, 3)) == result_ids(generator.rank_local(snapshot, weights, 3))
+    finally:
+        sharded.shutdown()
+
+
+def test_small_corpora_are_searched_locally(generator):
+    snapshot = generator.snapshot
+    sharded = ShardedSearch(generator, 2, min_documents=len(snapshot.search_index) + 1)
+    assert not sharded.serves(snapshot)
+    # Nothing is built, and it doesn't count as a fallback
+    assert not sharded.building and sharded.pools == []
+    assert sharded.fallbacks == 0
+
+
+def test_ingests_update_the_owning_shard_without_a_rebuild(tmp_path):
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    ingestor = KnowledgeIngestor(generator, log_path=str(tmp_path / 'ingest_log.jsonl'))
+    ingestor.attach()
+    sharded = ShardedSearch(generator, 2, min_documents=0)
+    generator.sharded_search = sharded
+    try:
+        sharded.build(generator.snapshot)
+        pools = sharded.pools
+
+        ingestor.ingest_topic({
+            'id': 990001,
+            'title': 'Zygomorphic docker plots',
+            'posts': [{'id': 1, 'content': 'Use zygomorphic petals in the docker chart', 'accepted': True}]
+        })
+        # Rewrite an existing topic too, replacing its passages
+        existing = next(topic for topic in generator.snapshot.discourse_posts if topic.get('posts'))
+        ingestor.ingest_post(existing['id'], {'id': 1, 'content': 'Replaced with zygomorphic docker advice'})
+
+        snapshot = generator.snapshot
+        assert sharded.serves(snapshot)
+        assert sharded.pools is pools and sharded.updates == 2 and sharded.fallbacks == 0
+        for question in QUESTIONS + ('zygomorphic docker',):
+            weights = query_weights(generator, question)
+            assert result_ids(sharded.search(weights, 3)) == result_ids(generator.rank_local(snapshot, weights, 3))
+    finally:
+        sharded.shutdown()
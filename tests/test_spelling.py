@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from services.answer_generator import AnswerGenerator
+from services.answer_rules import AnswerRuleBook
+from services.fuzzy_vocabulary import FuzzyVocabulary
+from services.question_processor import QuestionProcessor
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return QuestionProcessor()
+
+
+@pytest.mark.parametrize('question, typo, correction', [
+    ("should I use dokcer", 'dokcer', 'docker'),
+    ("is podmn required", 'podmn', 'podman'),
+    ("where is the dashbord", 'dashbord', 'dashboard'),
+])
+def test_corrects_misspelled_keywords(processor, question, typo, correction):
+    assert processor.process_question(question)['spelling_corrections'] == {typo: correction}
+
+
+@pytest.mark.parametrize('question', [
+    "I rose early to study",
+    "see you at the session",
+    "which mode should I pick",
+    "the chart shows nothing",
+])
+def test_leaves_english_words_alone(processor, question):
+    processed = processor.process_question(question)
+    assert processed['spelling_corrections'] == {}
+    assert processed['cleaned_question'] == question
+
+
+def test_english_words_keep_their_meaning(processor):
+    assert processor.process_question("I rose early to study")['predefined_answer_key'] is None
+    assert processor.process_question("which mode should I pick")['question_type'] == 'general'
+
+
+def test_predefined_answers_match_the_original_text(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    rules_file.write_text(json.dumps({'rules': [
+        {'key': 'environment.podman', 'match_all': [['podman']], 'answer': 'Use Podman.'}
+    ]}))
+    processor = QuestionProcessor(AnswerRuleBook(str(rules_file), reload_interval=0))
+
+    assert processor.process_question("is podman required")['predefined_answer_key'] == 'environment.podman'
+    processed = processor.process_question("is podmn required")
+    # The correction still helps keywords and search, but doesn't pick a canned answer
+    assert processed['spelling_corrections'] == {'podmn': 'podman'}
+    assert 'podman' in processed['keywords']
+    assert processed['predefined_answer_key'] is None
+
+
+def test_short_and_distant_words_are_not_corrected():
+    vocabulary = FuzzyVocabulary(['docker', 'model', 'sep'])
+    assert vocabulary.correct('sea') is None  # Below the minimum length
+    assert vocabulary.correct('dcoekr') is None  # Two edits in a six-letter word
+    assert vocabulary.correct('dokcer') == 'docker'
+
+
+def test_misspelled_model_name_suffix(processor):
+    processed = processor.process_question("gpt4o mni")
+    assert processed['cleaned_question'] == 'gpt-4o-mini'
+    assert 'gpt-4o-mini' in processed['keywords']
+
+
+def test_corpus_vocabulary_is_built_with_the_snapshot():
+    generator = AnswerGenerator(use_compiled_snapshot=False)
+    vocabulary = generator.snapshot.term_vocabulary
+    assert vocabulary is not None and 'docker' in vocabulary
+    processed_question = {'keywords': [], 'cleaned_question': 'dokcer setup', 'top_k': 3}
+    assert 'docker' in generator.build_query_weights(processed_question)
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app
+from services.knowledge_base import KnowledgeLoader
+
+
+CANNED_QUESTION = 'I know Docker but have not used Podman before. Should I use Docker for this course?'
+SEARCH_QUESTION = 'How do I install python packages with uv?'
+
+
+def wait_until_ready(loader: KnowledgeLoader, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not loader.ready and loader.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_lazy_startup_gates_search_until_the_knowledge_base_is_loaded(monkeypatch):
+    release = threading.Event()
+    ready_calls = []
+    loader = KnowledgeLoader(lambda: release.wait(5), lambda: ready_calls.append(True), lazy=True)
+    monkeypatch.setattr(app, 'knowledge_loader', loader)
+    client = TestClient(app.app)
+    loader.start()
+
+    # Live, not ready
+    assert client.get('/health').status_code == 200
+    response = client.get('/ready')
+    assert response.status_code == 503 and response.headers['Retry-After'] == str(app.STARTUP_RETRY_AFTER)
+    assert response.json()['status'] == 'loading'
+
+    # Canned answers are served; anything needing search is refused
+    assert client.post('/api/', json={'question': CANNED_QUESTION}).status_code == 200
+    for path, body in (('/api/', {'question': SEARCH_QUESTION}),
+                       ('/api/stream', {'question': SEARCH_QUESTION}),
+                       ('/api/batch', {'questions': [{'question': CANNED_QUESTION}, {'question': SEARCH_QUESTION}]})):
+        response = client.post(path, json=body)
+        assert response.status_code == 503, path
+        assert response.headers['Retry-After'] == str(app.STARTUP_RETRY_AFTER), path
+    assert not ready_calls
+
+    release.set()
+    wait_until_ready(loader)
+    assert client.get('/ready').json()['status'] == 'ready'
+    assert client.post('/api/', json={'question': SEARCH_QUESTION}).status_code == 200
+    assert ready_calls == [True]
+    assert client.get('/api/stats').json()['startup']['ready']
+
+
+def test_failed_load_is_reported_by_ready(monkeypatch):
+    def fail():
+        raise OSError('data/discourse_posts.json is unreadable')
+
+    loader = KnowledgeLoader(fail, lambda: None, lazy=True)
+    monkeypatch.setattr(app, 'knowledge_loader', loader)
+    loader.start()
+    wait_until_ready(loader)
+
+    response = TestClient(app.app).get('/ready')
+    assert response.status_code == 503
+    assert response.json() == {'status': 'failed', 'error': 'data/discourse_posts.json is unreadable'}
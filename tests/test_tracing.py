@@ -0,0 +1,30 @@
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+import app
+from services.tracing import TraceSampler
+
+
+QUESTION = 'How do I install python packages with uv for the GA2 tracing check?'
+
+
+def test_sampled_traces_are_logged_at_debug_level(monkeypatch, caplog):
+    monkeypatch.setattr(app, 'trace_sampler', TraceSampler(sample_rate=1.0))
+    client = TestClient(app.app)
+
+    with caplog.at_level(logging.DEBUG, logger='tds_virtual_ta.trace'):
+        response = client.post('/api/', json={'question': QUESTION})
+    assert response.status_code == 200 and 'debug' not in response.json()
+
+    records = [record for record in caplog.records if record.name == 'tds_virtual_ta.trace']
+    assert len(records) == 1 and records[0].levelno == logging.DEBUG
+    trace = json.loads(records[0].getMessage()[len('Request trace: '):])
+    assert trace['reason'] == 'sampled' and 'search' in trace['stages_ms']
+
+
+def test_requested_traces_are_returned(monkeypatch):
+    monkeypatch.setattr(app, 'trace_sampler', TraceSampler(allow_header=True))
+    response = TestClient(app.app).post('/api/', json={'question': QUESTION}, headers={'X-Debug-Trace': '1'})
+    assert response.json()['debug']['reason'] == 'header'